@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the embedded local memory backend.
+
+Fills one user's store with synthetic memories at each size (10k and 100k by
+default), then reports bulk load time, size on disk, cold open plus first
+search, retrieve latency (embedding + top-k search), single-memory append
+latency, and the time to compact after deleting 10% of the rows.
+
+Usage:
+    python benchmarks/local_memory_bench.py
+    python benchmarks/local_memory_bench.py --sizes 10000 50000 --dim 384 --queries 500
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.local_memory import UserMemory, hash_embed
+
+SUBJECTS = ["favourite food", "home town", "partner's name", "job", "allergy", "car", "dog's name",
+            "preferred language", "gym schedule", "favourite band", "birthday", "coffee order"]
+VALUES = ["sushi", "Lisbon", "Sam", "nurse", "peanuts", "a red hatchback", "Biscuit", "Portuguese",
+          "Tuesdays and Fridays", "Radiohead", "March 3rd", "flat white", "ramen", "Oslo", "teacher"]
+
+
+def synthetic_memories(count, rng):
+    return [
+        f"User's {rng.choice(SUBJECTS)} is {rng.choice(VALUES)} (note {i}, {rng.choice(VALUES)} mentioned in passing)"
+        for i in range(count)
+    ]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def bench_size(size, dim, queries, seed):
+    rng = random.Random(seed)
+    embed = lambda texts: hash_embed(texts, dim)  # noqa: E731
+    root = tempfile.mkdtemp(prefix="local-memory-bench-")
+    try:
+        path = os.path.join(root, "user")
+        # compact_ratio above 1 keeps deletes as tombstones until compact() is called explicitly
+        store = UserMemory(path, dim, embed, compact_ratio=2.0)
+
+        started = time.perf_counter()
+        texts = synthetic_memories(size, rng)
+        records = []
+        for offset in range(0, size, 10_000):
+            records += store.add_many(texts[offset:offset + 10_000])
+        load_seconds = time.perf_counter() - started
+        disk_mb = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 2**20
+
+        started = time.perf_counter()
+        cold = UserMemory(path, dim, embed)
+        cold.search("what is my favourite food", limit=10)
+        cold_ms = (time.perf_counter() - started) * 1000
+
+        prompts = [f"what is my {rng.choice(SUBJECTS)}" for _ in range(queries)]
+        latencies = []
+        for prompt in prompts:
+            started = time.perf_counter()
+            store.search(prompt, limit=10)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        appends = []
+        for i in range(100):
+            started = time.perf_counter()
+            store.add(f"User mentioned fact {i}")
+            appends.append((time.perf_counter() - started) * 1000)
+
+        for record in rng.sample(records, size // 10):
+            store.delete(record["id"])
+        started = time.perf_counter()
+        store.compact()
+        compact_ms = (time.perf_counter() - started) * 1000
+
+        return {
+            "memories": size,
+            "dim": dim,
+            "load_seconds": round(load_seconds, 2),
+            "disk_mb": round(disk_mb, 1),
+            "cold_open_search_ms": round(cold_ms, 2),
+            "search_p50_ms": round(percentile(latencies, 0.50), 3),
+            "search_p95_ms": round(percentile(latencies, 0.95), 3),
+            "append_p50_ms": round(percentile(appends, 0.50), 3),
+            "compact_ms": round(compact_ms, 1),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local memory backend")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [bench_size(size, args.dim, args.queries, args.seed) for size in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'memories':>10}{'load s':>9}{'disk MB':>9}{'cold ms':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'append ms':>11}{'compact ms':>12}")
+    for r in results:
+        print(f"{r['memories']:>10}{r['load_seconds']:>9}{r['disk_mb']:>9}{r['cold_open_search_ms']:>9}"
+              f"{r['search_p50_ms']:>9}{r['search_p95_ms']:>9}{r['append_p50_ms']:>11}{r['compact_ms']:>12}")
+
+
+if __name__ == "__main__":
+    main()
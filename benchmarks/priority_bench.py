@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+Mixed interactive and batch traffic against the real agent server.
+
+Starts the agent (one process) against the local model stub, whose
+--run-ms latency stands in for an agent run, with PRIORITY_MAX_CONCURRENCY
+set to --slots. A burst of batch requests is sent at once while interactive
+requests arrive at a steady rate. Reports client-side end-to-end latency per
+class, the server's ``priority_wait_ms`` p95 from /metrics, and how long the
+batch burst took to drain. The run is repeated with every request in one
+class (plain FIFO admission) as a baseline.
+
+Because requests go through HTTP, waits anywhere in the server (including
+for a handler thread) show up in the end-to-end numbers.
+
+Usage:
+    python benchmarks/priority_bench.py
+    python benchmarks/priority_bench.py --slots 4 --batch 60 --interactive-rps 2 --run-ms 200
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'deployment'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from model_stub import start_stub_server
+from worker_scaling_bench import AGENT_SCRIPT, stop_agent, wait_for_ping
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else None
+
+
+def start_agent(args, shares, default):
+    env = {
+        **os.environ,
+        "WORKERS": "1",
+        "PORT": str(args.port),
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.stub_port}/v1",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench"),
+        "MEM0_API_KEY": os.environ.get("MEM0_API_KEY", "bench"),
+        "PRIORITY_MAX_CONCURRENCY": str(args.slots),
+        "PRIORITY_SHARES": shares,
+        "PRIORITY_DEFAULT": default,
+        "PRIORITY_AGING_SECONDS": str(args.aging_seconds),
+        # Only the model stub's latency should count, and no request may be coalesced
+        "MEMORY_PREFETCH_ENABLED": "false",
+        "SINGLE_FLIGHT_WINDOW_MS": "0",
+    }
+    return subprocess.Popen(
+        [sys.executable, AGENT_SCRIPT], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+
+
+def drive(url, interactive_class, batch_class, args):
+    rng = random.Random(args.seed)
+    latencies = {"interactive": [], "batch": []}
+    errors = [0]
+    lock = threading.Lock()
+    threads = []
+    batch_done = []
+
+    def request(kind, priority, index):
+        payload = {"prompt": f"{kind} {index}", "user_id": f"{kind}-{index}", "session_id": f"{kind}-{index}"}
+        if priority:
+            payload["priority"] = priority
+        began = time.perf_counter()
+        try:
+            ok = "error" not in requests.post(url, json=payload, timeout=300).json()
+        except requests.RequestException:
+            ok = False
+        finished = time.perf_counter()
+        with lock:
+            if not ok:
+                errors[0] += 1
+                return
+            latencies[kind].append((finished - began) * 1000)
+            if kind == "batch":
+                batch_done.append(finished)
+
+    def start(kind, priority, index):
+        thread = threading.Thread(target=request, args=(kind, priority, index))
+        thread.start()
+        threads.append(thread)
+
+    started = time.perf_counter()
+    for index in range(args.batch):
+        start("batch", batch_class, index)
+    # Let the burst reach the server before the first interactive request
+    time.sleep(0.2)
+    deadline = time.perf_counter() + args.duration
+    index = 0
+    while time.perf_counter() < deadline:
+        start("interactive", interactive_class, index)
+        index += 1
+        time.sleep(rng.expovariate(args.interactive_rps))
+    for thread in threads:
+        thread.join()
+
+    def ms(values, pct):
+        value = percentile(values, pct)
+        return round(value, 1) if value is not None else None
+
+    return {
+        "interactive_requests": len(latencies["interactive"]),
+        "interactive_p50_ms": ms(latencies["interactive"], 0.50),
+        "interactive_p95_ms": ms(latencies["interactive"], 0.95),
+        "batch_p95_ms": ms(latencies["batch"], 0.95),
+        "batch_drain_seconds": round(max(batch_done) - started, 2) if batch_done else None,
+        "errors": errors[0],
+    }
+
+
+def server_waits(base_url):
+    """p95 of the server's own priority_wait_ms, per class."""
+    histograms = requests.get(f"{base_url}/metrics", timeout=10).json()["histograms"]
+    return {
+        key.split("=", 1)[1].rstrip("}"): value["p95"]
+        for key, value in histograms.items() if key.startswith("priority_wait_ms{")
+    }
+
+
+def run(mode, args):
+    if mode == "fifo":
+        shares, default, classes = "all=1.0", "all", (None, None)
+    else:
+        shares, default, classes = args.shares, "interactive", ("interactive", "batch")
+    base_url = f"http://127.0.0.1:{args.port}"
+    process = start_agent(args, shares, default)
+    try:
+        if not wait_for_ping(f"{base_url}/ping", args.startup_timeout):
+            raise RuntimeError(f"Agent did not become healthy ({mode})")
+        result = drive(f"{base_url}/invocations", *classes, args)
+        result["server_wait_p95_ms"] = server_waits(base_url)
+    finally:
+        stop_agent(process)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the agent server with interactive and batch traffic")
+    parser.add_argument("--slots", type=int, default=2, help="PRIORITY_MAX_CONCURRENCY for the server")
+    parser.add_argument("--batch", type=int, default=30, help="Batch requests sent at the start")
+    parser.add_argument("--interactive-rps", type=float, default=1)
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds of interactive arrivals")
+    parser.add_argument("--run-ms", type=int, default=300, help="Model stub latency per call")
+    parser.add_argument("--shares", default="interactive=1.0,batch=0.5")
+    parser.add_argument("--aging-seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--port", type=int, default=8091, help="Agent port (default: 8091)")
+    parser.add_argument("--stub-port", type=int, default=8766, help="Model stub port (default: 8766)")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="Seconds to wait for /ping")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    stub = start_stub_server(port=args.stub_port, host="127.0.0.1", latency_ms=args.run_ms)
+    try:
+        results = {mode: run(mode, args) for mode in ("fifo", "priority")}
+    finally:
+        stub.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'mode':>10}{'int p50 ms':>12}{'int p95 ms':>12}{'batch p95 ms':>14}{'drain s':>9}{'errors':>8}"
+          f"  server wait p95 ms")
+    for mode, r in results.items():
+        print(f"{mode:>10}{r['interactive_p50_ms']:>12}{r['interactive_p95_ms']:>12}"
+              f"{r['batch_p95_ms']:>14}{r['batch_drain_seconds']:>9}{r['errors']:>8}  {r['server_wait_p95_ms']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
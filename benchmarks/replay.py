@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Replay recorded invocations against the current code.
+
+Reads a file written with RECORD_INVOCATIONS_PATH set and runs each recorded
+payload through ``invoke`` in-process, in recorded order. Model calls and
+mem0_memory calls are served from the recording, so a run needs no network,
+is deterministic, and times only this service's own work. Everything else
+(sessions, tool execution, the event loop, use_llm sub-agents) is live code.
+
+Reported per run: latency percentiles and throughput, plus regressions against
+the recording: responses that differ, and model or mem0 requests that no
+longer match what was recorded (drift). Cancelled and degraded invocations, and
+any with a truncated model stream, are skipped and counted: their recorded
+calls stop wherever the cut-off happened, so they cannot be replayed faithfully.
+
+Usage:
+    RECORD_INVOCATIONS_PATH=traffic.jsonl python src/agents/openai_agent.py
+    python benchmarks/replay.py traffic.jsonl
+    python benchmarks/replay.py traffic.jsonl --repeat 5 --check
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'src'))
+sys.path.append(os.path.join(ROOT, 'src', 'agents'))
+
+# Settings are read at import time: never re-record, never coalesce, no real credentials needed.
+# Prefetch is off because its speculative lookup would consume recorded memory calls.
+os.environ["RECORD_INVOCATIONS_PATH"] = ""
+os.environ["SINGLE_FLIGHT_WINDOW_MS"] = "0"
+os.environ["MEMORY_PREFETCH_ENABLED"] = "false"
+os.environ.setdefault("OPENAI_API_KEY", "replay")
+os.environ.setdefault("MEM0_API_KEY", "replay")
+
+from strands_tools import mem0_memory
+from utils.recorder import ReplayModel, ReplayTool, is_truncated
+from utils.session_store import CompactSessionStore
+
+
+def load_records(path):
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda record: record["recorded_at"])
+
+
+def normalize(response):
+    return json.loads(json.dumps(response, default=str))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def replay(records, repeat=1):
+    import openai_agent as agent_module
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("strands").setLevel(logging.WARNING)
+
+    model = ReplayModel()
+    memory = ReplayTool(mem0_memory.TOOL_SPEC)
+    agent_module.model = model
+    agent_module.mem0_memory = memory
+
+    # Duplicates that joined a leader's run made no calls of their own
+    leaders = [record for record in records if not record.get("joined")]
+    runnable = [record for record in leaders if not is_truncated(record)]
+    latencies = []
+    mismatches = []
+    model_drift = tool_drift = 0
+    started = time.perf_counter()
+    for run in range(repeat):
+        agent_module.session_store = CompactSessionStore()
+        agent_module.tool_cache.clear()
+        for record in runnable:
+            model.load(record)
+            memory.load(record)
+            context = SimpleNamespace(session_id=record["session_id"])
+
+            call_started = time.perf_counter()
+            response = agent_module.invoke(record["payload"], context)
+            latencies.append(time.perf_counter() - call_started)
+
+            model_drift += model.drifted
+            tool_drift += memory.drifted
+            if run == 0 and "error" not in record and normalize(response) != record["response"]:
+                mismatches.append({"id": record["id"], "recorded": record["response"], "replayed": normalize(response)})
+    elapsed = time.perf_counter() - started
+
+    recorded_ms = [record["timings_ms"]["total"] for record in runnable]
+    return {
+        "records": len(records),
+        "replayed": len(runnable),
+        "skipped_joined": len(records) - len(leaders),
+        "skipped_truncated": len(leaders) - len(runnable),
+        "repeat": repeat,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "mean": round(statistics.mean(latencies) * 1000, 3),
+        },
+        "recorded_latency_ms": {
+            "p50": round(percentile(recorded_ms, 0.50), 3),
+            "p95": round(percentile(recorded_ms, 0.95), 3),
+        },
+        "model_drift": model_drift,
+        "memory_drift": tool_drift,
+        "response_mismatches": mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded invocations against the current code")
+    parser.add_argument("path", help="JSONL file written with RECORD_INVOCATIONS_PATH")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the whole file this many times")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero on any drift or response mismatch")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    records = load_records(args.path)
+    if not records:
+        sys.exit(f"No records in {args.path}")
+    report = replay(records, repeat=args.repeat)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Replayed {report['replayed']} invocations x{report['repeat']} "
+              f"({report['skipped_joined']} joined duplicates and "
+              f"{report['skipped_truncated']} cancelled, degraded or truncated invocations skipped)")
+        print(f"  throughput: {report['throughput_rps']} req/s")
+        print(f"  latency:    p50 {report['latency_ms']['p50']}ms  p95 {report['latency_ms']['p95']}ms "
+              f"(recorded p50 {report['recorded_latency_ms']['p50']}ms  p95 {report['recorded_latency_ms']['p95']}ms)")
+        print(f"  drift:      {report['model_drift']} model requests, {report['memory_drift']} memory calls")
+        print(f"  mismatches: {len(report['response_mismatches'])} responses")
+        for mismatch in report["response_mismatches"][:5]:
+            print(f"    {mismatch['id']}: {json.dumps(mismatch['replayed'])[:200]}")
+
+    regressed = report["model_drift"] or report["memory_drift"] or report["response_mismatches"]
+    if args.check and regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the compact session store.
+
+Builds synthetic conversation histories shaped like real agent turns (user
+prompts, calculator/mem0 tool calls and results, assistant replies) and
+reports per-session bytes for plain Strands message dicts versus
+CompactSessionStore at 1k and 10k sessions.
+
+Usage:
+    python benchmarks/session_store_bench.py
+    python benchmarks/session_store_bench.py --sessions 1000 5000 --turns 6
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.session_store import CompactSessionStore
+
+
+def build_history(session_index, turns):
+    """Build a realistic message history for one session."""
+    user_id = f"user-{session_index}"
+    messages = []
+    for turn in range(turns):
+        messages.append({
+            "role": "user",
+            "content": [{"text": f"[User ID: {user_id}] What is {turn} * {session_index} and do you remember my name?"}],
+        })
+        messages.append({
+            "role": "assistant",
+            "content": [
+                {"toolUse": {
+                    "toolUseId": f"call_{session_index:06d}{turn:04d}calc",
+                    "name": "calculator",
+                    "input": {"expression": f"{turn} * {session_index}", "mode": "evaluate"},
+                }},
+                {"toolUse": {
+                    "toolUseId": f"call_{session_index:06d}{turn:04d}mem0",
+                    "name": "mem0_memory",
+                    "input": {"action": "retrieve", "query": "user name", "user_id": user_id},
+                }},
+            ],
+        })
+        messages.append({
+            "role": "user",
+            "content": [
+                {"toolResult": {
+                    "toolUseId": f"call_{session_index:06d}{turn:04d}calc",
+                    "status": "success",
+                    "content": [{"text": f"Result: {turn * session_index}"}],
+                }},
+                {"toolResult": {
+                    "toolUseId": f"call_{session_index:06d}{turn:04d}mem0",
+                    "status": "success",
+                    "content": [{"text": json.dumps([{"id": f"mem-{session_index}", "memory": f"Name is {user_id}", "score": 0.82}])}],
+                }},
+            ],
+        })
+        messages.append({
+            "role": "assistant",
+            "content": [{"text": (
+                f"The answer is {turn * session_index}, {user_id}. What is real? How do you define real? "
+                "If you're talking about what you can feel, what you can smell, what you can taste and see, "
+                "then real is simply electrical signals interpreted by your brain."
+            )}],
+        })
+    return messages
+
+
+def measure(build):
+    """Return (result, bytes allocated) for a build callable."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def run(session_count, turns):
+    histories = [build_history(i, turns) for i in range(session_count)]
+    payload = json.dumps(histories)
+
+    # Plain dicts: re-create from JSON so no strings are shared with `histories`
+    plain, plain_bytes = measure(lambda: {f"session-{i}": h for i, h in enumerate(json.loads(payload))})
+    del plain
+
+    def build_store():
+        store = CompactSessionStore(max_sessions=session_count)
+        for i, history in enumerate(histories):
+            store.save(f"session-{i}", history)
+        return store
+
+    start = time.perf_counter()
+    store, compact_bytes = measure(build_store)
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, session_count, max(1, session_count // 100)):
+        store.load(f"session-{i}")
+    sampled = len(range(0, session_count, max(1, session_count // 100)))
+    load_ms = (time.perf_counter() - start) / sampled * 1000
+
+    return {
+        "sessions": session_count,
+        "messages_per_session": turns * 4,
+        "dict_bytes_per_session": plain_bytes // session_count,
+        "compact_bytes_per_session": compact_bytes // session_count,
+        "reduction": round(plain_bytes / compact_bytes, 2) if compact_bytes else None,
+        "encode_seconds": round(encode_seconds, 3),
+        "load_ms_per_session": round(load_ms, 3),
+        "interned_strings": store.stats()["interned_strings"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-session memory of the compact session store")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000], help="Session counts to measure")
+    parser.add_argument("--turns", type=int, default=4, help="Conversation turns per session (default: 4)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run(count, args.turns) for count in args.sessions]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'sessions':>10} {'dict B/sess':>12} {'compact B/sess':>15} {'reduction':>10} {'load ms':>8}")
+    for r in results:
+        print(f"{r['sessions']:>10} {r['dict_bytes_per_session']:>12} {r['compact_bytes_per_session']:>15} "
+              f"{r['reduction']:>9}x {r['load_ms_per_session']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
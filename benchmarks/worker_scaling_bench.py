@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for multi-worker serving.
+
+Starts the agent with WORKERS=1, 2, 4, ... (up to the core count) against the
+local OpenAI-compatible model stub, drives it with concurrent clients, each
+request in its own session so the router spreads them across workers, and
+reports requests per second and scaling relative to a single process.
+
+Usage:
+    python benchmarks/worker_scaling_bench.py
+    python benchmarks/worker_scaling_bench.py --workers 1 2 4 --duration 20 --concurrency 16
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'deployment'))
+from model_stub import start_stub_server
+
+AGENT_SCRIPT = os.path.join(ROOT, 'src', 'agents', 'openai_agent.py')
+
+
+def default_worker_counts():
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def start_agent(workers, port, stub_port):
+    env = {
+        **os.environ,
+        "WORKERS": str(workers),
+        "PORT": str(port),
+        "WORKER_BASE_PORT": str(port + 100),
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench"),
+        "MEM0_API_KEY": os.environ.get("MEM0_API_KEY", "bench"),
+        # Every request is distinct, but make sure nothing is coalesced
+        "SINGLE_FLIGHT_WINDOW_MS": "0",
+        # A speculative lookup would call the real mem0 API with the fake key
+        "MEMORY_PREFETCH_ENABLED": "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, AGENT_SCRIPT], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+
+
+def wait_for_ping(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def stop_agent(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(15)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+
+def drive(url, concurrency, duration, warmup):
+    """Closed-loop load: each client sends its next request as soon as the last returns."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def client(index):
+        session = requests.Session()
+        sent = 0
+        while time.monotonic() < stop_at:
+            sent += 1
+            payload = {"prompt": "hello", "user_id": f"bench-{index}", "session_id": f"bench-{index}-{sent}"}
+            began = time.monotonic()
+            try:
+                ok = session.post(url, json=payload, timeout=60).status_code == 200
+            except requests.RequestException:
+                ok = False
+            finished = time.monotonic()
+            if began < measure_from or finished > stop_at:
+                continue
+            with lock:
+                if ok:
+                    latencies.append((finished - began) * 1000)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def run(workers, args):
+    port = args.port
+    process = start_agent(workers, port, args.stub_port)
+    try:
+        if not wait_for_ping(f"http://127.0.0.1:{port}/ping", args.startup_timeout):
+            raise RuntimeError(f"Agent with {workers} worker(s) did not become healthy")
+        concurrency = args.concurrency or 4 * workers
+        latencies, errors = drive(f"http://127.0.0.1:{port}/invocations", concurrency, args.duration, args.warmup)
+    finally:
+        stop_agent(process)
+
+    latencies.sort()
+    return {
+        "workers": workers,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / args.duration, 2),
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure agent throughput scaling with worker processes")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Worker counts to measure (default: 1, 2, 4, ... up to the core count)")
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per run (default: 15)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before each run (default: 3)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Concurrent clients (default: 4 per worker)")
+    parser.add_argument("--port", type=int, default=8090, help="Agent port (default: 8090)")
+    parser.add_argument("--stub-port", type=int, default=8765, help="Model stub port (default: 8765)")
+    parser.add_argument("--stub-latency-ms", type=int, default=0, help="Artificial model latency (default: 0)")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="Seconds to wait for /ping")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    stub = start_stub_server(port=args.stub_port, host="127.0.0.1", latency_ms=args.stub_latency_ms)
+    try:
+        results = [run(workers, args) for workers in (args.workers or default_worker_counts())]
+    finally:
+        stub.shutdown()
+
+    baseline = results[0]["throughput_rps"] or None
+    for r in results:
+        r["speedup"] = round(r["throughput_rps"] / baseline, 2) if baseline else None
+
+    if args.json:
+        print(json.dumps({"cores": os.cpu_count(), "results": results}, indent=2))
+        return 0
+
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'workers':>8} {'clients':>8} {'req/s':>8} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for r in results:
+        print(f"{r['workers']:>8} {r['concurrency']:>8} {r['throughput_rps']:>8} {r['speedup']:>7}x "
+              f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['errors']:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,15 +2,98 @@
 """
 ECR deployment script for OpenAI Strands Agent.
 Builds and pushes Docker image to AWS ECR for production deployment.
+
+Builds run on a docker-container buildx builder and import/export BuildKit
+layer cache (in the registry by default), so a code-only change reuses the
+dependency layers instead of reinstalling and re-pushing them. Each step is
+timed. ``--registry`` targets any registry instead of ECR, e.g. a local
+``registry:2`` container for testing the cache.
 """
 import boto3
+import json
 import sys
 import os
+import time
+from contextlib import contextmanager
 from deploy_utils import (
-    run_command, check_docker_running, get_project_config,
+    DEPENDENCY_FILES, run_command, check_docker_running, get_project_config, file_digest,
     print_header, print_step, print_success, print_error
 )
 
+BUILDER_NAME = "agentcore-builder"
+DEFAULT_LOCAL_CACHE_DIR = ".buildcache"
+# ECR only accepts cache manifests in the OCI image-manifest format
+REGISTRY_CACHE_OPTS = "mode=max,image-manifest=true,oci-mediatypes=true"
+
+
+class StepTimer:
+    """Records the wall-clock duration of each deployment step."""
+
+    def __init__(self):
+        self.steps = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = round(time.perf_counter() - start, 2)
+            print(f"⏱️  {name}: {self.steps[name]:.1f}s")
+
+    def total(self):
+        return round(time.perf_counter() - self.started, 2)
+
+    def print_summary(self):
+        print("\n⏱️  Step timings:")
+        for name, seconds in self.steps.items():
+            print(f"   {name:<16} {seconds:8.1f}s")
+        print(f"   {'total':<16} {self.total():8.1f}s")
+
+    def write(self, path, **extra):
+        with open(path, "w") as f:
+            json.dump({**extra, "steps_seconds": self.steps, "total_seconds": self.total()}, f, indent=2)
+        print(f"📄 Timings written to {path}")
+
+
+def dependency_hash(config):
+    """Content hash of the files that decide the dependency layers."""
+    return file_digest([config["dockerfile_path"], *DEPENDENCY_FILES])
+
+
+def resolve_cache_specs(specs, direction, repository_uri, deps_hash):
+    """Expand ``--cache-from``/``--cache-to`` values into buildx cache arguments.
+
+    ``registry`` keeps the cache next to the image, under a tag keyed by the
+    dependency hash plus a rolling ``buildcache`` tag for when the hash is new.
+    ``local[:dir]`` uses a directory on this machine. ``none`` disables the
+    cache, and anything containing ``=`` is passed to buildx unchanged.
+    """
+    resolved = []
+    for spec in specs:
+        if spec == "none":
+            continue
+        if "=" in spec:
+            resolved.append(spec)
+        elif spec == "registry":
+            for ref in (f"{repository_uri}:buildcache-{deps_hash}", f"{repository_uri}:buildcache"):
+                if direction == "from":
+                    resolved.append(f"type=registry,ref={ref}")
+                else:
+                    resolved.append(f"type=registry,ref={ref},{REGISTRY_CACHE_OPTS}")
+        elif spec == "local" or spec.startswith("local:"):
+            cache_dir = spec.partition(":")[2] or DEFAULT_LOCAL_CACHE_DIR
+            if direction == "from":
+                # buildx fails on a cache directory that was never written
+                if os.path.exists(os.path.join(cache_dir, "index.json")):
+                    resolved.append(f"type=local,src={cache_dir}")
+            else:
+                resolved.append(f"type=local,dest={cache_dir},mode=max")
+        else:
+            raise ValueError(f"Unknown cache spec '{spec}'. Use registry, local[:dir], none or a buildx cache spec")
+    return resolved
+
 
 def verify_aws_credentials(region):
     """Verify AWS credentials and return account info."""
@@ -93,37 +176,69 @@ def login_to_ecr(region, account_id):
         return False
 
 
-def build_and_push_image(config, image_uri):
-    """Build and push Docker image to ECR."""
+def ensure_builder():
+    """Use a docker-container buildx builder; the default docker driver can't export cache."""
+    try:
+        run_command(["docker", "buildx", "inspect", BUILDER_NAME], capture_output=True)
+    except Exception:
+        print(f"📦 Creating buildx builder '{BUILDER_NAME}'...")
+        # Host networking lets the builder reach a registry on localhost
+        run_command([
+            "docker", "buildx", "create",
+            "--name", BUILDER_NAME,
+            "--driver", "docker-container",
+            "--driver-opt", "network=host",
+            "--bootstrap",
+        ])
+    return BUILDER_NAME
+
+
+def build_command(config, image_uri, builder, cache_from=(), cache_to=(), push=False):
+    """The ``docker buildx build`` command for one build pass."""
+    cmd = [
+        "docker", "buildx", "build",
+        "--builder", builder,
+        "--platform", config["platform"],
+        "-f", config["dockerfile_path"],
+        "-t", image_uri,
+    ]
+    for spec in cache_from:
+        cmd += ["--cache-from", spec]
+    for spec in cache_to:
+        cmd += ["--cache-to", spec]
+    cmd += ["--push"] if push else ["--output", "type=cacheonly"]
+    cmd.append(".")
+    return cmd
+
+
+def build_and_push_image(config, image_uri, cache_from=(), cache_to=(), timer=None):
+    """Build the image with layer cache, then push it.
+
+    The build pass imports and exports the cache but keeps the image in the
+    builder. The push pass reuses every layer from the builder, so it costs
+    only the upload and the two are timed separately.
+    """
     print_step(3, "Building and Pushing Docker Image")
-    
+    timer = timer or StepTimer()
+
     dockerfile_path = config["dockerfile_path"]
     if not os.path.exists(dockerfile_path):
         print_error(f"Dockerfile not found at {dockerfile_path}")
         return False
-    
-    print(f"🚀 Using optimized build with minimal dependencies")
 
     try:
-        # Ensure buildx is available
-        try:
-            run_command(["docker", "buildx", "ls"], capture_output=True)
-        except:
-            print("📦 Setting up Docker buildx...")
-            run_command(["docker", "buildx", "create", "--name", "agentcore-builder", "--use"])
+        with timer.step("builder"):
+            builder = ensure_builder()
+        print(f"🗂️  Cache from: {', '.join(cache_from) or 'none'}")
+        print(f"🗂️  Cache to: {', '.join(cache_to) or 'none'}")
 
-        # Build and push in one step
         print(f"🏗️  Building {config['platform']} image...")
+        with timer.step("build"):
+            run_command(build_command(config, image_uri, builder, cache_from, cache_to), capture_output=False)
+
         print(f"📤 Pushing to: {image_uri}")
-        
-        run_command([
-            "docker", "buildx", "build",
-            "--platform", config["platform"],
-            "-f", dockerfile_path,
-            "-t", image_uri,
-            "--push",
-            "."
-        ], capture_output=False)
+        with timer.step("push"):
+            run_command(build_command(config, image_uri, builder, push=True), capture_output=False)
 
         print("✅ Docker image built and pushed successfully!")
         return True
@@ -133,7 +248,8 @@ def build_and_push_image(config, image_uri):
             "Ensure Docker Desktop is running",
             "Check your Dockerfile exists",
             "Verify .env.example exists (copied to .env in container)",
-            "Check if pyproject.toml is in the root directory"
+            "Check deployment/requirements-base.txt and deployment/requirements.txt exist",
+            "Use --cache-from none --cache-to none to rule out a broken cache"
         ])
         return False
 
@@ -153,15 +269,25 @@ def main():
     parser.add_argument("--repository", default=repository_name, help=f"ECR repository name (default: {repository_name})")
     parser.add_argument("--tag", default="latest", help="Image tag (default: latest)")
     parser.add_argument("--skip-docker-check", action="store_true", help="Skip Docker running check")
+    parser.add_argument("--cache-from", action="append",
+                        help="Build cache source: registry, local[:dir], none or a buildx spec (repeatable, default: registry)")
+    parser.add_argument("--cache-to", action="append",
+                        help="Build cache destination: registry, local[:dir], none or a buildx spec (repeatable, default: registry)")
+    parser.add_argument("--registry",
+                        help="Push to this registry (e.g. localhost:5000) instead of ECR; skips all AWS steps")
+    parser.add_argument("--timings-file", help="Write step timings as JSON to this file")
     
     args = parser.parse_args()
     
     # Update config with args
     region = args.region
     repository_name = args.repository
+    timer = StepTimer()
     
     # Check Docker
-    if not args.skip_docker_check and not check_docker_running():
+    with timer.step("docker_check"):
+        docker_ok = args.skip_docker_check or check_docker_running()
+    if not docker_ok:
         print_error("Docker is not running", [
             "Start Docker Desktop",
             "Use --skip-docker-check if using remote Docker"
@@ -171,25 +297,50 @@ def main():
     if not args.skip_docker_check:
         print("✅ Docker is running")
     
-    # Verify AWS credentials
-    account_id = verify_aws_credentials(region)
-    if not account_id:
-        return 1
-    
-    # Setup ECR repository
-    if not setup_ecr_repository(region, repository_name):
-        return 1
+    if args.registry:
+        repository_uri = f"{args.registry}/{repository_name}"
+        print(f"📋 Using registry {args.registry} instead of ECR")
+    else:
+        # Verify AWS credentials
+        with timer.step("aws_credentials"):
+            account_id = verify_aws_credentials(region)
+        if not account_id:
+            return 1
+        
+        # Setup ECR repository
+        with timer.step("ecr_repository"):
+            repository_ok = setup_ecr_repository(region, repository_name)
+        if not repository_ok:
+            return 1
+        
+        repository_uri = f"{account_id}.dkr.ecr.{region}.amazonaws.com/{repository_name}"
+        
+        # Login to ECR
+        with timer.step("ecr_login"):
+            login_ok = login_to_ecr(region, account_id)
+        if not login_ok:
+            return 1
     
     # Build image URI
-    image_uri = f"{account_id}.dkr.ecr.{region}.amazonaws.com/{repository_name}:{args.tag}"
+    image_uri = f"{repository_uri}:{args.tag}"
     print(f"📋 Target image URI: {image_uri}")
     
-    # Login to ECR
-    if not login_to_ecr(region, account_id):
+    deps_hash = dependency_hash(config)
+    print(f"📋 Dependency hash: {deps_hash}")
+    try:
+        cache_from = resolve_cache_specs(args.cache_from or ["registry"], "from", repository_uri, deps_hash)
+        cache_to = resolve_cache_specs(args.cache_to or ["registry"], "to", repository_uri, deps_hash)
+    except ValueError as e:
+        print_error(str(e))
         return 1
     
     # Build and push image
-    if not build_and_push_image(config, image_uri):
+    built = build_and_push_image(config, image_uri, cache_from, cache_to, timer)
+    timer.print_summary()
+    if args.timings_file:
+        timer.write(args.timings_file, image=image_uri, dependency_hash=deps_hash,
+                    cache_from=cache_from, cache_to=cache_to, success=built)
+    if not built:
         return 1
     
     # Success summary
@@ -200,6 +351,7 @@ def main():
     print(f"   Image URI: {image_uri}")
     print(f"   Region: {region}")
     print(f"   Platform: {config['platform']}")
+    print(f"   Dependency hash: {deps_hash}")
 
     print("\n📌 Next Steps:")
     print("1. Go to AWS Bedrock Agent Core in the console")
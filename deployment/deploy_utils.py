@@ -2,9 +2,13 @@
 """
 Shared utilities for deployment scripts.
 """
+import hashlib
 import subprocess
 import os
 
+# Files that decide the image's dependency layers
+DEPENDENCY_FILES = ["deployment/requirements-base.txt", "deployment/requirements.txt"]
+
 
 def run_command(cmd, capture_output=True, check=True, input_text=None):
     """Helper to run shell commands with proper error handling."""
@@ -32,6 +36,16 @@ def check_docker_running():
         return False
 
 
+def file_digest(paths):
+    """Short content hash of the given files (missing files are skipped)."""
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
 def get_project_config():
     """Get common project configuration."""
     return {
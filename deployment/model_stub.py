@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible model stub for benchmarks.
+Serves /v1/chat/completions (streaming and non-streaming) with a canned reply
+so the agent can be exercised end to end without calling OpenAI.
+
+Run standalone:
+    python deployment/model_stub.py --port 8765
+Then point the agent at it:
+    OPENAI_BASE_URL=http://localhost:8765/v1 python src/agents/openai_agent.py
+
+With --rpm/--tpm the stub enforces request and token limits like OpenAI does,
+returning x-ratelimit-* headers on every response and 429s when exceeded.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Handle chat completion requests with a fixed assistant reply."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def do_GET(self):
+        self._rate_limit_headers = {}
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self._send_json({"error": {"message": "not found"}}, status=404)
+
+    def do_POST(self):
+        self._rate_limit_headers = {}
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json({"error": {"message": "not found"}}, status=404)
+            return
+
+        model = body.get("model", "stub")
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens") or 0
+        allowed, self._rate_limit_headers = self.server.admit(prompt_tokens + max_tokens)
+        if not allowed:
+            self._send_json({"error": {"message": "Rate limit reached", "type": "requests",
+                                       "code": "rate_limit_exceeded"}}, status=429)
+            return
+
+        self.server.request_count += 1
+        if self.server.latency_ms:
+            time.sleep(self.server.latency_ms / 1000)
+
+        completion_tokens = max(1, len(self.server.reply) // 4)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+        if body.get("stream"):
+            self._send_stream(model, usage)
+        else:
+            self._send_json({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.server.reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+    def _chunk(self, model, choices, usage=None):
+        chunk = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": choices,
+        }
+        if usage is not None:
+            chunk["usage"] = usage
+        return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+    def _send_stream(self, model, usage):
+        chunks = [self._chunk(model, [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])]
+        for word in self.server.reply.split(" "):
+            chunks.append(self._chunk(model, [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]))
+        chunks.append(self._chunk(model, [{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        chunks.append(self._chunk(model, [], usage))
+        chunks.append(b"data: [DONE]\n\n")
+        body = b"".join(chunks)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self._send_rate_limit_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self._send_rate_limit_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_rate_limit_headers(self):
+        for name, value in self._rate_limit_headers.items():
+            self.send_header(name, value)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the stub's configuration."""
+
+    daemon_threads = True
+
+    def __init__(self, address, reply="Wake up, Neo.", latency_ms=0, rpm=0, tpm=0, window_seconds=60.0):
+        super().__init__(address, StubHandler)
+        self.reply = reply
+        self.latency_ms = latency_ms
+        self.request_count = 0
+        self.throttled_count = 0
+        # Continuously refilled buckets, as OpenAI's limits behave
+        self.limits = {"requests": rpm, "tokens": tpm}
+        self.levels = {"requests": float(rpm), "tokens": float(tpm)}
+        self.window_seconds = window_seconds
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def admit(self, tokens):
+        """Charge one request and ``tokens``; return (allowed, rate limit headers)."""
+        costs = {"requests": 1, "tokens": tokens}
+        with self._lock:
+            now = time.monotonic()
+            elapsed, self._updated = now - self._updated, now
+            for name, limit in self.limits.items():
+                if limit:
+                    self.levels[name] = min(limit, self.levels[name] + elapsed * limit / self.window_seconds)
+
+            short = {name: costs[name] - self.levels[name] for name, limit in self.limits.items()
+                     if limit and self.levels[name] < costs[name]}
+            if not short:
+                for name, limit in self.limits.items():
+                    if limit:
+                        self.levels[name] -= costs[name]
+            else:
+                self.throttled_count += 1
+
+            headers = {}
+            for name, limit in self.limits.items():
+                if limit:
+                    remaining = max(0, int(self.levels[name]))
+                    reset = (limit - self.levels[name]) * self.window_seconds / limit
+                    headers[f"x-ratelimit-limit-{name}"] = str(limit)
+                    headers[f"x-ratelimit-remaining-{name}"] = str(remaining)
+                    headers[f"x-ratelimit-reset-{name}"] = f"{reset * 1000:.0f}ms"
+            if short:
+                retry_after = max(needed * self.window_seconds / self.limits[name] for name, needed in short.items())
+                headers["retry-after-ms"] = f"{retry_after * 1000:.0f}"
+        return not short, headers
+
+
+def start_stub_server(port=8765, host="0.0.0.0", reply="Wake up, Neo.", latency_ms=0, **limits):
+    """Start the stub in a background thread and return the server.
+
+    ``limits`` accepts ``rpm``, ``tpm`` and ``window_seconds``.
+    """
+    server = StubServer((host, port), reply=reply, latency_ms=latency_ms, **limits)
+    thread = threading.Thread(target=server.serve_forever, name="model-stub", daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible model stub")
+    parser.add_argument("--host", default="0.0.0.0", help="Host to bind (default: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--reply", default="Wake up, Neo.", help="Assistant reply text")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Artificial latency per request")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per window before 429s (default: unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per window before 429s (default: unlimited)")
+    parser.add_argument("--window-seconds", type=float, default=60.0, help="Rate limit window (default: 60)")
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), reply=args.reply, latency_ms=args.latency_ms,
+                        rpm=args.rpm, tpm=args.tpm, window_seconds=args.window_seconds)
+    print(f"🧪 Model stub listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,12 @@
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from starlette.responses import JSONResponse, PlainTextResponse
 from strands import Agent
-from strands.models.openai import OpenAIModel
-from strands_tools import calculator, mem0_memory, use_llm
+from strands.handlers.callback_handler import CompositeCallbackHandler, PrintingCallbackHandler
+from strands_tools import calculator, mem0_memory
+import asyncio
+import contextvars
+import hmac
+import time
 import sys
 import os
 import logging
@@ -9,10 +14,31 @@ import logging
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from config.settings import settings
+from utils.cancellation import DEADLINE_EXCEEDED, CancelToken, Cancelled, DisconnectMiddleware, cancellable, current_cancel, locked, use_token
+from utils.deadline import LatencyBudget, PartialAnswer, current_answer, parse_deadline_ms
 from utils.helpers import validate_payload, format_response
+from utils.local_memory import LocalMemory, LocalMemoryTool
+from utils.memory_filter import MemoryFilter
+from utils.memory_monitor import MemoryMonitor, resolve_watermarks
+from utils.metrics import metrics
+from utils.priority import PriorityScheduler
+from utils.prefetch import MemoryPrefetcher
+from utils.profiler import Profiler
+from utils.rate_limiter import RateLimitScheduler, RateLimitedOpenAIModel
+from utils.recorder import InvocationRecorder
+from utils.request_context import current_prompt, run_sync
+from utils.session_store import CompactSessionStore
+from utils.single_flight import SingleFlight, request_key
+from utils.subagent_pool import SubAgentPool, make_use_llm_tool
+from utils.tool_cache import SqliteToolResultCache, ToolResultCache, parse_policies
+from utils.tool_executor import ParallelToolExecutor
+from utils.workers import serve_workers
 
 app = BedrockAgentCoreApp()
 
+# An invocation whose client disconnects is cancelled instead of running to completion
+app.add_middleware(DisconnectMiddleware)
+
 # Configure logging for observability
 logging.basicConfig(
     level=logging.INFO,
@@ -25,8 +51,29 @@ logging.getLogger("strands").setLevel(logging.DEBUG)
 # Validate settings
 settings.validate()
 
+# Model calls wait for room in this worker's share of the OpenAI request/token budgets instead of hitting 429s
+rate_limiter = RateLimitScheduler(
+    requests_limit=settings.OPENAI_RPM_LIMIT,
+    tokens_limit=settings.OPENAI_TPM_LIMIT,
+    max_wait_seconds=settings.RATE_LIMIT_MAX_WAIT_SECONDS,
+    enabled=settings.RATE_LIMIT_ENABLED,
+    processes=settings.WORKER_COUNT,
+)
+
+# Invocations can be recorded for replay with benchmarks/replay.py
+recorder = InvocationRecorder(settings.RECORD_INVOCATIONS_PATH, sample_rate=settings.RECORD_SAMPLE_RATE)
+
+# Payload deadlines shrink model timeouts and max_tokens, and skip memory lookups when time is short
+latency_budget = LatencyBudget(
+    tokens_per_second=settings.DEADLINE_TOKENS_PER_SECOND,
+    min_tokens=settings.DEADLINE_MIN_TOKENS,
+    memory_min_seconds=settings.DEADLINE_MEMORY_MIN_MS / 1000,
+)
+
 # Initialize OpenAI model with settings
-model = OpenAIModel(
+model = recorder.wrap_model(RateLimitedOpenAIModel(
+    rate_limiter,
+    budget=latency_budget,
     client_args={
         "api_key": settings.OPENAI_API_KEY,
     },
@@ -35,41 +82,256 @@ model = OpenAIModel(
         "max_tokens": settings.OPENAI_MAX_TOKENS,
         "temperature": settings.OPENAI_TEMPERATURE,
     }
+))
+
+# Conversation history for every live session, kept in compact form between turns
+session_store = CompactSessionStore(
+    max_sessions=settings.SESSION_MAX_SESSIONS,
+    idle_ttl_seconds=settings.SESSION_IDLE_TTL_SECONDS,
 )
-# Create agent with tools including memory
-agent = Agent(
-    model=model,
-    tools=[calculator, mem0_memory, use_llm],
-    system_prompt=settings.SYSTEM_PROMPT,
+
+# Independent tool calls in one turn run in parallel, each under its own timeout
+tool_executor = ParallelToolExecutor(
+    max_concurrency=settings.TOOL_MAX_CONCURRENCY,
+    default_timeout=settings.TOOL_TIMEOUT_SECONDS,
+    tool_timeouts=settings.TOOL_TIMEOUTS,
+    thread_pool_size=settings.TOOL_THREAD_POOL_SIZE,
 )
 
+# Results of deterministic tools are shared across sessions and users (and workers)
+if settings.SHARED_CACHE_PATH:
+    tool_cache = SqliteToolResultCache(
+        settings.SHARED_CACHE_PATH,
+        policies=parse_policies(settings.TOOL_CACHE_POLICIES),
+        max_entries=settings.TOOL_CACHE_MAX_ENTRIES,
+    )
+else:
+    tool_cache = ToolResultCache(
+        policies=parse_policies(settings.TOOL_CACHE_POLICIES),
+        max_entries=settings.TOOL_CACHE_MAX_ENTRIES,
+    )
+
+# Memories live in mem0 unless the embedded local store is selected; it answers as mem0_memory
+if settings.MEMORY_BACKEND == "local":
+    mem0_memory = LocalMemoryTool(
+        LocalMemory(
+            settings.LOCAL_MEMORY_PATH,
+            dim=settings.LOCAL_MEMORY_DIM,
+            compact_ratio=settings.LOCAL_MEMORY_COMPACT_RATIO,
+        ),
+        mem0_memory.TOOL_SPEC,
+        search_limit=settings.LOCAL_MEMORY_SEARCH_LIMIT,
+    )
+
+# Memories are deduplicated, ranked and cut to a token budget before they enter the prompt
+memory_filter = None
+if settings.MEMORY_FILTER_ENABLED:
+    memory_filter = MemoryFilter(
+        token_budget=settings.MEMORY_TOKEN_BUDGET,
+        dedup_threshold=settings.MEMORY_DEDUP_THRESHOLD,
+        recency_weight=settings.MEMORY_RECENCY_WEIGHT,
+        recency_half_life_days=settings.MEMORY_RECENCY_HALF_LIFE_DAYS,
+    )
+
+# The user's memories are fetched speculatively while the first model call runs
+memory_prefetcher = None
+if settings.MEMORY_PREFETCH_ENABLED:
+    memory_prefetcher = MemoryPrefetcher(
+        max_workers=settings.MEMORY_PREFETCH_WORKERS,
+        min_hit_rate=settings.MEMORY_PREFETCH_MIN_HIT_RATE,
+    )
+
+# use_llm runs on pooled nested agents that share this process's model
+subagent_pool = SubAgentPool(max_size=settings.SUBAGENT_POOL_SIZE)
+use_llm = make_use_llm_tool(subagent_pool)
+
+# Shed state under memory pressure, cheapest to rebuild first: pooled sub-agents,
+# cached tool results, then the histories of sessions that have gone quiet
+memory_monitor = None
+watermarks = resolve_watermarks(
+    settings.MEMORY_HIGH_WATERMARK_MB, settings.MEMORY_LOW_WATERMARK_MB, processes=settings.WORKER_COUNT
+)
+if watermarks:
+    memory_monitor = MemoryMonitor(
+        *watermarks,
+        evictors=[
+            ("subagent_pool", lambda target_bytes: subagent_pool.drain()),
+            ("tool_cache", tool_cache.release_memory),
+            ("idle_sessions", lambda target_bytes: session_store.evict_idle(
+                settings.MEMORY_SESSION_MIN_IDLE_SECONDS, target_bytes)),
+        ],
+        interval_seconds=settings.MEMORY_CHECK_INTERVAL_SECONDS,
+    )
+    memory_monitor.start()
+
+# Agent runs are admitted by priority class so batch bursts cannot crowd out interactive chat
+priority_scheduler = PriorityScheduler(
+    settings.PRIORITY_MAX_CONCURRENCY,
+    settings.PRIORITY_SHARES,
+    aging_seconds=settings.PRIORITY_AGING_SECONDS,
+    default=settings.PRIORITY_DEFAULT,
+)
+
+# Retries and double submits of the same prompt wait on the run already in flight
+single_flight = SingleFlight(join_window_seconds=settings.SINGLE_FLIGHT_WINDOW_MS / 1000)
+
+
+def build_agent(messages, answer=None, prefetch=None):
+    """Create an agent with tools including memory, seeded with a session's history"""
+    callback_handler = PrintingCallbackHandler()
+    if answer:
+        # The partial answer is kept for replies cut short by a deadline
+        callback_handler = CompositeCallbackHandler(callback_handler, answer)
+    agent = Agent(
+        model=model,
+        messages=messages,
+        tools=[calculator, mem0_memory, use_llm],
+        system_prompt=settings.SYSTEM_PROMPT,
+        tool_executor=tool_executor,
+        callback_handler=callback_handler,
+    )
+    if answer:
+        answer.agent = agent
+    # Tool proxies stack in the order they are applied, innermost first
+    if prefetch:
+        # Innermost, so prefetched results are recorded and filtered like live ones
+        prefetch.attach(agent)
+    agent = recorder.wrap_agent(tool_cache.wrap_agent(agent))
+    if memory_filter:
+        memory_filter.wrap_agent(agent)
+    return latency_budget.wrap_agent(agent)
+
+
+def apply_deadlines(token, payload, started):
+    """Set the invocation timeout and the payload's deadline_ms on a token, both counted from ``started``"""
+    if settings.INVOCATION_TIMEOUT_SECONDS > 0:
+        token.set_deadline(started + settings.INVOCATION_TIMEOUT_SECONDS)
+    deadline_seconds = parse_deadline_ms(payload.get("deadline_ms"))
+    if deadline_seconds is not None:
+        token.set_deadline(started + deadline_seconds)
+
+
+def deadline_response(answer=None):
+    """Answer a request whose deadline passed with what it has so far, marked as degraded"""
+    answer = answer or PartialAnswer()
+    answer.mark(DEADLINE_EXCEEDED)
+    return answer.response()
+
+
+def cancelled_response(reason):
+    logging.getLogger(__name__).warning(f"Request cancelled: {reason}")
+    metrics.incr("invocations_cancelled_total", reason=reason.replace(" ", "_"))
+    return {"error": f"Request cancelled: {reason}"}
+
+
 @app.entrypoint
-def invoke(payload):
+async def handle_invocation(payload, context=None):
+    """Admit an HTTP request by priority class, then run invoke on a handler thread"""
+    arrived = time.monotonic()
+    # The disconnect middleware provides the token; it reaches invoke through the copied context
+    token = current_cancel.get() or CancelToken()
+    loop = asyncio.get_running_loop()
+
+    def run():
+        return loop.run_in_executor(None, contextvars.copy_context().run, invoke, payload, context, arrived)
+
+    try:
+        priority = priority_scheduler.resolve(payload.get("priority"))
+        apply_deadlines(token, payload, arrived)
+    except (AttributeError, ValueError):
+        # invoke reports the invalid request
+        return await run()
+
+    # Queued requests wait here on the event loop rather than holding a handler thread
+    try:
+        with use_token(token):
+            async with priority_scheduler.admit(priority, token, arrived):
+                return await run()
+    except Cancelled as e:
+        if e.reason == DEADLINE_EXCEEDED:
+            logging.getLogger(__name__).warning("Deadline exceeded while queued for admission")
+            return deadline_response()
+        return cancelled_response(e.reason)
+
+
+def invoke(payload, context=None, arrived=None):
     """Process user input and return a response using OpenAI"""
     logger = logging.getLogger(__name__)
+    started = arrived if arrived is not None else time.monotonic()
+    # HTTP requests bring their token from the middleware; direct calls get their own
+    token = current_cancel.get() or CancelToken()
     try:
         logger.info(f"Processing request with payload: {payload}")
+        with use_token(token), recorder.record(payload) as recording:
+            # Validate payload and extract prompt
+            with recording.stage("validate"):
+                user_message = validate_payload(payload)
+            logger.info(f"Validated user message: {user_message}")
+            current_prompt.set(user_message)
+            priority_scheduler.resolve(payload.get("priority"))
+            apply_deadlines(token, payload, started)
+
+            # Extract user_id from payload or use default
+            user_id = payload.get("user_id", "neo")
+            logger.info(f"Using user_id: {user_id}")
 
-        # Validate payload and extract prompt
-        user_message = validate_payload(payload)
-        logger.info(f"Validated user message: {user_message}")
+            # Conversation history is keyed by the AgentCore session, falling back to the payload
+            session_id = getattr(context, "session_id", None) or payload.get("session_id") or user_id
+            recording.update(session_id=session_id)
 
-        # Extract user_id from payload or use default
-        user_id = payload.get("user_id", "neo")
-        logger.info(f"Using user_id: {user_id}")
+            # Add user_id context to the message for memory operations
+            contextual_message = f"[User ID: {user_id}] {user_message}"
 
-        # Add user_id context to the message for memory operations
-        contextual_message = f"[User ID: {user_id}] {user_message}"
+            def run_turn():
+                token = current_cancel.get()
+                answer = PartialAnswer()
+                current_answer.set(answer)
+                prefetch = None
+                if memory_prefetcher and not latency_budget.should_skip("mem0_memory", {"action": "retrieve"}):
+                    prefetch = memory_prefetcher.begin(user_id, user_message)
+                try:
+                    # Turns within a session are serialized so history stays consistent;
+                    # a cancelled request stops waiting for the lock, and one cancelled mid-turn releases it
+                    with locked(session_store.lock(session_id), token):
+                        with recording.stage("load_session"):
+                            agent = build_agent(session_store.load(session_id), answer, prefetch)
+                        with recording.stage("agent"):
+                            try:
+                                # Cancelling the token cancels the model stream and pending tool calls
+                                result = run_sync(cancellable(agent.invoke_async(contextual_message), token))
+                            except Cancelled as e:
+                                if e.reason != DEADLINE_EXCEEDED:
+                                    raise
+                                # Out of time: answer with what the model has produced so far, without saving the turn
+                                logger.warning(f"Deadline exceeded for session {session_id}; returning a partial answer")
+                                return deadline_response(answer)
+                        with recording.stage("save_session"):
+                            session_store.save(session_id, agent.messages)
+                finally:
+                    if prefetch:
+                        prefetch.close()
+                return answer.response(result.message)
 
-        # Process with agent
-        logger.info("Invoking agent with OpenAI model and memory capabilities")
-        result = agent(contextual_message)
-        logger.info("Agent processing completed successfully")
+            # Process with agent, unless an identical request is already in flight
+            logger.info("Invoking agent with OpenAI model and memory capabilities")
+            try:
+                response, joined = single_flight.do(request_key(payload, session_id), run_turn, token)
+            except Cancelled as e:
+                if e.reason != DEADLINE_EXCEEDED:
+                    raise
+                # Out of time before the turn ran: waiting for the session lock or for a leader's run
+                logger.warning(f"Deadline exceeded waiting to run session {session_id}; returning a degraded answer")
+                response, joined = deadline_response(), False
+            if joined:
+                logger.info(f"Served duplicate request from the leader run for session {session_id}")
+            recording.update(response=response, joined=joined)
+            logger.info("Agent processing completed successfully")
 
         # Return formatted response
-        response = {"result": result.message}
         logger.info(f"Returning response: {response}")
         return response
+    except Cancelled as e:
+        return cancelled_response(e.reason)
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
         return {"error": f"Invalid request: {str(e)}"}
@@ -77,8 +339,61 @@ def invoke(payload):
         logger.error(f"Processing error: {str(e)}", exc_info=True)
         return {"error": f"Failed to process request: {str(e)}"}
 
+
+def metrics_endpoint(request):
+    """Expose in-process metrics (tool timings, counters) as JSON"""
+    return JSONResponse({
+        **metrics.snapshot(),
+        "tool_cache": tool_cache.stats(),
+        "subagent_pool": subagent_pool.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "memory": memory_monitor.stats() if memory_monitor else None,
+        "memory_filter": memory_filter.stats() if memory_filter else None,
+        "priority": priority_scheduler.stats(),
+        "memory_prefetch": memory_prefetcher.stats() if memory_prefetcher else None,
+    })
+
+
+app.add_route("/metrics", metrics_endpoint, methods=["GET"])
+
+profiler = Profiler()
+
+
+async def profile_endpoint(request):
+    """Sample all threads for ?seconds=N and return collapsed stacks plus a tracemalloc diff"""
+    if not hmac.compare_digest(request.headers.get("x-debug-token", ""), settings.DEBUG_PROFILING_TOKEN):
+        return JSONResponse({"error": "Forbidden"}, status_code=403)
+    try:
+        seconds = float(request.query_params.get("seconds", "10"))
+        interval_ms = float(request.query_params.get("interval_ms", "5"))
+    except ValueError:
+        return JSONResponse({"error": "seconds and interval_ms must be numbers"}, status_code=400)
+    seconds = min(max(seconds, 0.1), settings.DEBUG_PROFILE_MAX_SECONDS)
+
+    logging.getLogger(__name__).info(f"Profiling all threads for {seconds}s")
+    result = await asyncio.to_thread(profiler.run, seconds, max(interval_ms, 1.0) / 1000)
+    if result is None:
+        return JSONResponse({"error": "A profile is already running"}, status_code=409)
+    if request.query_params.get("format") == "collapsed":
+        return PlainTextResponse(result["collapsed"])
+    return JSONResponse(result)
+
+
+if settings.DEBUG_PROFILING_ENABLED:
+    app.add_route("/debug/profile", profile_endpoint, methods=["GET"])
+
 if __name__ == "__main__":
     print("🚀 Starting OpenAI Strands Agent with AgentCore...")
     print(f"Model: {settings.OPENAI_MODEL}")
     print(f"Host: {settings.HOST}:{settings.PORT}")
-    app.run(host=settings.HOST, port=settings.PORT)
\ No newline at end of file
+    if settings.WORKERS > 1:
+        print(f"Workers: {settings.WORKERS} (ports {settings.WORKER_BASE_PORT}+)")
+        serve_workers(
+            os.path.abspath(__file__),
+            workers=settings.WORKERS,
+            host=settings.HOST,
+            port=settings.PORT,
+            base_port=settings.WORKER_BASE_PORT,
+        )
+    else:
+        app.run(host=settings.HOST, port=settings.PORT)
\ No newline at end of file
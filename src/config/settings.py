@@ -8,6 +8,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _parse_float_map(value: str) -> dict:
+    """Parse a "name=value,name=value" environment string into a dict of floats."""
+    result = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, number = item.split("=", 1)
+            result[name.strip()] = float(number)
+    return result
+
+
 class Settings:
     """Application settings."""
 
@@ -17,8 +27,25 @@ class Settings:
     OPENAI_MAX_TOKENS: int = 1000
     OPENAI_TEMPERATURE: float = 0.7
     
+    # Client-side rate limiting of OpenAI calls, driven by x-ratelimit-* response headers
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "30"))
+    # Limits assumed before the first response reports them (0 = unknown until then)
+    OPENAI_RPM_LIMIT: int = int(os.getenv("OPENAI_RPM_LIMIT", "0"))
+    OPENAI_TPM_LIMIT: int = int(os.getenv("OPENAI_TPM_LIMIT", "0"))
+
     # Mem0 Configuration
     MEM0_API_KEY: str = os.getenv("MEM0_API_KEY", "")
+
+    # Where memories live: "mem0" (hosted) or "local" (embedded vector store on disk)
+    MEMORY_BACKEND: str = os.getenv("MEMORY_BACKEND", "mem0").lower()
+    LOCAL_MEMORY_PATH: str = os.getenv("LOCAL_MEMORY_PATH", "./data/memory")
+    LOCAL_MEMORY_DIM: int = int(os.getenv("LOCAL_MEMORY_DIM", "256"))
+    # Memories returned per retrieve
+    LOCAL_MEMORY_SEARCH_LIMIT: int = int(os.getenv("LOCAL_MEMORY_SEARCH_LIMIT", "20"))
+    # Deleted share of a user's rows at which their files are rewritten
+    LOCAL_MEMORY_COMPACT_RATIO: float = float(os.getenv("LOCAL_MEMORY_COMPACT_RATIO", "0.25"))
+
     # Agent Prompting
     SYSTEM_PROMPT: str = (
         "You are Morpheus from The Matrix - the legendary captain of the Nebuchadnezzar and leader of the human resistance. "
@@ -48,12 +75,97 @@ class Settings:
     AGENTCORE_ROLE_ARN: str = os.getenv("AGENTCORE_ROLE_ARN", "")
 
     # Server Configuration
-    HOST: str = "0.0.0.0"
-    PORT: int = 8080
+    HOST: str = os.getenv("HOST", "0.0.0.0")
+    PORT: int = int(os.getenv("PORT", "8080"))
+    # Worker processes behind a session-affine router; 1 serves from a single process
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
+    # Internal ports for workers are WORKER_BASE_PORT, WORKER_BASE_PORT + 1, ...
+    WORKER_BASE_PORT: int = int(os.getenv("WORKER_BASE_PORT", "9080"))
+    # Number of sibling worker processes (set by the router for each worker)
+    WORKER_COUNT: int = int(os.getenv("WORKER_COUNT", "1"))
+    # SQLite file for tool results shared by all workers (set automatically in worker mode)
+    SHARED_CACHE_PATH: str = os.getenv("SHARED_CACHE_PATH", "")
+
+    # Session Store Configuration
+    SESSION_MAX_SESSIONS: int = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+    SESSION_IDLE_TTL_SECONDS: int = int(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600"))
+
+    # Tool Execution Configuration
+    TOOL_MAX_CONCURRENCY: int = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))
+    TOOL_THREAD_POOL_SIZE: int = int(os.getenv("TOOL_THREAD_POOL_SIZE", "16"))
+    TOOL_TIMEOUT_SECONDS: float = float(os.getenv("TOOL_TIMEOUT_SECONDS", "30"))
+    # Per-tool overrides, e.g. "use_llm=90,calculator=5"
+    TOOL_TIMEOUTS: dict = _parse_float_map(os.getenv("TOOL_TIMEOUTS", "use_llm=90"))
+
+    # Maximum idle nested agents kept for reuse by the use_llm tool
+    SUBAGENT_POOL_SIZE: int = int(os.getenv("SUBAGENT_POOL_SIZE", "8"))
+
+    # Tool Result Cache Configuration
+    TOOL_CACHE_MAX_ENTRIES: int = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "4096"))
+    # Per-tool policy: pure, never or ttl:<seconds>; unlisted tools are never cached
+    TOOL_CACHE_POLICIES: str = os.getenv(
+        "TOOL_CACHE_POLICIES", "calculator=pure,mem0_memory=never,use_llm=never"
+    )
+
+    # Memory watermarks in MiB; 0 derives them from the container memory limit (85% / 70%)
+    MEMORY_HIGH_WATERMARK_MB: int = int(os.getenv("MEMORY_HIGH_WATERMARK_MB", "0"))
+    MEMORY_LOW_WATERMARK_MB: int = int(os.getenv("MEMORY_LOW_WATERMARK_MB", "0"))
+    MEMORY_CHECK_INTERVAL_SECONDS: float = float(os.getenv("MEMORY_CHECK_INTERVAL_SECONDS", "5"))
+    # Sessions used more recently than this are never evicted under memory pressure
+    MEMORY_SESSION_MIN_IDLE_SECONDS: float = float(os.getenv("MEMORY_SESSION_MIN_IDLE_SECONDS", "60"))
+
+    # Post-processing of mem0 retrieve/list results: dedup, rank by relevance and recency, token budget
+    MEMORY_FILTER_ENABLED: bool = os.getenv("MEMORY_FILTER_ENABLED", "true").lower() == "true"
+    # Tokens of memories allowed into the prompt per call (0 keeps every unique memory)
+    MEMORY_TOKEN_BUDGET: int = int(os.getenv("MEMORY_TOKEN_BUDGET", "800"))
+    # Word overlap (Jaccard) at which two memories count as duplicates
+    MEMORY_DEDUP_THRESHOLD: float = float(os.getenv("MEMORY_DEDUP_THRESHOLD", "0.85"))
+    # Share of a memory's rank that comes from recency, which halves every half-life
+    MEMORY_RECENCY_WEIGHT: float = float(os.getenv("MEMORY_RECENCY_WEIGHT", "0.2"))
+    MEMORY_RECENCY_HALF_LIFE_DAYS: float = float(os.getenv("MEMORY_RECENCY_HALF_LIFE_DAYS", "30"))
+
+    # Start retrieving the user's memories at request start, in parallel with the first model call
+    MEMORY_PREFETCH_ENABLED: bool = os.getenv("MEMORY_PREFETCH_ENABLED", "true").lower() == "true"
+    MEMORY_PREFETCH_WORKERS: int = int(os.getenv("MEMORY_PREFETCH_WORKERS", "8"))
+    # Below this share of recent prefetches used, only one request in ten prefetches
+    MEMORY_PREFETCH_MIN_HIT_RATE: float = float(os.getenv("MEMORY_PREFETCH_MIN_HIT_RATE", "0.2"))
+
+    # Identical requests for the same session arriving within this window share one run (0 disables)
+    SINGLE_FLIGHT_WINDOW_MS: int = int(os.getenv("SINGLE_FLIGHT_WINDOW_MS", "500"))
+
+    # Agent runs admitted at once across priority classes (0 disables priority scheduling)
+    PRIORITY_MAX_CONCURRENCY: int = int(os.getenv("PRIORITY_MAX_CONCURRENCY", "0"))
+    # Per class: fraction of the slots it may hold, also its weight when classes compete for a slot
+    PRIORITY_SHARES: dict = _parse_float_map(os.getenv("PRIORITY_SHARES", "interactive=1.0,batch=0.5"))
+    # Waiters queued longer than this are admitted ahead of the weighted order
+    PRIORITY_AGING_SECONDS: float = float(os.getenv("PRIORITY_AGING_SECONDS", "10"))
+    # Class used when a payload has no "priority" field
+    PRIORITY_DEFAULT: str = os.getenv("PRIORITY_DEFAULT", "interactive")
+
+    # Latency budgets: payloads may set deadline_ms; these fit the agent loop to the time left.
+    # Output tokens assumed to stream per second when shrinking max_tokens
+    DEADLINE_TOKENS_PER_SECOND: float = float(os.getenv("DEADLINE_TOKENS_PER_SECOND", "40"))
+    DEADLINE_MIN_TOKENS: int = int(os.getenv("DEADLINE_MIN_TOKENS", "64"))
+    # Memory lookups are skipped when less than this much time remains
+    DEADLINE_MEMORY_MIN_MS: int = int(os.getenv("DEADLINE_MEMORY_MIN_MS", "3000"))
+
+    # Invocations still running after this many seconds are cancelled (0 disables)
+    INVOCATION_TIMEOUT_SECONDS: float = float(os.getenv("INVOCATION_TIMEOUT_SECONDS", "120"))
 
     # Observability Configuration
     ENABLE_TRACING: bool = os.getenv("ENABLE_TRACING", "false").lower() == "true"
 
+    # On-demand profiling route (/debug/profile); off unless explicitly enabled
+    DEBUG_PROFILING_ENABLED: bool = os.getenv("DEBUG_PROFILING_ENABLED", "false").lower() == "true"
+    # Required when profiling is enabled; requests must send it in the X-Debug-Token header
+    DEBUG_PROFILING_TOKEN: str = os.getenv("DEBUG_PROFILING_TOKEN", "")
+    DEBUG_PROFILE_MAX_SECONDS: float = float(os.getenv("DEBUG_PROFILE_MAX_SECONDS", "60"))
+
+    # Append each invocation (payload, model and tool calls, timings) to this JSONL file; empty disables
+    RECORD_INVOCATIONS_PATH: str = os.getenv("RECORD_INVOCATIONS_PATH", "")
+    # Fraction of invocations recorded when recording is enabled
+    RECORD_SAMPLE_RATE: float = float(os.getenv("RECORD_SAMPLE_RATE", "1.0"))
+
     @classmethod
     def validate(cls) -> bool:
         """Validate required settings."""
@@ -62,11 +174,15 @@ class Settings:
                 "OPENAI_API_KEY environment variable is required. "
                 "Please set it in your .env file."
             )
-        if not cls.MEM0_API_KEY:
+        if cls.MEMORY_BACKEND not in ("mem0", "local"):
+            raise ValueError(f"MEMORY_BACKEND must be 'mem0' or 'local', got '{cls.MEMORY_BACKEND}'")
+        if cls.MEMORY_BACKEND == "mem0" and not cls.MEM0_API_KEY:
             raise ValueError(
                 "MEM0_API_KEY environment variable is required. "
                 "Please set it in your .env file."
             )
+        if cls.DEBUG_PROFILING_ENABLED and not cls.DEBUG_PROFILING_TOKEN:
+            raise ValueError("DEBUG_PROFILING_TOKEN is required when DEBUG_PROFILING_ENABLED is true")
         return True
 
 
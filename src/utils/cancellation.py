@@ -0,0 +1,251 @@
+"""
+Cancellation of in-flight invocations.
+
+Each invocation carries a ``CancelToken`` in the ``current_cancel`` context
+variable. The token is cancelled when the HTTP client disconnects
+(``DisconnectMiddleware``) or when the invocation's deadline passes.
+``cancellable`` runs the agent as an asyncio task tied to the token, so
+cancelling the token cancels the task: the model stream's HTTP request is
+closed and pending tool tasks are cancelled. Sync tools already running on a
+thread finish in the background, and their results are discarded.
+
+Requests joined by single-flight share one run. That run is cancelled only
+once every caller waiting on it has given up (``CancelGroup``).
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DISCONNECTED = "client disconnected"
+DEADLINE_EXCEEDED = "deadline exceeded"
+
+
+class Cancelled(Exception):
+    """Raised in place of the work a cancelled invocation was doing."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with an optional deadline and callbacks."""
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline  # time.monotonic() value
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def set_deadline(self, deadline: float) -> None:
+        """Tighten the deadline; a later deadline than the current one is ignored."""
+        with self._lock:
+            if self.deadline is None or deadline < self.deadline:
+                self.deadline = deadline
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline (never negative), or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def cancel(self, reason: str) -> bool:
+        """Cancel once; returns False if the token was already cancelled."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(reason)
+            except Exception as e:
+                logger.debug(f"Cancel callback failed: {e}")
+        return True
+
+    def add_callback(self, callback: Callable[[str], None]) -> Callable[[], None]:
+        """Call ``callback(reason)`` on cancellation (now, if already cancelled); returns a remover."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback(self.reason)
+        return lambda: None
+
+    def _remove(self, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+    def check(self) -> None:
+        """Raise Cancelled if the token is cancelled or past its deadline."""
+        if not self.cancelled and self.expired():
+            self.cancel(DEADLINE_EXCEEDED)
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+
+class CancelGroup(CancelToken):
+    """Token for work shared by several callers, cancelled once all of them have."""
+
+    def __init__(self):
+        super().__init__()
+        self._members = 0
+        self._gone = 0
+        self._deadlines: List[Optional[float]] = []
+
+    def join(self, token: CancelToken) -> None:
+        with self._lock:
+            self._members += 1
+            self._deadlines.append(token.deadline)
+            # The shared work stays useful until the most patient caller's deadline
+            self.deadline = None if None in self._deadlines else max(self._deadlines)
+        token.add_callback(self._member_cancelled)
+
+    def _member_cancelled(self, reason: str) -> None:
+        with self._lock:
+            self._gone += 1
+            everyone_gone = self._gone >= self._members
+        if everyone_gone:
+            self.cancel(reason)
+
+
+# The active invocation's cancellation token
+current_cancel: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar("current_cancel", default=None)
+
+
+@contextmanager
+def use_token(token: CancelToken) -> Iterator[CancelToken]:
+    reset = current_cancel.set(token)
+    try:
+        yield token
+    finally:
+        current_cancel.reset(reset)
+
+
+@contextmanager
+def locked(lock: threading.Lock, token: Optional[CancelToken], poll_seconds: float = 0.05) -> Iterator[None]:
+    """Hold ``lock``, giving up with Cancelled if ``token`` is cancelled while waiting for it."""
+    if token is None:
+        lock.acquire()
+    else:
+        while not lock.acquire(timeout=poll_seconds):
+            token.check()
+    try:
+        if token is not None:
+            token.check()
+        yield
+    finally:
+        lock.release()
+
+
+async def cancellable(awaitable: Awaitable[Any], token: Optional[CancelToken] = None) -> Any:
+    """Await ``awaitable`` as a task that is cancelled with the token or at its deadline."""
+    token = token or current_cancel.get()
+    if token is None:
+        return await awaitable
+    token.check()
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(awaitable)
+
+    def cancel_task(reason: str) -> None:
+        try:
+            loop.call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            pass  # the loop already finished
+
+    timer: Optional[asyncio.TimerHandle] = None
+
+    def on_deadline() -> None:
+        # A CancelGroup's deadline can move later as callers join, so re-check before cancelling
+        nonlocal timer
+        remaining = token.remaining()
+        if remaining is None:
+            timer = None
+        elif remaining > 0:
+            timer = loop.call_later(remaining, on_deadline)
+        else:
+            token.cancel(DEADLINE_EXCEEDED)
+
+    remove = token.add_callback(cancel_task)
+    on_deadline()
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if token.cancelled:
+            raise Cancelled(token.reason) from None
+        raise
+    finally:
+        remove()
+        if timer is not None:
+            timer.cancel()
+
+
+class DisconnectMiddleware:
+    """ASGI middleware that cancels an invocation's token when its client disconnects.
+
+    Once the request body has been read, a watcher task waits for the
+    ``http.disconnect`` message. Later ``receive`` calls by the application are
+    answered from the watcher, so only one coroutine reads from the server.
+    """
+
+    def __init__(self, app: Any, paths: tuple = ("/invocations",)):
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        token = CancelToken()
+        disconnected = asyncio.Event()
+        watcher: Optional[asyncio.Task] = None
+
+        async def watch() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    if token.cancel(DISCONNECTED):
+                        logger.info("Client disconnected; cancelling invocation")
+                    return
+
+        async def wrapped_receive():
+            nonlocal watcher
+            if watcher is not None:
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+                token.cancel(DISCONNECTED)
+            elif message["type"] == "http.request" and not message.get("more_body", False):
+                watcher = asyncio.create_task(watch())
+            return message
+
+        try:
+            with use_token(token):
+                await self.app(scope, wrapped_receive, send)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
@@ -0,0 +1,167 @@
+"""
+End-to-end latency budgets.
+
+A caller may give an invocation a deadline (``deadline_ms`` in the payload).
+The deadline is carried by the invocation's ``CancelToken``, so the whole
+agent loop sees the same remaining budget:
+
+- each OpenAI request gets the remaining time as its timeout, and
+  ``max_tokens`` shrinks to what can be generated in that time;
+- optional memory lookups are skipped once less than ``memory_min_seconds``
+  remains;
+- when the deadline passes, the invocation returns the text the model had
+  produced so far, marked as degraded, instead of an error.
+"""
+import contextvars
+import json
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from strands.types._events import ToolResultEvent
+from strands.types.tools import AgentTool
+
+from .cancellation import current_cancel
+from .metrics import metrics
+from .tool_proxy import ToolProxy, wrap_tool
+
+# Fallback answer when the deadline passes before the model produced any text
+NO_ANSWER_TEXT = "I ran out of time before I could finish answering. Please try again."
+
+
+class PartialAnswer:
+    """Agent callback handler that keeps the best answer so far and why it is degraded.
+
+    Only text streamed by ``agent`` counts; pooled use_llm sub-agents share the
+    parent's callback handler. The text is that of the latest model call that
+    produced any.
+    """
+
+    def __init__(self, agent: Any = None):
+        self.agent = agent
+        self.degraded: List[str] = []
+        self._cycle: Any = None
+        self._chunks: List[str] = []
+
+    def __call__(self, **kwargs: Any) -> None:
+        if "data" not in kwargs or (self.agent is not None and kwargs.get("agent") is not self.agent):
+            return
+        cycle = kwargs.get("event_loop_cycle_id")
+        if cycle != self._cycle:
+            self._cycle = cycle
+            self._chunks = []
+        self._chunks.append(kwargs["data"])
+
+    def mark(self, reason: str) -> None:
+        if reason not in self.degraded:
+            self.degraded.append(reason)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def response(self, message: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build the invocation response, from ``message`` or else from the partial text."""
+        if message is None:
+            message = {"role": "assistant", "content": [{"text": self.text or NO_ANSWER_TEXT}]}
+        response: Dict[str, Any] = {"result": message}
+        if self.degraded:
+            response["degraded"] = True
+            response["degraded_reasons"] = list(self.degraded)
+            for reason in self.degraded:
+                metrics.incr("invocations_degraded_total", reason=reason.replace(" ", "_"))
+        return response
+
+
+# The active invocation's partial answer
+current_answer: contextvars.ContextVar[Optional[PartialAnswer]] = contextvars.ContextVar("current_answer", default=None)
+
+
+def parse_deadline_ms(value: Any) -> Optional[float]:
+    """Validate a payload's ``deadline_ms``; returns seconds, or None when absent."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"deadline_ms must be a positive number of milliseconds, got {value!r}")
+    return value / 1000
+
+
+class LatencyBudget:
+    """Fits model calls and optional tool calls to the current invocation's deadline."""
+
+    def __init__(
+        self,
+        tokens_per_second: float = 40.0,
+        min_tokens: int = 64,
+        memory_min_seconds: float = 3.0,
+        optional_actions: Optional[Mapping[str, Sequence[str]]] = None,
+    ):
+        self.tokens_per_second = tokens_per_second
+        self.min_tokens = min_tokens
+        self.memory_min_seconds = memory_min_seconds
+        self.optional_actions = dict(optional_actions or {"mem0_memory": ("retrieve", "list")})
+
+    def remaining(self) -> Optional[float]:
+        token = current_cancel.get()
+        return token.remaining() if token is not None else None
+
+    def max_tokens(self, configured: int) -> int:
+        """Cap ``configured`` at what the model can generate before the deadline."""
+        remaining = self.remaining()
+        if remaining is None or not configured:
+            return configured
+        affordable = max(self.min_tokens, int(remaining * self.tokens_per_second))
+        return min(configured, affordable)
+
+    def apply(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Set an OpenAI request's timeout and max_tokens from the remaining budget."""
+        remaining = self.remaining()
+        if remaining is None:
+            return request
+        request["timeout"] = max(remaining, 0.001)
+        for key in ("max_tokens", "max_completion_tokens"):
+            if request.get(key):
+                budgeted = self.max_tokens(request[key])
+                if budgeted < request[key]:
+                    metrics.incr("deadline_max_tokens_reduced_total")
+                    request[key] = budgeted
+        return request
+
+    def should_skip(self, tool_name: str, tool_input: Dict[str, Any]) -> bool:
+        """Whether an optional tool call should be skipped to protect the deadline."""
+        if tool_input.get("action") not in self.optional_actions.get(tool_name, ()):
+            return False
+        remaining = self.remaining()
+        return remaining is not None and remaining < self.memory_min_seconds
+
+    def wrap_agent(self, agent: Any) -> Any:
+        """Make the optional tools on ``agent`` skippable under deadline pressure."""
+        for name in self.optional_actions:
+            wrap_tool(agent, name, lambda tool: BudgetedTool(tool, self))
+        return agent
+
+
+class BudgetedTool(ToolProxy):
+    """Proxy that answers optional calls with a "skipped" result when the deadline is near."""
+
+    def __init__(self, tool: AgentTool, budget: LatencyBudget):
+        super().__init__(tool)
+        self._budget = budget
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        tool_input = tool_use.get("input", {})
+        if not self._budget.should_skip(self.tool_name, tool_input):
+            async for event in super().stream(tool_use, invocation_state, **kwargs):
+                yield event
+            return
+
+        metrics.incr("deadline_skipped_total", tool=self.tool_name)
+        answer = current_answer.get()
+        if answer is not None:
+            answer.mark("memory lookup skipped")
+        yield ToolResultEvent({
+            "toolUseId": tool_use["toolUseId"],
+            "status": "success",
+            "content": [{"text": json.dumps({
+                "skipped": True,
+                "reason": "The request is close to its deadline; answer without stored memories.",
+            })}],
+        })
@@ -34,4 +34,9 @@ def safe_json_serialize(data: Any) -> str:
     try:
         return json.dumps(data, default=str)
     except (TypeError, ValueError) as e:
-        return json.dumps({"error": f"Serialization failed: {str(e)}"})
\ No newline at end of file
+        return json.dumps({"error": f"Serialization failed: {str(e)}"})
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of text (about 4 characters per token)."""
+    return max(1, len(text) // 4) if text else 0
@@ -0,0 +1,416 @@
+"""
+Embedded vector memory, a local alternative to mem0.
+
+Each user's memories live in their own directory, named by a hash of the
+owner:
+
+    OWNER          the user or agent the directory belongs to
+    CURRENT        generation number of the live files
+    <gen>.vec      float32 embedding rows, append-only
+    <gen>.jsonl    metadata log with one "add" or "delete" record per line
+
+The vector file is memory-mapped and searched with a single matrix-vector
+product. Writes append to both files under an exclusive file lock, vectors
+first, so several worker processes can share a directory; readers pick up
+other processes' writes by reading the new tail of the log. Deletes are
+tombstones until they pass ``compact_ratio`` of the rows, when the live rows
+are rewritten as the next generation and CURRENT is switched atomically.
+
+Embeddings come from ``hash_embed``, a feature-hashing embedder with no model
+or network dependency. Any callable that maps a list of texts to an
+L2-normalized float32 matrix can be used instead.
+
+Memory ids start with their directory's name, so ``get`` and ``delete`` by id
+alone (as mem0_memory calls them) open the right directory directly.
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+from strands.types._events import ToolResultEvent
+from strands.types.tools import AgentTool
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Hex digits of the owner hash that name a user's directory and prefix its memory ids
+KEY_LENGTH = 12
+_KEY = re.compile(rf"[0-9a-f]{{{KEY_LENGTH}}}")
+
+Embedder = Callable[[List[str]], np.ndarray]
+
+
+def hash_embed(texts: List[str], dim: int = 256) -> np.ndarray:
+    """Embed texts by hashing words, word prefixes and word pairs into ``dim`` signed buckets."""
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    for i, text in enumerate(texts):
+        words = _WORD.findall(text.lower())
+        features = words + [word[:4] for word in words if len(word) > 4]
+        features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        row = out[i]
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            row[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    out /= norms
+    return out
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class UserMemory:
+    """One user's memories: a memory-mapped embedding matrix plus its metadata log."""
+
+    def __init__(self, path: str, dim: int, embed: Embedder, compact_ratio: float = 0.25, id_prefix: str = ""):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dim = dim
+        self.embed = embed
+        self.compact_ratio = compact_ratio
+        self.id_prefix = id_prefix
+        self._row_bytes = dim * 4
+        self._lock = threading.RLock()
+        self._generation: Optional[int] = None
+
+    # -- files -----------------------------------------------------------
+
+    def _current_generation(self) -> int:
+        try:
+            with open(os.path.join(self.path, "CURRENT")) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _files(self, generation: int):
+        return os.path.join(self.path, f"{generation}.vec"), os.path.join(self.path, f"{generation}.jsonl")
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        with open(os.path.join(self.path, "lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    # -- in-memory index -------------------------------------------------
+
+    def _reset(self, generation: int) -> None:
+        self._generation = generation
+        self._vec_path, self._log_path = self._files(generation)
+        self._records: List[Optional[Dict[str, Any]]] = []
+        self._ids: Dict[str, int] = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._log_offset = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._deleted = 0
+
+    def _log_tail(self) -> bytes:
+        try:
+            with open(self._log_path, "rb") as f:
+                f.seek(self._log_offset)
+                return f.read()
+        except FileNotFoundError:
+            return b""
+
+    def _vector_rows(self) -> int:
+        try:
+            return os.path.getsize(self._vec_path) // self._row_bytes
+        except FileNotFoundError:
+            return 0
+
+    def _refresh(self) -> None:
+        """Catch up with writes made since the last call, by this or another process."""
+        generation = self._current_generation()
+        if generation != self._generation:
+            self._reset(generation)
+
+        # Log before vectors: writers append vectors first, so every record read has its row
+        tail = self._log_tail()
+        rows = self._vector_rows()
+        # Only whole lines; a writer may be halfway through the next one
+        complete = tail[:tail.rfind(b"\n") + 1]
+
+        if rows > len(self._records):
+            self._records.extend([None] * (rows - len(self._records)))
+            self._live = np.concatenate([self._live, np.zeros(rows - len(self._live), dtype=bool)])
+        for line in complete.splitlines(keepends=True):
+            record = json.loads(line)
+            if record["op"] == "add":
+                if record["row"] >= rows:
+                    # Its vectors are not visible (e.g. the files were compacted away); retry next time
+                    break
+                self._records[record["row"]] = record
+                self._ids[record["id"]] = record["row"]
+                self._live[record["row"]] = True
+            elif record["op"] == "delete" and record["id"] in self._ids:
+                self._live[self._ids.pop(record["id"])] = False
+                self._deleted += 1
+            self._log_offset += len(line)
+
+        if rows and (self._vectors is None or len(self._vectors) != rows):
+            self._vectors = np.memmap(self._vec_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+
+    def _append_log(self, records: List[Dict[str, Any]]) -> None:
+        with open(self._log_path, "ab") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records).encode("utf-8"))
+
+    # -- operations ------------------------------------------------------
+
+    def add_many(self, texts: List[str], metadata: Optional[List[Optional[Dict[str, Any]]]] = None,
+                 user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Append memories in one write; returns their records."""
+        vectors = np.ascontiguousarray(self.embed(texts), dtype=np.float32)
+        with self._lock, self._file_lock():
+            self._refresh()
+            with open(self._vec_path, "ab") as f:
+                # A torn earlier write leaves a partial row; start on a row boundary
+                start = f.tell() // self._row_bytes
+                f.truncate(start * self._row_bytes)
+                f.write(vectors.tobytes())
+            created_at = _now()
+            records = [
+                {"op": "add", "row": start + i, "id": f"{self.id_prefix}{uuid.uuid4()}", "memory": text,
+                 "user_id": user_id, "metadata": (metadata or [None] * len(texts))[i], "created_at": created_at}
+                for i, text in enumerate(texts)
+            ]
+            self._append_log(records)
+            self._refresh()
+        return records
+
+    def add(self, text: str, metadata: Optional[Dict[str, Any]] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+        return self.add_many([text], [metadata], user_id=user_id)[0]
+
+    def delete(self, memory_id: str) -> bool:
+        with self._lock, self._file_lock():
+            self._refresh()
+            if memory_id not in self._ids:
+                return False
+            self._append_log([{"op": "delete", "id": memory_id}])
+            self._refresh()
+            if self._deleted >= 64 and self._deleted > self.compact_ratio * len(self._records):
+                self._compact()
+        return True
+
+    def compact(self) -> int:
+        """Rewrite the live rows as a new generation; returns the number of rows dropped."""
+        with self._lock, self._file_lock():
+            self._refresh()
+            return self._compact()
+
+    def _compact(self) -> int:
+        started = time.perf_counter()
+        live_rows = np.flatnonzero(self._live)
+        dropped = len(self._records) - len(live_rows)
+        generation = self._generation + 1
+        vec_path, log_path = self._files(generation)
+
+        with open(vec_path, "wb") as f:
+            if len(live_rows):
+                f.write(np.ascontiguousarray(self._vectors[live_rows]).tobytes())
+        with open(log_path, "w", encoding="utf-8") as f:
+            for new_row, row in enumerate(live_rows):
+                f.write(json.dumps({**self._records[row], "row": new_row}) + "\n")
+        current_tmp = os.path.join(self.path, "CURRENT.tmp")
+        with open(current_tmp, "w") as f:
+            f.write(str(generation))
+        os.replace(current_tmp, os.path.join(self.path, "CURRENT"))
+
+        old_files = (self._vec_path, self._log_path)
+        self._vectors = None
+        self._refresh()
+        for path in old_files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        metrics.incr("local_memory_compactions_total")
+        logger.info(f"Compacted {self.path}: dropped {dropped} rows in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return dropped
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Top ``limit`` live memories by cosine similarity to ``query``."""
+        started = time.perf_counter()
+        query_vector = self.embed([query])[0]
+        with self._lock:
+            self._refresh()
+            if self._vectors is None or not self._live.any():
+                return []
+            scores = self._vectors @ query_vector
+            scores[~self._live] = -np.inf
+            k = min(limit, int(self._live.sum()))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            results = [{**self._records[row], "score": float(scores[row])} for row in top]
+        metrics.observe("local_memory_search_ms", (time.perf_counter() - started) * 1000)
+        return results
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return [self._records[row] for row in np.flatnonzero(self._live)]
+
+    def get(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            row = self._ids.get(memory_id)
+            return self._records[row] if row is not None else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return int(self._live.sum())
+
+    def close(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._generation = None
+
+
+class LocalMemory:
+    """Per-user vector memories under one root directory."""
+
+    def __init__(self, root: str, dim: int = 256, embed: Optional[Embedder] = None,
+                 compact_ratio: float = 0.25, max_open: int = 256):
+        self.root = root
+        self.dim = dim
+        self.embed = embed or (lambda texts: hash_embed(texts, dim))
+        self.compact_ratio = compact_ratio
+        self.max_open = max_open
+        self._open: "OrderedDict[str, UserMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def _key(owner: str) -> str:
+        return hashlib.sha1(owner.encode("utf-8")).hexdigest()[:KEY_LENGTH]
+
+    def _store(self, key: str, owner: Optional[str] = None) -> UserMemory:
+        with self._lock:
+            store = self._open.get(key)
+            if store is None:
+                path = os.path.join(self.root, key)
+                store = UserMemory(path, self.dim, self.embed, self.compact_ratio, id_prefix=f"{key}-")
+                if owner is not None and not os.path.exists(os.path.join(path, "OWNER")):
+                    with open(os.path.join(path, "OWNER"), "w", encoding="utf-8") as f:
+                        f.write(owner)
+                self._open[key] = store
+                while len(self._open) > self.max_open:
+                    self._open.popitem(last=False)[1].close()
+            self._open.move_to_end(key)
+            return store
+
+    def user(self, user_id: Optional[str] = None, agent_id: Optional[str] = None) -> UserMemory:
+        if not user_id and not agent_id:
+            raise ValueError("Either user_id or agent_id must be provided")
+        owner = f"user:{user_id}" if user_id else f"agent:{agent_id}"
+        return self._store(self._key(owner), owner)
+
+    def owner_of(self, memory_id: str) -> Optional[UserMemory]:
+        """The store holding ``memory_id``, found from the id's prefix, or None."""
+        key = memory_id[:KEY_LENGTH]
+        if not _KEY.fullmatch(key) or memory_id[KEY_LENGTH:KEY_LENGTH + 1] != "-":
+            return None
+        if not os.path.isdir(os.path.join(self.root, key)):
+            return None
+        return self._store(key)
+
+
+def _public(record: Dict[str, Any]) -> Dict[str, Any]:
+    """A record in the shape mem0 returns."""
+    memory = {key: record.get(key) for key in ("id", "memory", "user_id", "metadata", "created_at")}
+    memory["updated_at"] = None
+    if "score" in record:
+        memory["score"] = record["score"]
+    return memory
+
+
+class LocalMemoryTool(AgentTool):
+    """Drop-in replacement for ``mem0_memory`` backed by LocalMemory."""
+
+    def __init__(self, memory: LocalMemory, tool_spec: Dict[str, Any], search_limit: int = 20):
+        super().__init__()
+        self.memory = memory
+        self._spec = tool_spec
+        self.search_limit = search_limit
+
+    @property
+    def tool_name(self) -> str:
+        return self._spec["name"]
+
+    @property
+    def tool_spec(self):
+        return self._spec
+
+    @property
+    def tool_type(self) -> str:
+        return "python"
+
+    def run(self, tool_input: Dict[str, Any]) -> str:
+        """Perform one action and return the result text, as mem0_memory would."""
+        action = tool_input.get("action")
+        if not action:
+            raise ValueError("action parameter is required")
+        user_id, agent_id = tool_input.get("user_id"), tool_input.get("agent_id")
+
+        if action == "store":
+            if not tool_input.get("content"):
+                raise ValueError("content is required for store action")
+            record = self.memory.user(user_id, agent_id).add(
+                tool_input["content"], tool_input.get("metadata"), user_id=user_id or agent_id)
+            return json.dumps([{"id": record["id"], "memory": record["memory"], "event": "ADD"}], indent=2)
+
+        if action == "retrieve":
+            if not tool_input.get("query"):
+                raise ValueError("query is required for retrieve action")
+            results = self.memory.user(user_id, agent_id).search(tool_input["query"], self.search_limit)
+            return json.dumps([_public(record) for record in results], indent=2)
+
+        if action == "list":
+            return json.dumps([_public(record) for record in self.memory.user(user_id, agent_id).list()], indent=2)
+
+        if action in ("get", "delete", "history"):
+            memory_id = tool_input.get("memory_id")
+            if not memory_id:
+                raise ValueError(f"memory_id is required for {action} action")
+            store = self.memory.user(user_id, agent_id) if user_id or agent_id else self.memory.owner_of(memory_id)
+            record = store.get(memory_id) if store else None
+            if record is None:
+                raise ValueError(f"Memory {memory_id} not found")
+            if action == "get":
+                return json.dumps(_public(record), indent=2)
+            if action == "history":
+                return json.dumps([{"memory_id": memory_id, "event": "ADD", "new_memory": record["memory"],
+                                    "created_at": record["created_at"]}], indent=2)
+            store.delete(memory_id)
+            return f"Memory {memory_id} deleted successfully"
+
+        raise ValueError(f"Invalid action: {action}")
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        tool_use_id = tool_use.get("toolUseId", "default-id")
+        try:
+            text = await asyncio.to_thread(self.run, tool_use.get("input", {}))
+            result = {"toolUseId": tool_use_id, "status": "success", "content": [{"text": text}]}
+        except Exception as e:
+            result = {"toolUseId": tool_use_id, "status": "error", "content": [{"text": f"Error: {str(e)}"}]}
+        yield ToolResultEvent(result)
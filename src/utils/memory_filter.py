@@ -0,0 +1,220 @@
+"""
+Post-processing of mem0_memory results before they reach the prompt.
+
+``retrieve`` and ``list`` return every matching memory, pretty-printed with
+all of mem0's bookkeeping fields. For long-time users that is most of the
+prompt. ``MemoryFilter`` removes near-duplicates, ranks what is left by
+relevance to the current request and recency, and keeps the best memories
+that fit a token budget, in compact form.
+"""
+import json
+import logging
+import math
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from strands.types._events import ToolResultEvent
+from strands.types.tools import AgentTool
+
+from .helpers import estimate_tokens
+from .metrics import metrics
+from .request_context import current_prompt
+from .tool_proxy import ToolProxy, wrap_tool
+
+logger = logging.getLogger(__name__)
+
+# Actions whose results are lists of memories
+FILTERED_ACTIONS = ("retrieve", "list")
+
+# Fields kept per memory; the rest is mem0 bookkeeping the model does not need
+KEPT_FIELDS = ("id", "memory", "score", "updated_at", "created_at", "metadata")
+
+# Upper bounds for the tokens-saved histogram
+TOKEN_BUCKETS = (0, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Words of two or more characters, so possessives and stray letters do not count
+_WORD = re.compile(r"[a-z0-9]{2,}")
+
+
+def text_words(text: str) -> FrozenSet[str]:
+    """Lower-cased words of two or more characters in ``text``."""
+    return frozenset(_WORD.findall(text.lower()))
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+    return len(a & b) / len(a | b)
+
+
+def _timestamp(memory: Dict[str, Any]) -> Optional[float]:
+    value = memory.get("updated_at") or memory.get("created_at")
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _compact(memory: Dict[str, Any]) -> Dict[str, Any]:
+    kept = {field: memory[field] for field in KEPT_FIELDS if memory.get(field) not in (None, "", {}, [])}
+    # Only one timestamp is useful to the model
+    if "updated_at" in kept:
+        kept.pop("created_at", None)
+    if isinstance(kept.get("score"), float):
+        kept["score"] = round(kept["score"], 3)
+    return kept
+
+
+class MemoryFilter:
+    """Dedups, ranks and budgets a list of mem0 memories."""
+
+    def __init__(
+        self,
+        token_budget: int = 800,
+        dedup_threshold: float = 0.85,
+        recency_weight: float = 0.2,
+        recency_half_life_days: float = 30.0,
+        clock=time.time,
+    ):
+        self.token_budget = token_budget
+        self.dedup_threshold = dedup_threshold
+        self.recency_weight = recency_weight
+        self.recency_half_life_days = recency_half_life_days
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._totals = {"calls": 0, "memories_in": 0, "memories_out": 0, "duplicates": 0,
+                        "tokens_in": 0, "tokens_out": 0}
+
+    def filter(self, memories: List[Dict[str, Any]], query: str = "") -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """Return the memories to keep, best first, with counts of what was removed."""
+        entries = [m for m in memories if isinstance(m, dict) and isinstance(m.get("memory"), str)]
+        unique, duplicates = self._dedup(entries)
+        ranked = self._rank(unique, text_words(query))
+
+        kept, used = [], 2  # the enclosing brackets
+        for memory in ranked:
+            compact = _compact(memory)
+            cost = estimate_tokens(json.dumps(compact)) + 1
+            if self.token_budget > 0 and kept and used + cost > self.token_budget:
+                continue
+            kept.append(compact)
+            used += cost
+
+        return kept, {
+            "memories_in": len(memories),
+            "memories_out": len(kept),
+            "duplicates": duplicates,
+            "over_budget": len(ranked) - len(kept),
+        }
+
+    def _dedup(self, memories: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """Drop memories whose words overlap an already-kept one past the threshold.
+
+        Memories are considered strongest first, so the copy that survives is the
+        more relevant (or, without scores, the newer) one.
+        """
+        ordered = sorted(memories, key=lambda m: (m.get("score") or 0.0, _timestamp(m) or 0.0), reverse=True)
+        kept: List[Tuple[FrozenSet[str], Dict[str, Any]]] = []
+        for memory in ordered:
+            words = text_words(memory["memory"])
+            if any(_jaccard(words, seen) >= self.dedup_threshold for seen, _ in kept):
+                continue
+            kept.append((words, memory))
+        return [memory for _, memory in kept], len(memories) - len(kept)
+
+    def _rank(self, memories: List[Dict[str, Any]], query_words: FrozenSet[str]) -> List[Dict[str, Any]]:
+        now = self.clock()
+        half_life = self.recency_half_life_days * 86400
+
+        def score(memory: Dict[str, Any]) -> float:
+            relevance = memory.get("score")
+            if not isinstance(relevance, (int, float)):
+                # No semantic score (list action): fall back to word overlap with the request
+                words = text_words(memory["memory"])
+                relevance = len(words & query_words) / len(words) if words else 0.0
+            stamp = _timestamp(memory)
+            recency = math.pow(0.5, max(0.0, now - stamp) / half_life) if stamp and half_life > 0 else 0.0
+            return (1 - self.recency_weight) * relevance + self.recency_weight * recency
+
+        return sorted(memories, key=score, reverse=True)
+
+    def apply(self, tool_input: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Filter a mem0_memory tool result in place of the raw one."""
+        if tool_input.get("action") not in FILTERED_ACTIONS or result.get("status") != "success":
+            return result
+        content = result.get("content") or []
+        text = content[0].get("text") if content else None
+        try:
+            memories = json.loads(text)
+        except (TypeError, ValueError):
+            return result
+        if not isinstance(memories, list):
+            return result
+
+        query = " ".join(part for part in (tool_input.get("query"), current_prompt.get()) if part)
+        kept, counts = self.filter(memories, query)
+        filtered_text = json.dumps(kept, separators=(",", ":"))
+        tokens_in, tokens_out = estimate_tokens(text), estimate_tokens(filtered_text)
+        self._record(counts, tokens_in, tokens_out)
+        logger.info(
+            f"Memory filter kept {counts['memories_out']}/{counts['memories_in']} memories "
+            f"({counts['duplicates']} duplicates), saved {tokens_in - tokens_out} tokens"
+        )
+        return {**result, "content": [{"text": filtered_text}, *content[1:]]}
+
+    def _record(self, counts: Dict[str, int], tokens_in: int, tokens_out: int) -> None:
+        saved = max(0, tokens_in - tokens_out)
+        with self._lock:
+            totals = self._totals
+            totals["calls"] += 1
+            totals["memories_in"] += counts["memories_in"]
+            totals["memories_out"] += counts["memories_out"]
+            totals["duplicates"] += counts["duplicates"]
+            totals["tokens_in"] += tokens_in
+            totals["tokens_out"] += tokens_out
+        metrics.incr("memory_filter_duplicates_total", counts["duplicates"])
+        metrics.incr("memory_filter_dropped_total", counts["over_budget"])
+        metrics.incr("memory_filter_tokens_saved_total", saved)
+        metrics.observe("memory_filter_tokens_saved", saved, buckets=TOKEN_BUCKETS)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = dict(self._totals)
+        totals["tokens_saved"] = max(0, totals["tokens_in"] - totals["tokens_out"])
+        totals["token_budget"] = self.token_budget
+        return totals
+
+    def wrap_agent(self, agent: Any, tool_name: str = "mem0_memory") -> Any:
+        """Filter the results of ``tool_name`` on ``agent``."""
+        wrap_tool(agent, tool_name, lambda tool: FilteredMemoryTool(tool, self))
+        return agent
+
+
+class FilteredMemoryTool(ToolProxy):
+    """Proxy that passes a memory tool's list results through a MemoryFilter."""
+
+    def __init__(self, tool: AgentTool, memory_filter: MemoryFilter):
+        super().__init__(tool)
+        self._filter = memory_filter
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        tool_input = tool_use.get("input", {})
+        pending = None
+        async for event in self._tool.stream(tool_use, invocation_state, **kwargs):
+            if isinstance(event, ToolResultEvent):
+                yield ToolResultEvent(self._filter.apply(tool_input, event.tool_result))
+                return
+            # Held back one event: tools outside the SDK end their stream with the bare result
+            if pending is not None:
+                yield pending
+            pending = event
+
+        if isinstance(pending, dict):
+            yield self._filter.apply(tool_input, pending)
+        elif pending is not None:
+            yield pending
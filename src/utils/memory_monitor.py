@@ -0,0 +1,201 @@
+"""
+Memory watermark monitor.
+
+AgentCore microVMs have a fixed memory size, and a process that grows past it
+is OOM-killed together with every conversation it is serving. The monitor
+samples the process RSS on a background thread. When RSS passes the high
+watermark it runs the registered evictors in order, cheapest state to rebuild
+first, until RSS is back under the low watermark, and records how many bytes
+each stage reclaimed.
+"""
+import ctypes
+import ctypes.util
+import gc
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# An evictor receives the number of bytes still to shed and returns how much it
+# dropped in its own unit (bytes, entries or agents)
+Evictor = Tuple[str, Callable[[int], int]]
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def read_rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, but better than nothing off Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def read_memory_limit_bytes() -> Optional[int]:
+    """Memory limit of the container's cgroup, if one is set."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value)
+    return None
+
+
+def resolve_watermarks(high_mb: int, low_mb: int, processes: int = 1) -> Optional[Tuple[int, int]]:
+    """Return per-process (high, low) watermarks in bytes.
+
+    A zero high watermark means 85% of this process's share of the cgroup
+    memory limit, and a zero low watermark means 70% of it (or 80% of an
+    explicit high watermark). Returns None when no watermark is configured and
+    no limit can be found.
+    """
+    limit = read_memory_limit_bytes()
+    if limit:
+        limit //= max(1, processes)
+    if high_mb:
+        high = high_mb * 2**20
+    elif limit:
+        high = int(limit * 0.85)
+    else:
+        return None
+    if low_mb:
+        low = low_mb * 2**20
+    else:
+        low = int(limit * 0.70) if limit and not high_mb else int(high * 0.8)
+    return high, min(low, high)
+
+
+def _load_malloc_trim() -> Optional[Callable[[int], int]]:
+    # glibc keeps freed arenas mapped; malloc_trim hands them back so RSS drops
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return libc.malloc_trim
+    except (OSError, AttributeError):
+        return None
+
+
+class MemoryMonitor:
+    """Background RSS sampler that sheds state between two watermarks."""
+
+    def __init__(
+        self,
+        high_watermark_bytes: int,
+        low_watermark_bytes: int,
+        evictors: List[Evictor],
+        interval_seconds: float = 5.0,
+        rss_reader: Callable[[], int] = read_rss_bytes,
+        cooldown_seconds: float = 60.0,
+    ):
+        if low_watermark_bytes > high_watermark_bytes:
+            raise ValueError("Low watermark must not exceed the high watermark")
+        self.high_watermark_bytes = high_watermark_bytes
+        self.low_watermark_bytes = low_watermark_bytes
+        self.evictors = list(evictors)
+        self.interval_seconds = interval_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._read_rss = rss_reader
+        self._retry_at = 0.0
+        self._malloc_trim = _load_malloc_trim()
+        self._last_rss = 0
+        self._events: "deque[Dict[str, Any]]" = deque(maxlen=20)
+        self._reclaimed_total = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="memory-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def check(self) -> Optional[Dict[str, Any]]:
+        """Sample RSS once and shed state if it is over the high watermark."""
+        rss = self._sample()
+        if rss < self.high_watermark_bytes or time.monotonic() < self._retry_at:
+            return None
+        with self._lock:
+            event = self._shed(rss)
+        if event["rss_after_bytes"] >= self.high_watermark_bytes:
+            # Nothing left to shed brings us under; don't pay for gc on every sample
+            self._retry_at = time.monotonic() + self.cooldown_seconds
+        return event
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rss_bytes": self._last_rss,
+            "high_watermark_bytes": self.high_watermark_bytes,
+            "low_watermark_bytes": self.low_watermark_bytes,
+            "reclaimed_bytes_total": self._reclaimed_total,
+            "recent_evictions": list(self._events),
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Memory monitor check failed: {e}", exc_info=True)
+
+    def _sample(self) -> int:
+        rss = self._read_rss()
+        self._last_rss = rss
+        metrics.set_gauge("process_rss_bytes", rss)
+        return rss
+
+    def _shed(self, rss: int) -> Dict[str, Any]:
+        start_rss = rss
+        logger.warning(
+            f"RSS {rss / 2**20:.0f} MiB is above the high watermark "
+            f"({self.high_watermark_bytes / 2**20:.0f} MiB); shedding state"
+        )
+        stages = []
+        for name, evict in self.evictors:
+            if rss <= self.low_watermark_bytes:
+                break
+            dropped = evict(rss - self.low_watermark_bytes)
+            gc.collect()
+            if self._malloc_trim is not None:
+                self._malloc_trim(0)
+            after = self._sample()
+            reclaimed = max(0, rss - after)
+            stages.append({"stage": name, "dropped": dropped, "reclaimed_bytes": reclaimed})
+            metrics.incr("memory_evictions_total", stage=name)
+            metrics.incr("memory_reclaimed_bytes_total", reclaimed, stage=name)
+            rss = after
+
+        event = {
+            "time": time.time(),
+            "rss_before_bytes": start_rss,
+            "rss_after_bytes": rss,
+            "reclaimed_bytes": max(0, start_rss - rss),
+            "stages": stages,
+        }
+        self._reclaimed_total += event["reclaimed_bytes"]
+        self._events.append(event)
+        level = logging.INFO if rss <= self.low_watermark_bytes else logging.WARNING
+        logger.log(
+            level,
+            f"Reclaimed {event['reclaimed_bytes'] / 2**20:.1f} MiB; RSS now {rss / 2**20:.0f} MiB "
+            f"(low watermark {self.low_watermark_bytes / 2**20:.0f} MiB)",
+        )
+        return event
@@ -0,0 +1,222 @@
+"""
+Speculative memory prefetch.
+
+``invoke`` knows the user and the prompt before the agent runs, but the model
+only asks ``mem0_memory`` to retrieve memories after its first round trip,
+so the lookup normally runs in series with that model call. A
+``MemoryPrefetch`` starts the same retrieve (query: the user's prompt) on a
+background thread as the agent is built, in parallel with the first model
+call. The model's first ``retrieve`` for that user whose query shares enough
+words with the prompt is then answered from the prefetch, waiting only for
+whatever part of the lookup is still in flight. A retrieve about something
+else goes to the tool.
+
+The prefetch proxy wraps the raw memory tool, under the recorder, memory
+filter and deadline wrappers, so a served result passes through them like a
+live one. Outcomes (hit; unused when the model never retrieved; mismatch when
+it only retrieved with other queries; error when the lookup failed and the
+call went to the tool directly) and the lookup time saved on hits are reported
+in ``stats()`` and as metrics.
+
+Speculation costs a lookup on turns that never read memory. When fewer than
+``min_hit_rate`` of the last ``window`` prefetches were used, only every
+``probe_every``-th request prefetches, which keeps measuring the hit rate.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, Optional
+
+from strands.types._events import ToolResultEvent
+from strands.types.tools import AgentTool
+
+from .memory_filter import text_words
+from .metrics import metrics
+from .request_context import run_sync
+from .tool_proxy import ToolProxy, wrap_tool
+
+logger = logging.getLogger(__name__)
+
+
+async def _collect_result(tool: AgentTool, tool_use: Dict[str, Any], invocation_state: Dict[str, Any]) -> Dict[str, Any]:
+    result = None
+    async for event in tool.stream(tool_use, invocation_state):
+        result = event
+    # Tools outside the SDK end their stream with the bare result dict
+    return result.tool_result if isinstance(result, ToolResultEvent) else result
+
+
+class MemoryPrefetcher:
+    """Runs speculative memory lookups and keeps hit/miss statistics."""
+
+    OUTCOMES = ("hit", "unused", "mismatch", "error")
+
+    def __init__(
+        self,
+        tool_name: str = "mem0_memory",
+        max_workers: int = 4,
+        min_hit_rate: float = 0.2,
+        window: int = 50,
+        probe_every: int = 10,
+        min_query_overlap: float = 0.5,
+    ):
+        self.tool_name = tool_name
+        self.min_query_overlap = min_query_overlap
+        self.min_hit_rate = min_hit_rate
+        self.probe_every = probe_every
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._started = 0
+        self._gated = 0
+        self._skipped = 0
+        self._outcomes = {outcome: 0 for outcome in self.OUTCOMES}
+        self._saved_ms = 0.0
+        self._recent: deque = deque(maxlen=window)
+
+    def begin(self, user_id: str, query: str) -> Optional["MemoryPrefetch"]:
+        """Create the prefetch for one invocation (it starts when attached), or None to skip it."""
+        with self._lock:
+            recent = self._recent
+            if len(recent) == recent.maxlen and sum(recent) / len(recent) < self.min_hit_rate:
+                self._gated += 1
+                if self._gated % self.probe_every:
+                    self._skipped += 1
+                    metrics.incr("memory_prefetch_skipped_total")
+                    return None
+        return MemoryPrefetch(self, user_id, query)
+
+    def _submit(self, fn, *args) -> concurrent.futures.Future:
+        with self._lock:
+            self._started += 1
+        metrics.incr("memory_prefetch_started_total")
+        context = contextvars.copy_context()
+        return self._executor.submit(context.run, fn, *args)
+
+    def _record(self, outcome: str, saved_ms: float = 0.0) -> None:
+        with self._lock:
+            self._outcomes[outcome] += 1
+            self._saved_ms += saved_ms
+            self._recent.append(outcome == "hit")
+        metrics.incr("memory_prefetch_total", outcome=outcome)
+        if outcome == "hit":
+            metrics.observe("memory_prefetch_saved_ms", saved_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._outcomes["hit"]
+            return {
+                "started": self._started,
+                **self._outcomes,
+                "skipped": self._skipped,
+                "hit_rate": round(hits / self._started, 3) if self._started else None,
+                "recent_hit_rate": round(sum(self._recent) / len(self._recent), 3) if self._recent else None,
+                "saved_ms_total": round(self._saved_ms, 1),
+                "saved_ms_avg": round(self._saved_ms / hits, 1) if hits else None,
+            }
+
+
+class MemoryPrefetch:
+    """One invocation's speculative lookup of the user's memories."""
+
+    def __init__(self, prefetcher: MemoryPrefetcher, user_id: str, query: str):
+        self.prefetcher = prefetcher
+        self.user_id = user_id
+        self.query = query
+        self.future: Optional[concurrent.futures.Future] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._query_words = text_words(query)
+        self._mismatched = False
+        self._settled = False
+        self._lock = threading.Lock()
+
+    def attach(self, agent: Any) -> Any:
+        """Wrap the agent's raw memory tool with the prefetch proxy and start the lookup."""
+        proxy = wrap_tool(agent, self.prefetcher.tool_name, lambda tool: PrefetchingMemoryTool(tool, self))
+        if not isinstance(proxy, PrefetchingMemoryTool) or proxy._prefetch is not self:
+            return agent
+        tool_use = {
+            "toolUseId": f"prefetch-{uuid.uuid4().hex[:12]}",
+            "name": self.prefetcher.tool_name,
+            "input": {"action": "retrieve", "query": self.query, "user_id": self.user_id},
+        }
+        self.started_at = time.monotonic()
+        self.future = self.prefetcher._submit(self._fetch, proxy._tool, tool_use, {"agent": agent})
+        return agent
+
+    def _fetch(self, tool: AgentTool, tool_use: Dict[str, Any], invocation_state: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return run_sync(_collect_result(tool, tool_use, invocation_state))
+        finally:
+            self.finished_at = time.monotonic()
+
+    def _settle(self, outcome: str, saved_ms: float = 0.0) -> bool:
+        """Record the outcome once; returns False if already settled."""
+        with self._lock:
+            if self._settled:
+                return False
+            self._settled = True
+        self.prefetcher._record(outcome, saved_ms)
+        return True
+
+    def matches(self, query: Any) -> bool:
+        """Whether enough of a retrieve query's words appear in the prefetched query."""
+        words = text_words(query) if isinstance(query, str) else frozenset()
+        if not words:
+            return not self._query_words
+        return len(words & self._query_words) / len(words) >= self.prefetcher.min_query_overlap
+
+    async def take(self, tool_input: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the prefetched result for the first retrieve call it answers, else None."""
+        if self.future is None or self._settled:
+            return None
+        if tool_input.get("action") != "retrieve" or tool_input.get("user_id") != self.user_id:
+            return None
+        if not self.matches(tool_input.get("query")):
+            # Memories for the prompt would not answer this query; a later retrieve may still match
+            self._mismatched = True
+            return None
+        called_at = time.monotonic()
+        try:
+            result = await asyncio.wrap_future(self.future)
+        except Exception as e:
+            logger.warning(f"Memory prefetch failed, retrieving directly: {e}")
+            self._settle("error")
+            return None
+        if not isinstance(result, dict) or result.get("status") != "success":
+            self._settle("error")
+            return None
+        # Without the prefetch the call would have taken the whole lookup; it waited only for the rest
+        lookup_ms = (self.finished_at - self.started_at) * 1000
+        waited_ms = max(0.0, self.finished_at - called_at) * 1000
+        if not self._settle("hit", lookup_ms - waited_ms):
+            return None
+        return result
+
+    def close(self) -> None:
+        """Settle a prefetch the agent never used."""
+        if self.future is None:
+            return
+        self.future.cancel()
+        self._settle("mismatch" if self._mismatched else "unused")
+
+
+class PrefetchingMemoryTool(ToolProxy):
+    """Proxy that answers the first matching retrieve call from a MemoryPrefetch."""
+
+    def __init__(self, tool: AgentTool, prefetch: MemoryPrefetch):
+        super().__init__(tool)
+        self._prefetch = prefetch
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        result = await self._prefetch.take(tool_use.get("input", {}))
+        if result is None:
+            async for event in super().stream(tool_use, invocation_state, **kwargs):
+                yield event
+            return
+        yield ToolResultEvent({**result, "toolUseId": tool_use["toolUseId"]})
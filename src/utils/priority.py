@@ -0,0 +1,168 @@
+"""
+Weighted priority scheduling of agent runs.
+
+Interactive chat and batch jobs share ``/invocations``. Each request names a
+priority class in its payload, and agent runs are admitted through a
+``PriorityScheduler`` with a fixed number of slots. A class's share is both
+the fraction of slots it may hold at once and its weight when several classes
+wait for a freed slot. The defaults cap batch at half the slots, which keeps
+room for chat during a batch burst, and favour interactive work 2:1 when both
+are queued. A waiter older than ``aging_seconds`` is admitted ahead of the
+weighted order, so batch work is never starved.
+
+The HTTP entrypoint waits in ``admit`` on the event loop, so a queued request
+holds no handler thread. Waits are measured from ``arrived``, the time the
+request came in.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Mapping, Optional
+
+from .cancellation import CancelToken, cancellable
+from .metrics import metrics
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued", "granted", "wake")
+
+    def __init__(self, priority: str, arrived: Optional[float], wake: Callable[[], None]):
+        self.priority = priority
+        self.enqueued = arrived if arrived is not None else time.monotonic()
+        self.granted = False
+        self.wake = wake
+
+
+class PriorityScheduler:
+    """Admit agent runs by priority class, within ``max_concurrency`` slots (0 = unlimited)."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        shares: Mapping[str, float],
+        aging_seconds: float = 10.0,
+        default: str = "interactive",
+    ):
+        if not shares:
+            raise ValueError("At least one priority class is required")
+        if default not in shares:
+            raise ValueError(f"Default priority '{default}' is not one of {sorted(shares)}")
+        self.max_concurrency = max_concurrency
+        self.shares = {name: float(share) for name, share in shares.items()}
+        self.aging_seconds = aging_seconds
+        self.default = default
+        self.limits = {
+            name: max(1, round(max_concurrency * min(share, 1.0))) for name, share in self.shares.items()
+        }
+        self._running = {name: 0 for name in shares}
+        self._queues: Dict[str, Deque[_Waiter]] = {name: deque() for name in shares}
+        self._aged = {name: 0 for name in shares}
+        self._lock = threading.Lock()
+
+    def resolve(self, priority: Optional[Any]) -> str:
+        """Return the class for a payload's ``priority`` value, raising ValueError for unknown ones."""
+        if priority is None or priority == "":
+            return self.default
+        if not isinstance(priority, str) or priority not in self.shares:
+            raise ValueError(f"Unknown priority '{priority}'. Expected one of: {', '.join(self.shares)}")
+        return priority
+
+    @asynccontextmanager
+    async def admit(
+        self, priority: str, token: Optional[CancelToken] = None, arrived: Optional[float] = None
+    ) -> AsyncIterator[None]:
+        """Hold one slot for ``priority``, waiting on the event loop until admitted."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def grant() -> None:
+            if not granted.done():
+                granted.set_result(None)
+
+        waiter = _Waiter(priority, arrived, wake=lambda: loop.call_soon_threadsafe(grant))
+        with self._lock:
+            self._enqueue(waiter)
+        if not waiter.granted:
+            try:
+                await cancellable(granted, token)
+            except BaseException:
+                with self._lock:
+                    if waiter.granted:
+                        # Admitted just as the wait was cancelled; hand the slot on
+                        self._running[priority] -= 1
+                        self._dispatch()
+                    else:
+                        self._queues[priority].remove(waiter)
+                raise
+
+        self._observe_wait(waiter)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        """Queue a waiter, or admit it at once when unlimited; the caller holds ``self._lock``."""
+        if self.max_concurrency <= 0:
+            waiter.granted = True
+            self._running[waiter.priority] += 1
+        else:
+            self._queues[waiter.priority].append(waiter)
+            self._dispatch()
+
+    def _observe_wait(self, waiter: _Waiter) -> None:
+        waited_ms = (time.monotonic() - waiter.enqueued) * 1000
+        metrics.observe("priority_wait_ms", waited_ms, priority=waiter.priority)
+
+    def _release(self, priority: str) -> None:
+        with self._lock:
+            self._running[priority] -= 1
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters; the caller holds ``self._lock``."""
+        while sum(self._running.values()) < self.max_concurrency:
+            name = self._next_class()
+            if name is None:
+                break
+            waiter = self._queues[name].popleft()
+            waiter.granted = True
+            self._running[name] += 1
+            waiter.wake()
+
+    def _next_class(self) -> Optional[str]:
+        eligible = [
+            name for name, queue in self._queues.items()
+            if queue and self._running[name] < self.limits[name]
+        ]
+        if not eligible:
+            return None
+        # Fewest running slots relative to share goes next; ties go to the class listed first
+        weighted = min(eligible, key=lambda n: self._running[n] / self.shares[n])
+        now = time.monotonic()
+        aged = [name for name in eligible if now - self._queues[name][0].enqueued >= self.aging_seconds]
+        if not aged:
+            return weighted
+        oldest = min(aged, key=lambda n: self._queues[n][0].enqueued)
+        if oldest != weighted:
+            self._aged[oldest] += 1
+            metrics.incr("priority_aged_total", priority=oldest)
+        return oldest
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "classes": {
+                    name: {
+                        "share": self.shares[name],
+                        "limit": self.limits[name] if self.max_concurrency > 0 else None,
+                        "running": self._running[name],
+                        "waiting": len(self._queues[name]),
+                        "aged": self._aged[name],
+                    }
+                    for name in self.shares
+                },
+            }
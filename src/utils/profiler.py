@@ -0,0 +1,101 @@
+"""
+On-demand sampling profiler for live processes.
+
+Samples the stacks of every thread with ``sys._current_frames()`` at a fixed
+interval and folds them into collapsed stacks (``frame;frame;frame count``),
+the input format of flamegraph.pl and speedscope. A tracemalloc snapshot taken
+at the start and end of the window is diffed to show where memory was
+allocated while the profile ran.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Frames kept per allocation traceback when tracemalloc is started for a profile
+TRACEMALLOC_FRAMES = 10
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Dict[str, Any]:
+    """Sample all threads except the caller for ``seconds`` and count collapsed stacks."""
+    own_id = threading.get_ident()
+    stacks: Counter = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            frames: List[str] = []
+            while frame is not None:
+                frames.append(_frame_label(frame))
+                frame = frame.f_back
+            frames.append(names.get(thread_id, f"thread-{thread_id}"))
+            stacks[";".join(reversed(frames))] += 1
+        samples += 1
+        time.sleep(interval)
+    return {"samples": samples, "stacks": stacks}
+
+
+def allocation_diff(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top: int) -> List[Dict[str, Any]]:
+    """Largest allocation growth between two snapshots, grouped by source line."""
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_diff_bytes": stat.size_diff,
+            "size_bytes": stat.size,
+            "count_diff": stat.count_diff,
+        }
+        for stat in stats[:top]
+    ]
+
+
+class Profiler:
+    """Runs one profile at a time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, seconds: float, interval: float = 0.005, top: int = 25) -> Optional[Dict[str, Any]]:
+        """Profile for ``seconds``; returns None if another profile is already running."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        started_tracing = False
+        try:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                started_tracing = True
+            before = tracemalloc.take_snapshot()
+            started = time.monotonic()
+            sampled = sample_stacks(seconds, interval)
+            elapsed = time.monotonic() - started
+            after = tracemalloc.take_snapshot()
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            self._lock.release()
+
+        stacks = sampled["stacks"]
+        return {
+            "seconds": round(elapsed, 3),
+            "interval_seconds": interval,
+            "samples": sampled["samples"],
+            "collapsed": "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()),
+            "allocations": allocation_diff(before, after, top),
+        }
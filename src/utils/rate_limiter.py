@@ -0,0 +1,269 @@
+"""
+Client-side scheduling of OpenAI calls against the account's rate limits.
+
+OpenAI reports the current request and token budgets on every response in
+``x-ratelimit-*`` headers. The scheduler mirrors them in two token buckets,
+reserves an estimated cost (prompt size plus ``max_tokens``) before each model
+call and delays calls that would overdraw a bucket, so we wait briefly instead
+of failing with a 429.
+
+Reservations are taken immediately and may drive a bucket negative; each
+caller sleeps until the bucket has refilled past its own reservation, which
+queues concurrent callers in arrival order without holding a lock while
+waiting.
+
+The limits are per account, but each worker process schedules its own calls,
+so with ``processes`` workers every scheduler keeps to its equal share of the
+limits the server reports.
+"""
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import openai
+from strands.models.openai import OpenAIModel
+
+from .deadline import LatencyBudget
+from .helpers import estimate_tokens
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset durations such as "6m0s", "1.5s" or "20ms" into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts)
+
+
+class Bucket:
+    """Token bucket refilled continuously up to ``limit``.
+
+    ``share`` scales the limits (configured and reported) down to this
+    process's part of the account's budget.
+    """
+
+    def __init__(self, name: str, limit: float = 0, window_seconds: float = 60.0, share: float = 1.0):
+        self.name = name
+        self.share = share
+        self.limit = float(limit) * share
+        self.level = self.limit
+        self.rate = self.limit / window_seconds if limit else 0.0
+        self.updated: Optional[float] = None
+
+    @property
+    def known(self) -> bool:
+        return self.limit > 0
+
+    def refill(self, now: float) -> None:
+        if self.updated is not None and self.rate:
+            self.level = min(self.limit, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, cost: float, now: float) -> float:
+        """Take ``cost`` from the bucket and return seconds until it is covered."""
+        if not self.known:
+            return 0.0
+        self.refill(now)
+        self.level -= cost
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.rate if self.rate else 0.0
+
+    def observe(self, limit: float, remaining: float, reset_seconds: Optional[float], now: float) -> None:
+        """Replace local state with the limits reported by the server."""
+        limit, remaining = limit * self.share, remaining * self.share
+        self.limit = limit
+        self.level = remaining
+        if reset_seconds and limit > remaining:
+            # The reset header is the time until the bucket is full again
+            self.rate = (limit - remaining) / reset_seconds
+        elif not self.rate:
+            self.rate = limit / 60.0
+        self.updated = now
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit or None,
+            "remaining": round(self.level, 1) if self.known else None,
+            "refill_per_second": round(self.rate, 3),
+        }
+
+
+class RateLimitScheduler:
+    """Request and token buckets fed by ``x-ratelimit-*`` response headers.
+
+    ``processes`` is the number of workers sharing the account's limits.
+    """
+
+    def __init__(
+        self,
+        requests_limit: int = 0,
+        tokens_limit: int = 0,
+        max_wait_seconds: float = 30.0,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+        processes: int = 1,
+    ):
+        share = 1.0 / max(1, processes)
+        self.requests = Bucket("requests", requests_limit, share=share)
+        self.tokens = Bucket("tokens", tokens_limit, share=share)
+        self.max_wait_seconds = max_wait_seconds
+        self.enabled = enabled
+        self._clock = clock
+        self._blocked_until = 0.0
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, estimated_tokens: int) -> float:
+        """Reserve one request and ``estimated_tokens``; return seconds to wait first."""
+        with self._lock:
+            now = self._clock()
+            wait = max(
+                self.requests.reserve(1, now),
+                self.tokens.reserve(estimated_tokens, now),
+                self._blocked_until - now,
+                0.0,
+            )
+            self._publish()
+        return min(wait, self.max_wait_seconds)
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """Wait until a call costing ``estimated_tokens`` fits within the limits."""
+        if not self.enabled:
+            return 0.0
+        wait = self.reserve(estimated_tokens)
+        metrics.observe("ratelimit_wait_ms", wait * 1000)
+        if wait > 0:
+            metrics.incr("ratelimit_delayed_total")
+            logger.info(f"Delaying model call {wait:.2f}s to stay within OpenAI rate limits")
+            with self._lock:
+                self._waiting += 1
+                metrics.set_gauge("ratelimit_waiting", self._waiting)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+                    metrics.set_gauge("ratelimit_waiting", self._waiting)
+        return wait
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Update the buckets from a model response."""
+        with self._lock:
+            now = self._clock()
+            for bucket in (self.requests, self.tokens):
+                limit = headers.get(f"x-ratelimit-limit-{bucket.name}")
+                remaining = headers.get(f"x-ratelimit-remaining-{bucket.name}")
+                if limit is None or remaining is None:
+                    continue
+                try:
+                    bucket.observe(
+                        float(limit), float(remaining),
+                        parse_duration(headers.get(f"x-ratelimit-reset-{bucket.name}")), now,
+                    )
+                except ValueError:
+                    logger.debug(f"Ignoring malformed rate limit headers for {bucket.name}")
+            if status_code == 429:
+                metrics.incr("ratelimit_throttled_total")
+                retry_after = parse_duration(headers.get("retry-after-ms"))
+                retry_after = retry_after / 1000 if retry_after is not None else parse_duration(headers.get("retry-after"))
+                self._blocked_until = max(self._blocked_until, now + (retry_after or 1.0))
+            self._publish()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            return {
+                "enabled": self.enabled,
+                "requests": self.requests.snapshot(),
+                "tokens": self.tokens.snapshot(),
+                "waiting": self._waiting,
+                "blocked_for_seconds": round(max(0.0, self._blocked_until - now), 3),
+            }
+
+    def _publish(self) -> None:
+        for bucket in (self.requests, self.tokens):
+            if bucket.known:
+                metrics.set_gauge("ratelimit_limit", bucket.limit, bucket=bucket.name)
+                metrics.set_gauge("ratelimit_remaining", round(bucket.level, 1), bucket=bucket.name)
+
+
+def estimate_request_tokens(
+    messages: List[Dict[str, Any]],
+    system_prompt: Optional[str],
+    tool_specs: Optional[List[Dict[str, Any]]],
+    max_tokens: int,
+) -> int:
+    """Estimate the tokens OpenAI charges for a request: prompt size plus max_tokens."""
+    prompt = json.dumps(messages, default=str) + (system_prompt or "") + json.dumps(tool_specs or [], default=str)
+    return estimate_tokens(prompt) + max_tokens
+
+
+class RateLimitedOpenAIModel(OpenAIModel):
+    """OpenAIModel that schedules every call through a RateLimitScheduler.
+
+    With a ``budget``, each request's timeout and max_tokens are also fitted to
+    the current invocation's deadline.
+    """
+
+    def __init__(
+        self,
+        scheduler: RateLimitScheduler,
+        client_args: Optional[Dict[str, Any]] = None,
+        budget: Optional[LatencyBudget] = None,
+        **model_config: Any,
+    ):
+        self.scheduler = scheduler
+        self.budget = budget
+        super().__init__(client_args=client_args, **model_config)
+
+    @property
+    def client_args(self) -> Dict[str, Any]:
+        # OpenAIModel opens (and closes) a client per call, so each call gets its own
+        # HTTP client with a hook that reads the rate limit headers
+        return {
+            **self._client_args,
+            "http_client": openai.DefaultAsyncHttpxClient(event_hooks={"response": [self._on_response]}),
+        }
+
+    @client_args.setter
+    def client_args(self, value: Dict[str, Any]) -> None:
+        self._client_args = value
+
+    async def _on_response(self, response) -> None:
+        self.scheduler.observe(response.status_code, response.headers)
+
+    def _max_tokens(self) -> int:
+        max_tokens = int(self.get_config().get("params", {}).get("max_tokens") or 0)
+        return self.budget.max_tokens(max_tokens) if self.budget else max_tokens
+
+    def format_request(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        request = super().format_request(*args, **kwargs)
+        return self.budget.apply(request) if self.budget else request
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        await self.scheduler.acquire(estimate_request_tokens(messages, system_prompt, tool_specs, self._max_tokens()))
+        async for event in super().stream(messages, tool_specs, system_prompt, **kwargs):
+            yield event
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        await self.scheduler.acquire(estimate_request_tokens(prompt, system_prompt, None, self._max_tokens()))
+        async for event in super().structured_output(output_model, prompt, system_prompt, **kwargs):
+            yield event
@@ -0,0 +1,337 @@
+"""
+Record-and-replay of invocations.
+
+When enabled, each invocation is appended to a JSONL file as one record:
+
+- the payload and resolved session id
+- every model request (messages, tool names) with the stream events it returned
+- every tool call's input, result and duration
+- stage timings and the final response
+
+Model streams cut off before their end (cancellation, a deadline) are marked
+``"truncated": true``, and invocations that were cancelled or answered with a
+degraded response say so at the top level. ``is_truncated`` tells replay to
+leave those records out, since their recorded calls stop mid-conversation.
+
+``ReplayModel`` and ``ReplayTool`` serve model and tool calls back from those
+records, so ``benchmarks/replay.py`` can run real traffic shapes against the
+current code deterministically and without network access.
+"""
+import copy
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from strands.models.model import Model
+from strands.types._events import ToolResultEvent
+from strands.types.tools import AgentTool
+
+from .cancellation import Cancelled
+from .request_context import current_recording
+from .tool_cache import canonical_key
+from .tool_proxy import ToolProxy, wrap_tool
+
+
+def is_truncated(record: Dict[str, Any]) -> bool:
+    """Whether a record's invocation was cancelled, degraded or had a model stream cut off."""
+    return bool(
+        record.get("cancelled")
+        or record.get("degraded")
+        or any(call.get("truncated") for call in record.get("model_calls", []))
+    )
+
+
+def request_fingerprint(messages: List[Dict[str, Any]], system_prompt: Optional[str]) -> str:
+    """Identify a model request by its conversation and system prompt."""
+    encoded = json.dumps([messages, system_prompt], sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class Recording:
+    """One invocation's record, filled in while the request runs."""
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.data: Dict[str, Any] = {
+            "id": uuid.uuid4().hex,
+            "recorded_at": time.time(),
+            "session_id": None,
+            "payload": copy.deepcopy(payload),
+            "model_calls": [],
+            "tool_calls": [],
+            "timings_ms": {},
+            "response": None,
+        }
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.data["timings_ms"][name] = round((time.perf_counter() - start) * 1000, 3)
+
+    def update(self, **fields: Any) -> None:
+        self.data.update(fields)
+
+    def add(self, kind: str, entry: Dict[str, Any]) -> None:
+        # Parallel tool calls append from several threads
+        with self._lock:
+            self.data[kind].append(entry)
+
+    def finish(self, error: Optional[BaseException] = None) -> Dict[str, Any]:
+        self.data["timings_ms"]["total"] = round((time.perf_counter() - self._started) * 1000, 3)
+        if error is not None:
+            self.data["error"] = f"{type(error).__name__}: {error}"
+        if isinstance(error, Cancelled):
+            self.data["cancelled"] = error.reason
+        response = self.data["response"]
+        if isinstance(response, dict) and response.get("degraded"):
+            self.data["degraded"] = response.get("degraded_reasons", [])
+        return self.data
+
+
+class _NullRecording:
+    """Stand-in used when an invocation is not recorded."""
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        yield
+
+    def update(self, **fields: Any) -> None:
+        pass
+
+
+class InvocationRecorder:
+    """Appends invocation records to a JSONL file."""
+
+    def __init__(self, path: Optional[str] = None, sample_rate: float = 1.0):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    @contextmanager
+    def record(self, payload: Dict[str, Any]) -> Iterator[Any]:
+        """Record the invocation run inside this block."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield _NullRecording()
+            return
+
+        recording = Recording(payload)
+        token = current_recording.set(recording)
+        error = None
+        try:
+            yield recording
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            current_recording.reset(token)
+            self._write(recording.finish(error))
+
+    def wrap_model(self, model: Model) -> Model:
+        return RecordingModel(model) if self.enabled else model
+
+    def wrap_agent(self, agent: Any) -> Any:
+        """Record calls to every tool registered on ``agent``."""
+        if self.enabled:
+            for name in list(agent.tool_registry.registry):
+                wrap_tool(agent, name, RecordingTool)
+        return agent
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        line = json.dumps(data, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class RecordingModel(Model):
+    """Model proxy that adds each request and its stream events to the active recording."""
+
+    def __init__(self, model: Model):
+        self.model = model
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        async for event in self.model.structured_output(output_model, prompt, system_prompt, **kwargs):
+            yield event
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        recording = current_recording.get()
+        if recording is None:
+            async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                yield event
+            return
+
+        request = {
+            "fingerprint": request_fingerprint(messages, system_prompt),
+            "messages": copy.deepcopy(messages),
+            "tools": [spec["name"] for spec in tool_specs or []],
+            "system_prompt_sha256": hashlib.sha256((system_prompt or "").encode("utf-8")).hexdigest(),
+        }
+        events = []
+        complete = False
+        start = time.perf_counter()
+        try:
+            async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                events.append(event)
+                yield event
+            complete = True
+        finally:
+            call = {
+                "request": request,
+                "events": events,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            }
+            if not complete:
+                # Cancelled, past its deadline or failed: the events stop mid-stream
+                call["truncated"] = True
+            recording.add("model_calls", call)
+
+
+class RecordingTool(ToolProxy):
+    """Tool proxy that adds each call's input and result to the active recording."""
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        recording = current_recording.get()
+        start = time.perf_counter()
+        event = result = None
+        try:
+            async for event in self._tool.stream(tool_use, invocation_state, **kwargs):
+                if isinstance(event, ToolResultEvent):
+                    result = event.tool_result
+                yield event
+            # Tools outside the SDK end their stream with the bare result
+            if result is None and isinstance(event, dict):
+                result = event
+        finally:
+            if recording is not None:
+                recording.add("tool_calls", {
+                    "name": self.tool_name,
+                    "input": copy.deepcopy(tool_use.get("input")),
+                    "result": copy.deepcopy(result),
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                })
+
+
+class ReplayMismatch(RuntimeError):
+    """Raised when replayed code makes a call the recording cannot answer."""
+
+
+class ReplayModel(Model):
+    """Serves model calls from a recording.
+
+    Requests are matched by fingerprint first, so identical conversations get
+    identical answers; otherwise the next unused call is served in recorded
+    order and counted as drift.
+    """
+
+    def __init__(self):
+        self.config: Dict[str, Any] = {"model_id": "replay"}
+        self._lock = threading.Lock()
+        self.load({"model_calls": []})
+
+    def load(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending = deque(record["model_calls"])
+            self.served = 0
+            self.drifted = 0
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Any:
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise ReplayMismatch("Structured output is not recorded")
+        yield  # pragma: no cover
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        fingerprint = request_fingerprint(messages, system_prompt)
+        with self._lock:
+            call = next((c for c in self._pending if c["request"]["fingerprint"] == fingerprint), None)
+            if call is None:
+                if not self._pending:
+                    raise ReplayMismatch("Model called more times than recorded")
+                call = self._pending[0]
+                self.drifted += 1
+            self._pending.remove(call)
+            self.served += 1
+        for event in call["events"]:
+            yield copy.deepcopy(event)
+
+
+class ReplayTool(AgentTool):
+    """Serves a tool's results from a recording, matched by input."""
+
+    def __init__(self, tool_spec: Dict[str, Any]):
+        super().__init__()
+        self._spec = tool_spec
+        self._lock = threading.Lock()
+        self.load({"tool_calls": []})
+
+    @property
+    def tool_name(self) -> str:
+        return self._spec["name"]
+
+    @property
+    def tool_spec(self):
+        return self._spec
+
+    @property
+    def tool_type(self) -> str:
+        return "python"
+
+    def load(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._by_input: Dict[str, deque] = defaultdict(deque)
+            self._in_order: deque = deque()
+            for call in record["tool_calls"]:
+                if call["name"] == self.tool_name and call["result"] is not None:
+                    self._by_input[canonical_key(self.tool_name, call["input"])].append(call)
+                    self._in_order.append(call)
+            self.served = 0
+            self.drifted = 0
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        key = canonical_key(self.tool_name, tool_use.get("input"))
+        with self._lock:
+            calls = self._by_input.get(key)
+            if calls:
+                call = calls.popleft()
+            elif self._in_order:
+                call = self._in_order[0]
+                self._by_input[canonical_key(self.tool_name, call["input"])].remove(call)
+                self.drifted += 1
+            else:
+                call = None
+            if call is not None:
+                self._in_order.remove(call)
+                self.served += 1
+
+        if call is None:
+            result = {"status": "error", "content": [{"text": f"No recorded result for {self.tool_name}"}]}
+        else:
+            result = copy.deepcopy(call["result"])
+        yield ToolResultEvent({**result, "toolUseId": tool_use["toolUseId"]})
@@ -0,0 +1,32 @@
+"""
+Per-invocation context that follows a request into model and tool calls.
+
+``Agent.__call__`` runs the event loop on a fresh executor thread without
+copying context variables, so anything set in ``invoke`` would be invisible to
+the model and tools. ``run_sync`` runs a coroutine in the calling thread's
+context instead; tasks and ``asyncio.to_thread`` calls made by the event loop
+inherit it from there.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+from typing import Any, Awaitable, Optional
+
+# The active invocation's recording, if this invocation is being recorded
+current_recording: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar("current_recording", default=None)
+
+# The user's prompt for the active invocation
+current_prompt: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_prompt", default=None)
+
+
+def run_sync(awaitable: Awaitable[Any]) -> Any:
+    """Run a coroutine to completion from synchronous code, keeping context variables."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(awaitable)
+
+    # Called from inside a running loop: finish on a helper thread in a copy of our context
+    context = contextvars.copy_context()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(context.run, asyncio.run, awaitable).result()
@@ -0,0 +1,336 @@
+"""
+Compact in-process session store for agent conversation history.
+
+Each session's Strands messages are encoded into a single contiguous
+``bytearray`` using a small tagged binary format. The keys of the message
+schema and a handful of low-cardinality values (roles, tool names, statuses)
+are interned in a table shared by every session, so thousands of live
+sessions do not each carry their own copies of the same strings. Tool inputs
+and JSON results are free-form and stored inline, which keeps the table
+bounded by the schema and the registered tools. Messages are expanded back into plain dicts
+only when the agent needs them for a model call.
+"""
+import struct
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Value tags for the binary encoding
+_DICT = 0x01
+_LIST = 0x02
+_ISTR = 0x03
+_STR = 0x04
+_INT = 0x05
+_FLOAT = 0x06
+_TRUE = 0x07
+_FALSE = 0x08
+_NONE = 0x09
+_BYTES = 0x0A
+
+_DOUBLE = struct.Struct("<d")
+
+# Keys of messages, content blocks and their toolUse, toolResult, media and
+# reasoning members. Only these keys are interned, and only outside free-form
+# values; any other key is stored inline.
+SCHEMA_KEYS = frozenset({
+    "role", "content",
+    "text", "toolUse", "toolResult", "image", "document", "video", "reasoningContent", "cachePoint", "json",
+    "toolUseId", "name", "input", "status",
+    "format", "source", "bytes",
+    "reasoningText", "signature", "redactedContent", "type",
+})
+# Free-form values under these schema keys are stored inline, keys included
+FREE_FORM_KEYS = frozenset({"input", "json"})
+# String values interned, by the schema key of the enclosing dict (None for the message itself).
+# Everything else (text, tool use ids, document names) is stored inline.
+INTERNED_VALUES = {
+    None: "role",
+    "toolUse": "name",
+    "toolResult": "status",
+    "image": "format",
+    "document": "format",
+    "video": "format",
+    "cachePoint": "type",
+}
+
+# Scope of values inside a free-form subtree
+_FREE = object()
+
+
+class _SessionRecord:
+    """Encoded history for a single session."""
+
+    __slots__ = ("buffer", "offsets", "last_access", "lock")
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offsets = array("I")
+        self.last_access = time.monotonic()
+        self.lock = threading.Lock()
+
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.itemsize * len(self.offsets)
+
+
+class CompactSessionStore:
+    """Thread-safe store of per-session message histories in compact form."""
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl_seconds: float = 3600.0):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._sessions: "OrderedDict[str, _SessionRecord]" = OrderedDict()
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    # -- public API ---------------------------------------------------------
+
+    def lock(self, session_id: str) -> threading.Lock:
+        """Return the lock serializing turns for ``session_id``."""
+        return self._record(session_id).lock
+
+    def load(self, session_id: str) -> List[Dict[str, Any]]:
+        """Expand the stored history for ``session_id`` into message dicts."""
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None:
+                return []
+            self._touch(session_id, record)
+            buffer = bytes(record.buffer)
+            count = len(record.offsets)
+        view = memoryview(buffer)
+        messages = []
+        pos = 0
+        for _ in range(count):
+            message, pos = self._decode(view, pos)
+            messages.append(message)
+        return messages
+
+    def save(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Replace the stored history for ``session_id``.
+
+        The whole history is re-encoded: the conversation manager may trim or
+        truncate earlier messages in place during a turn, and the sliding
+        window keeps the history short.
+        """
+        buffer = bytearray()
+        offsets = array("I")
+        for message in messages:
+            offsets.append(len(buffer))
+            self._encode(message, buffer, None, None)
+        record = self._record(session_id)
+        with self._lock:
+            record.buffer = buffer
+            record.offsets = offsets
+            self._touch(session_id, record)
+        self._maybe_evict()
+
+    def delete(self, session_id: str) -> int:
+        """Drop a session and return the number of bytes released."""
+        with self._lock:
+            record = self._sessions.pop(session_id, None)
+        return record.nbytes() if record is not None else 0
+
+    def evict_idle(self, max_idle_seconds: Optional[float] = None, target_bytes: Optional[int] = None) -> int:
+        """Evict sessions idle for longer than ``max_idle_seconds``, oldest first.
+
+        When ``target_bytes`` is given, eviction stops once that many bytes have
+        been released. Sessions with a turn in progress are never evicted.
+        Returns the number of bytes released.
+        """
+        max_idle = self.idle_ttl_seconds if max_idle_seconds is None else max_idle_seconds
+        cutoff = time.monotonic() - max_idle
+        released = 0
+        with self._lock:
+            for session_id in list(self._sessions):
+                record = self._sessions[session_id]
+                if record.last_access > cutoff:
+                    # Sessions are kept in access order, so the rest are newer
+                    break
+                if record.lock.locked():
+                    continue
+                del self._sessions[session_id]
+                released += record.nbytes()
+                if target_bytes is not None and released >= target_bytes:
+                    break
+        return released
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by encoded histories and the intern table."""
+        with self._lock:
+            history = sum(record.nbytes() for record in self._sessions.values())
+            interned = sum(len(s) for s in self._strings)
+        return history + interned
+
+    def stats(self) -> Dict[str, Any]:
+        """Return store size statistics."""
+        with self._lock:
+            sessions = len(self._sessions)
+            interned = len(self._strings)
+        return {
+            "sessions": sessions,
+            "interned_strings": interned,
+            "bytes": self.nbytes(),
+        }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    # -- internals ----------------------------------------------------------
+
+    def _record(self, session_id: str) -> _SessionRecord:
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None:
+                record = _SessionRecord()
+                self._sessions[session_id] = record
+            return record
+
+    def _touch(self, session_id: str, record: _SessionRecord) -> None:
+        record.last_access = time.monotonic()
+        self._sessions.move_to_end(session_id)
+
+    def _maybe_evict(self) -> None:
+        with self._lock:
+            while len(self._sessions) > self.max_sessions:
+                session_id, record = next(iter(self._sessions.items()))
+                if record.lock.locked():
+                    break
+                del self._sessions[session_id]
+        now = time.monotonic()
+        if now - self._last_sweep >= min(60.0, self.idle_ttl_seconds):
+            self._last_sweep = now
+            self.evict_idle()
+
+    def _intern(self, value: str) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            with self._lock:
+                string_id = self._string_ids.get(value)
+                if string_id is None:
+                    string_id = len(self._strings)
+                    self._strings.append(value)
+                    self._string_ids[value] = string_id
+        return string_id
+
+    def _encode(self, value: Any, out: bytearray, scope: Any, key: Optional[str]) -> None:
+        """Encode ``value`` found under ``key`` in a dict whose own schema key is ``scope``."""
+        if isinstance(value, str):
+            if scope is not _FREE and INTERNED_VALUES.get(scope) == key:
+                out.append(_ISTR)
+                _write_varint(out, self._intern(value))
+            else:
+                _write_str(out, _STR, value)
+        elif isinstance(value, dict):
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for item_key, item in value.items():
+                item_key = str(item_key)
+                if scope is not _FREE and item_key in SCHEMA_KEYS:
+                    # Interned keys are stored as id + 1; 0 marks an inline key
+                    _write_varint(out, self._intern(item_key) + 1)
+                    child_scope = _FREE if item_key in FREE_FORM_KEYS else item_key
+                else:
+                    _write_str(out, 0, item_key)
+                    child_scope = _FREE
+                self._encode(item, out, child_scope, item_key)
+        elif isinstance(value, (list, tuple)):
+            out.append(_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self._encode(item, out, scope, key)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif value is None:
+            out.append(_NONE)
+        elif isinstance(value, int):
+            out.append(_INT)
+            _write_varint(out, value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out.extend(_DOUBLE.pack(value))
+        elif isinstance(value, (bytes, bytearray)):
+            out.append(_BYTES)
+            _write_varint(out, len(value))
+            out.extend(value)
+        else:
+            # Match safe_json_serialize: fall back to the string form
+            self._encode(str(value), out, _FREE, key)
+
+    def _decode(self, view: memoryview, pos: int):
+        tag = view[pos]
+        pos += 1
+        if tag == _STR:
+            length, pos = _read_varint(view, pos)
+            return str(view[pos:pos + length], "utf-8"), pos + length
+        if tag == _ISTR:
+            string_id, pos = _read_varint(view, pos)
+            return self._strings[string_id], pos
+        if tag == _DICT:
+            count, pos = _read_varint(view, pos)
+            result = {}
+            for _ in range(count):
+                key_id, pos = _read_varint(view, pos)
+                if key_id:
+                    key = self._strings[key_id - 1]
+                else:
+                    length, pos = _read_varint(view, pos)
+                    key, pos = str(view[pos:pos + length], "utf-8"), pos + length
+                result[key], pos = self._decode(view, pos)
+            return result, pos
+        if tag == _LIST:
+            count, pos = _read_varint(view, pos)
+            items = []
+            for _ in range(count):
+                item, pos = self._decode(view, pos)
+                items.append(item)
+            return items, pos
+        if tag == _TRUE:
+            return True, pos
+        if tag == _FALSE:
+            return False, pos
+        if tag == _NONE:
+            return None, pos
+        if tag == _INT:
+            raw, pos = _read_varint(view, pos)
+            return (raw >> 1) if not raw & 1 else -((raw + 1) >> 1), pos
+        if tag == _FLOAT:
+            return _DOUBLE.unpack_from(view, pos)[0], pos + _DOUBLE.size
+        if tag == _BYTES:
+            length, pos = _read_varint(view, pos)
+            return bytes(view[pos:pos + length]), pos + length
+        raise ValueError(f"Corrupt session buffer: unknown tag {tag:#x} at offset {pos - 1}")
+
+
+def _write_str(out: bytearray, tag: int, value: str) -> None:
+    data = value.encode("utf-8")
+    out.append(tag)
+    _write_varint(out, len(data))
+    out.extend(data)
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(view: memoryview, pos: int):
+    result = 0
+    shift = 0
+    while True:
+        byte = view[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
@@ -0,0 +1,113 @@
+"""
+Single-flight coalescing of identical requests.
+
+Client retries and double submits often deliver the same prompt for the same
+session several times within a few hundred milliseconds. The first request
+becomes the leader and runs the agent; duplicates that arrive within the join
+window of the leader's start wait for the leader's result instead of issuing
+their own model calls.
+
+The leader runs under a ``CancelGroup`` joined by every waiting caller's
+token. A joiner whose own client goes away stops waiting right away. The
+shared run is cancelled only once every caller has given up, so a retry that
+joins a leader whose client disconnected keeps the work alive.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .cancellation import CancelGroup, CancelToken, use_token
+from .metrics import metrics
+
+
+def request_key(payload: Dict[str, Any], session_id: str) -> str:
+    """Build a dedup key from the normalized payload and the session it targets."""
+    normalized = dict(payload)
+    prompt = normalized.get("prompt")
+    if isinstance(prompt, str):
+        normalized["prompt"] = " ".join(prompt.split())
+    encoded = json.dumps({"session": session_id, "payload": normalized}, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """State of one leader execution shared with its joiners."""
+
+    __slots__ = ("started_at", "done", "result", "error", "joiners", "group")
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.joiners = 0
+        self.group = CancelGroup()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key."""
+
+    def __init__(self, join_window_seconds: float = 0.5):
+        self.join_window_seconds = join_window_seconds
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any], token: Optional[CancelToken] = None) -> Tuple[Any, bool]:
+        """Run ``fn`` or join an identical call; returns (result, joined).
+
+        The leader's ``fn`` sees the call's ``CancelGroup`` as the current token;
+        a joiner raises Cancelled as soon as its own ``token`` is cancelled.
+        """
+        if self.join_window_seconds <= 0:
+            return fn(), False
+        # A caller without a token never gives up, which keeps the shared run alive for it
+        token = token or CancelToken()
+
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            call = self._calls.get(key)
+            # A run every caller has already abandoned is being cancelled, so it is not joined
+            if call is not None and now - call.started_at <= self.join_window_seconds and not call.group.cancelled:
+                call.joiners += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+            call.group.join(token)
+
+        if not leader:
+            metrics.incr("single_flight_joined_total")
+            while not call.done.wait(0.05):
+                token.check()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        metrics.incr("single_flight_leaders_total")
+        try:
+            with use_token(call.group):
+                call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            call.done.set()
+            if call.joiners:
+                metrics.incr("single_flight_deduplicated_total", call.joiners)
+
+    def in_flight(self) -> int:
+        """Number of leader calls still running."""
+        with self._lock:
+            return sum(1 for call in self._calls.values() if not call.done.is_set())
+
+    def _purge(self, now: float) -> None:
+        expired = [
+            key for key, call in self._calls.items()
+            if call.done.is_set() and now - call.started_at > self.join_window_seconds
+        ]
+        for key in expired:
+            del self._calls[key]
@@ -0,0 +1,187 @@
+"""
+Pool of nested agents for the ``use_llm`` tool.
+
+The stock ``use_llm`` tool builds a brand-new Agent (tool registry, model,
+conversation manager) on every call. This module keeps idle nested agents
+keyed by system prompt and tool set, hands them out with a clean message
+history, and points them at the calling agent's model so every call shares
+one configured ``OpenAIModel`` instead of creating its own.
+
+Pooled agents are keyed by tool names only, so on every lease their tool
+registry is rebound to the leasing parent's tool objects: a parent's tools
+are per-request proxies (memory prefetch, recording, latency budget) that
+must not leak into a later request's sub-agent.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from strands import Agent
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from strands.agent.state import AgentState
+from strands.telemetry.metrics import EventLoopMetrics, metrics_to_string
+from strands.tools.tools import PythonAgentTool
+from strands_tools.use_llm import TOOL_SPEC as USE_LLM_TOOL_SPEC
+
+from .cancellation import cancellable
+from .metrics import metrics
+from .request_context import run_sync
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[Optional[str], Tuple[str, ...]]
+
+
+class SubAgentPool:
+    """Bounded pool of reusable nested agents."""
+
+    def __init__(self, max_size: int = 8):
+        self.max_size = max_size
+        self._idle: "OrderedDict[PoolKey, List[Agent]]" = OrderedDict()
+        self._idle_count = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._construction_ms_total = 0.0
+        self._saved_ms_total = 0.0
+
+    @contextmanager
+    def lease(self, system_prompt: Optional[str], tools: List[Any], parent: Any = None) -> Iterator[Agent]:
+        """Check out a nested agent with empty history for the duration of a call."""
+        key = (system_prompt, tuple(sorted(tool.tool_name for tool in tools)))
+        agent = self._checkout(key)
+        if agent is None:
+            start = time.perf_counter()
+            agent = Agent(
+                model=getattr(parent, "model", None),
+                messages=[],
+                tools=tools,
+                system_prompt=system_prompt,
+                callback_handler=None,
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._misses += 1
+                self._construction_ms_total += elapsed_ms
+            metrics.incr("subagent_pool_misses_total")
+            metrics.observe("subagent_construction_ms", elapsed_ms)
+        else:
+            with self._lock:
+                self._hits += 1
+                saved_ms = self._construction_ms_total / self._misses if self._misses else 0.0
+                self._saved_ms_total += saved_ms
+            metrics.incr("subagent_pool_hits_total")
+            metrics.incr("subagent_construction_saved_ms_total", saved_ms)
+
+        self._reset(agent, parent, tools)
+        try:
+            yield agent
+        finally:
+            self._checkin(key, agent)
+
+    def drain(self, max_agents: Optional[int] = None) -> int:
+        """Drop idle agents, least recently used first, and return how many were dropped."""
+        dropped = 0
+        with self._lock:
+            while self._idle and (max_agents is None or dropped < max_agents):
+                key, agents = next(iter(self._idle.items()))
+                agents.pop(0)
+                if not agents:
+                    del self._idle[key]
+                self._idle_count -= 1
+                dropped += 1
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size, hit/miss counts and estimated construction time saved."""
+        with self._lock:
+            return {
+                "idle": self._idle_count,
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "avg_construction_ms": round(self._construction_ms_total / self._misses, 3) if self._misses else None,
+                "construction_ms_saved": round(self._saved_ms_total, 3),
+            }
+
+    def _checkout(self, key: PoolKey) -> Optional[Agent]:
+        with self._lock:
+            agents = self._idle.get(key)
+            if not agents:
+                return None
+            agent = agents.pop()
+            if not agents:
+                del self._idle[key]
+            self._idle_count -= 1
+            return agent
+
+    def _checkin(self, key: PoolKey, agent: Agent) -> None:
+        # Don't keep the finished conversation or the request's tools alive while the agent is idle
+        agent.messages = []
+        agent.tool_registry.registry = {}
+        agent.tool_registry.dynamic_tools = {}
+        with self._lock:
+            self._idle.setdefault(key, []).append(agent)
+            self._idle.move_to_end(key)
+            self._idle_count += 1
+            while self._idle_count > self.max_size:
+                oldest_key, agents = next(iter(self._idle.items()))
+                agents.pop(0)
+                if not agents:
+                    del self._idle[oldest_key]
+                self._idle_count -= 1
+
+    @staticmethod
+    def _reset(agent: Agent, parent: Any, tools: List[Any]) -> None:
+        """Give a pooled agent a fresh conversation bound to the parent's model and tools."""
+        agent.messages = []
+        agent.tool_registry.registry = {tool.tool_name: tool for tool in tools}
+        agent.tool_registry.dynamic_tools = {tool.tool_name: tool for tool in tools if tool.is_dynamic}
+        agent.state = AgentState()
+        agent.event_loop_metrics = EventLoopMetrics()
+        agent.conversation_manager = SlidingWindowConversationManager()
+        if parent is not None:
+            agent.model = parent.model
+            agent.callback_handler = parent.callback_handler
+            agent.tool_executor = parent.tool_executor
+
+
+def make_use_llm_tool(pool: SubAgentPool) -> PythonAgentTool:
+    """Build a drop-in ``use_llm`` tool that runs prompts on pooled nested agents."""
+
+    def use_llm(tool: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        tool_use_id = tool["toolUseId"]
+        tool_input = tool["input"]
+        prompt = tool_input["prompt"]
+        specified_tools = tool_input.get("tools")
+
+        tools = []
+        parent = kwargs.get("agent")
+        if parent is not None:
+            registry = parent.tool_registry.registry
+            if specified_tools is not None:
+                tools = [registry[name] for name in specified_tools if name in registry]
+                missing = [name for name in specified_tools if name not in registry]
+                if missing:
+                    logger.warning(f"Tools not found in parent agent's tool registry: {missing}")
+            else:
+                tools = list(registry.values())
+
+        with pool.lease(tool_input.get("system_prompt"), tools, parent) as agent:
+            # The invocation's cancel token reaches this tool thread, so a cancelled parent stops the sub-agent too
+            result = run_sync(cancellable(agent.invoke_async(prompt)))
+            metrics_text = metrics_to_string(result.metrics) if result.metrics else ""
+
+        return {
+            "toolUseId": tool_use_id,
+            "status": "success",
+            "content": [
+                {"text": f"Response: {result}"},
+                {"text": f"Metrics: {metrics_text}"},
+            ],
+        }
+
+    return PythonAgentTool(USE_LLM_TOOL_SPEC["name"], USE_LLM_TOOL_SPEC, use_llm)
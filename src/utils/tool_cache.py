@@ -0,0 +1,299 @@
+"""
+Result memoization for deterministic tools.
+
+Tools registered on an Agent are wrapped in a caching proxy according to a
+per-tool policy:
+
+- ``pure``: results depend only on the input and never expire (``calculator``)
+- ``ttl``: results are reused for a fixed number of seconds
+- ``never``: always executed (``mem0_memory`` writes, ``use_llm``)
+
+Keys are built from the tool name and a canonical form of the tool input, so
+the same expression sent by different users hits the same entry. Entries are
+evicted least-recently-used, and hit/miss counts are kept per tool.
+
+``SqliteToolResultCache`` keeps the entries in a SQLite file instead, so every
+worker process of a multi-worker deployment shares one cache.
+"""
+import copy
+import functools
+import hashlib
+import io
+import json
+import logging
+import sqlite3
+import threading
+import time
+import tokenize
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from strands.types._events import ToolResultEvent
+from strands.types.tools import AgentTool
+
+from .metrics import metrics
+from .tool_proxy import ToolProxy, wrap_tool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How results of a single tool may be reused."""
+
+    mode: str = "never"
+    ttl_seconds: Optional[float] = None
+    normalize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+
+    @property
+    def cacheable(self) -> bool:
+        return self.mode in ("pure", "ttl")
+
+    @classmethod
+    def parse(cls, spec: str, normalize: Optional[Callable] = None) -> "CachePolicy":
+        """Parse ``pure``, ``never`` or ``ttl:<seconds>``."""
+        spec = spec.strip().lower()
+        if spec == "pure":
+            return cls("pure", normalize=normalize)
+        if spec.startswith("ttl:"):
+            return cls("ttl", float(spec[4:]), normalize)
+        if spec == "never":
+            return cls("never")
+        raise ValueError(f"Unknown tool cache policy: {spec!r}")
+
+
+# Layout-only tokens; a logical line break is kept because it separates statements
+_LAYOUT_TOKENS = (tokenize.NL, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER)
+
+
+def normalize_expression(tool_input: Dict[str, Any]) -> Dict[str, Any]:
+    """Key a calculator expression by its tokens, so "2+2" and "2 + 2" share an entry.
+
+    Whitespace only matters where it separates tokens ("2 3" is not "23", "* *"
+    is not "**"), which is where the tokenizer sympy parses with keeps it.
+    Expressions that do not tokenize are keyed as written.
+    """
+    expression = tool_input.get("expression")
+    if not isinstance(expression, str):
+        return tool_input
+    tokens = _expression_tokens(expression)
+    if tokens is None:
+        return tool_input
+    return {**tool_input, "expression": list(tokens)}
+
+
+@functools.lru_cache(maxsize=4096)
+def _expression_tokens(expression: str) -> Optional[Tuple[str, ...]]:
+    # The tokenizer allocates a parser per call; repeated expressions reuse the result
+    try:
+        return tuple(
+            "\n" if token.type == tokenize.NEWLINE else token.string
+            for token in tokenize.generate_tokens(io.StringIO(expression).readline)
+            if token.type not in _LAYOUT_TOKENS
+        )
+    except (tokenize.TokenError, SyntaxError):
+        return None
+
+
+# Input normalizers for known tools, applied before keys are built
+NORMALIZERS = {"calculator": normalize_expression}
+
+
+def parse_policies(value: str) -> Dict[str, CachePolicy]:
+    """Parse a "tool=policy,tool=policy" string such as "calculator=pure,mem0_memory=never"."""
+    policies = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, spec = item.split("=", 1)
+            name = name.strip()
+            policies[name] = CachePolicy.parse(spec, NORMALIZERS.get(name))
+    return policies
+
+
+def canonical_key(tool_name: str, tool_input: Any) -> str:
+    """Build a stable cache key from a tool name and its input."""
+    if isinstance(tool_input, dict):
+        tool_input = {k: v for k, v in tool_input.items() if v is not None}
+    encoded = json.dumps(tool_input, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{tool_name}:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()}"
+
+
+class ToolResultCache:
+    """LRU cache of tool results shared by every agent in the process."""
+
+    def __init__(self, policies: Optional[Dict[str, CachePolicy]] = None, max_entries: int = 1024):
+        self.policies = dict(policies or {})
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def policy_for(self, tool_name: str) -> CachePolicy:
+        return self.policies.get(tool_name, CachePolicy())
+
+    def key_for(self, tool_name: str, tool_input: Any) -> str:
+        policy = self.policy_for(tool_name)
+        if policy.normalize is not None and isinstance(tool_input, dict):
+            tool_input = policy.normalize(tool_input)
+        return canonical_key(tool_name, tool_input)
+
+    def get(self, tool_name: str, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result (without toolUseId), or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._count(tool_name, "misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count(tool_name, "hits")
+        return copy.deepcopy(entry[0])
+
+    def put(self, tool_name: str, key: str, result: Dict[str, Any]) -> None:
+        """Store a successful result under ``key``."""
+        policy = self.policy_for(tool_name)
+        expires_at = time.monotonic() + policy.ttl_seconds if policy.mode == "ttl" else None
+        stored = {k: copy.deepcopy(v) for k, v in result.items() if k != "toolUseId"}
+        with self._lock:
+            self._entries[key] = (stored, expires_at, tool_name)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                _, (_, _, evicted_tool) = self._entries.popitem(last=False)
+                self._count(evicted_tool, "evictions")
+
+    def clear(self) -> int:
+        """Drop every entry and return how many were removed."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+        return count
+
+    def release_memory(self, target_bytes: Optional[int] = None) -> int:
+        """Drop in-memory entries under memory pressure and return how many were removed."""
+        return self.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count and per-tool hit/miss/eviction counts."""
+        with self._lock:
+            return {"entries": len(self._entries), "tools": copy.deepcopy(self._stats)}
+
+    def wrap(self, tool: AgentTool) -> AgentTool:
+        """Wrap a tool in a caching proxy if its policy allows caching."""
+        if not self.policy_for(tool.tool_name).cacheable:
+            return tool
+        return CachedTool(tool, self)
+
+    def wrap_agent(self, agent: Any) -> Any:
+        """Wrap the cacheable tools registered on ``agent`` in place."""
+        for name in list(agent.tool_registry.registry):
+            wrap_tool(agent, name, self.wrap)
+        return agent
+
+    def _count(self, tool_name: str, field: str) -> None:
+        counts = self._stats.setdefault(tool_name, {"hits": 0, "misses": 0, "evictions": 0})
+        counts[field] += 1
+        metrics.incr(f"tool_cache_{field}_total", tool=tool_name)
+
+
+class SqliteToolResultCache(ToolResultCache):
+    """ToolResultCache whose entries live in a SQLite file shared across processes."""
+
+    def __init__(self, path: str, policies: Optional[Dict[str, CachePolicy]] = None, max_entries: int = 1024):
+        super().__init__(policies, max_entries)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_results ("
+            "key TEXT PRIMARY KEY, tool TEXT NOT NULL, result TEXT NOT NULL, "
+            "expires_at REAL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tool_results_lru ON tool_results (last_used)")
+
+    def get(self, tool_name: str, key: str) -> Optional[Dict[str, Any]]:
+        # Wall-clock time, since monotonic clocks are not comparable across processes
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, expires_at FROM tool_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM tool_results WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._count(tool_name, "misses")
+                return None
+            self._conn.execute("UPDATE tool_results SET last_used = ? WHERE key = ?", (now, key))
+            self._count(tool_name, "hits")
+        return json.loads(row[0])
+
+    def put(self, tool_name: str, key: str, result: Dict[str, Any]) -> None:
+        policy = self.policy_for(tool_name)
+        now = time.time()
+        expires_at = now + policy.ttl_seconds if policy.mode == "ttl" else None
+        stored = json.dumps({k: v for k, v in result.items() if k != "toolUseId"}, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_results (key, tool, result, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, tool_name, stored, expires_at, now),
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM tool_results").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                evicted = self._conn.execute(
+                    "DELETE FROM tool_results WHERE key IN "
+                    "(SELECT key FROM tool_results ORDER BY last_used LIMIT ?) RETURNING tool",
+                    (overflow,),
+                ).fetchall()
+                for (evicted_tool,) in evicted:
+                    self._count(evicted_tool, "evictions")
+
+    def clear(self) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM tool_results").rowcount
+
+    def release_memory(self, target_bytes: Optional[int] = None) -> int:
+        # Entries live in the shared file, not this process's heap; keep them for the other workers
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM tool_results").fetchone()[0]
+            return {"entries": entries, "tools": copy.deepcopy(self._stats)}
+
+
+class CachedTool(ToolProxy):
+    """Proxy that serves a tool's results from a ToolResultCache."""
+
+    def __init__(self, tool: AgentTool, cache: ToolResultCache):
+        super().__init__(tool)
+        self._cache = cache
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        key = self._cache.key_for(self.tool_name, tool_use.get("input", {}))
+        cached = self._cache.get(self.tool_name, key)
+        if cached is not None:
+            logger.debug(f"Tool cache hit for {self.tool_name}")
+            yield ToolResultEvent({**cached, "toolUseId": tool_use["toolUseId"]})
+            return
+
+        event = None
+        async for event in self._tool.stream(tool_use, invocation_state, **kwargs):
+            if isinstance(event, ToolResultEvent):
+                self._store(key, event.tool_result)
+                yield event
+                return
+            yield event
+
+        # Tools outside the SDK end their stream with the bare result
+        if isinstance(event, dict):
+            self._store(key, event)
+
+    def _store(self, key: str, result: Dict[str, Any]) -> None:
+        if result.get("status") == "success":
+            self._cache.put(self.tool_name, key, result)
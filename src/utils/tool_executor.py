@@ -0,0 +1,185 @@
+"""
+Tool executor for running independent tool calls in parallel.
+
+When the model requests several tools in one turn they are started together
+on the event loop, bounded by a concurrency limit. Each call has its
+own timeout; a call that overruns is cancelled and reported back to the model
+as an error result so one stuck tool cannot hang the request. Results are
+handed back in the order the model issued the calls.
+
+Sync tools such as ``calculator`` and ``mem0_memory`` run on a thread pool
+shared by every request. ``asyncio.run`` joins
+a loop's own default executor on exit, so using the shared pool is what lets a
+request return while an abandoned tool thread is still winding down. It is
+installed once per event loop, on that loop's first batch of tool calls.
+"""
+import asyncio
+import logging
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from strands.tools.executors import ConcurrentToolExecutor
+from strands.tools.executors._executor import ToolExecutor
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _SharedThreadPool(ThreadPoolExecutor):
+    """Thread pool installed as the default executor of many short-lived event loops."""
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        # Called by asyncio.run() when each request's loop closes; the pool outlives them
+        pass
+
+
+class ParallelToolExecutor(ConcurrentToolExecutor):
+    """Concurrent tool executor with a concurrency limit, per-tool timeouts and timing."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        default_timeout: Optional[float] = 30.0,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        thread_pool_size: int = 16,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.default_timeout = default_timeout
+        self.tool_timeouts = dict(tool_timeouts or {})
+        self.thread_pool = _SharedThreadPool(max_workers=thread_pool_size, thread_name_prefix="tool")
+        self._installed_loops: "weakref.WeakSet[asyncio.AbstractEventLoop]" = weakref.WeakSet()
+
+    def timeout_for(self, tool_name: str) -> Optional[float]:
+        """Return the timeout in seconds for a tool, or None for no limit."""
+        timeout = self.tool_timeouts.get(tool_name, self.default_timeout)
+        return timeout if timeout and timeout > 0 else None
+
+    async def _execute(
+        self,
+        agent: Any,
+        tool_uses: List[Dict[str, Any]],
+        tool_results: List[Dict[str, Any]],
+        cycle_trace: Any,
+        cycle_span: Any,
+        invocation_state: Dict[str, Any],
+    ) -> AsyncGenerator[Any, None]:
+        """Execute tools concurrently and yield their events as they arrive."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._installed_loops:
+            loop.set_default_executor(self.thread_pool)
+            self._installed_loops.add(loop)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        tasks = [
+            asyncio.create_task(
+                self._run_tool(
+                    agent, tool_use, tool_results, cycle_trace, cycle_span, invocation_state,
+                    semaphore, queue, done,
+                )
+            )
+            for tool_use in tool_uses
+        ]
+
+        try:
+            pending = len(tasks)
+            while pending:
+                event = await queue.get()
+                if event is done:
+                    pending -= 1
+                    continue
+                yield event
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        _restore_call_order(tool_uses, tool_results)
+
+    async def _run_tool(
+        self,
+        agent: Any,
+        tool_use: Dict[str, Any],
+        tool_results: List[Dict[str, Any]],
+        cycle_trace: Any,
+        cycle_span: Any,
+        invocation_state: Dict[str, Any],
+        semaphore: asyncio.Semaphore,
+        queue: asyncio.Queue,
+        done: object,
+    ) -> None:
+        """Run one tool under the concurrency limit and its timeout."""
+        tool_name = tool_use["name"]
+        tool_use_id = str(tool_use.get("toolUseId"))
+        timeout = self.timeout_for(tool_name)
+        try:
+            async with semaphore:
+                start = time.perf_counter()
+                status = "error"
+                try:
+                    await asyncio.wait_for(
+                        self._stream_tool(
+                            agent, tool_use, tool_results, cycle_trace, cycle_span, invocation_state, queue
+                        ),
+                        timeout,
+                    )
+                    status = _result_status(tool_results, tool_use_id)
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                    logger.warning(f"Tool {tool_name} ({tool_use_id}) timed out after {timeout:g}s; cancelled")
+                    _append_error(tool_results, tool_use_id, f"Tool '{tool_name}' timed out after {timeout:g}s")
+                except asyncio.CancelledError:
+                    status = "cancelled"
+                    raise
+                finally:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    metrics.observe("tool_duration_ms", elapsed_ms, tool=tool_name)
+                    metrics.incr("tool_calls_total", tool=tool_name, status=status)
+                    logger.info(f"Tool {tool_name} ({tool_use_id}) finished with status {status} in {elapsed_ms:.1f}ms")
+        finally:
+            queue.put_nowait(done)
+
+    async def _stream_tool(
+        self,
+        agent: Any,
+        tool_use: Dict[str, Any],
+        tool_results: List[Dict[str, Any]],
+        cycle_trace: Any,
+        cycle_span: Any,
+        invocation_state: Dict[str, Any],
+        queue: asyncio.Queue,
+    ) -> None:
+        """Forward a tool's stream events to the executor queue."""
+        events = ToolExecutor._stream_with_trace(
+            agent, tool_use, tool_results, cycle_trace, cycle_span, invocation_state
+        )
+        async for event in events:
+            queue.put_nowait(event)
+
+
+def _result_status(tool_results: List[Dict[str, Any]], tool_use_id: str) -> str:
+    for result in tool_results:
+        if result.get("toolUseId") == tool_use_id:
+            return result.get("status", "success")
+    return "error"
+
+
+def _append_error(tool_results: List[Dict[str, Any]], tool_use_id: str, message: str) -> None:
+    """Record an error result unless the tool managed to report one first."""
+    if any(result.get("toolUseId") == tool_use_id for result in tool_results):
+        return
+    tool_results.append({"toolUseId": tool_use_id, "status": "error", "content": [{"text": message}]})
+
+
+def _restore_call_order(tool_uses: List[Dict[str, Any]], tool_results: List[Dict[str, Any]]) -> None:
+    """Reorder results for ``tool_uses`` in place to match the order the model issued them."""
+    order = {str(tool_use.get("toolUseId")): index for index, tool_use in enumerate(tool_uses)}
+    slots = [index for index, result in enumerate(tool_results) if result.get("toolUseId") in order]
+    ordered = sorted((tool_results[index] for index in slots), key=lambda result: order[result["toolUseId"]])
+    for slot, result in zip(slots, ordered):
+        tool_results[slot] = result
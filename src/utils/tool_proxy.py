@@ -0,0 +1,66 @@
+"""
+Base class for the proxies layered over an agent's tools.
+
+Features that change how a tool call runs (result caching, recording, memory
+filtering, deadline skips, prefetching) each wrap the registered tool in a
+``ToolProxy`` subclass that overrides ``stream``. Name, spec and type are
+delegated to the wrapped tool, so the model sees the same tool however many
+layers are stacked on it.
+
+``wrap_tool`` swaps a proxy into an agent's registry. A tool carries at most
+one proxy of each class, so wrapping twice is a no-op, and layers are stacked
+in the order they are applied: the first call is innermost.
+"""
+from typing import Any, Callable, Optional
+
+from strands.types.tools import AgentTool
+
+
+class ToolProxy(AgentTool):
+    """Tool that forwards every call to ``tool`` unless a subclass overrides ``stream``."""
+
+    def __init__(self, tool: AgentTool):
+        super().__init__()
+        self._tool = tool
+
+    @property
+    def tool_name(self) -> str:
+        return self._tool.tool_name
+
+    @property
+    def tool_spec(self):
+        return self._tool.tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return self._tool.tool_type
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        async for event in self._tool.stream(tool_use, invocation_state, **kwargs):
+            yield event
+
+
+def has_layer(tool: AgentTool, proxy_class: type) -> bool:
+    """Whether ``tool`` or any tool beneath it is a ``proxy_class``."""
+    while isinstance(tool, ToolProxy):
+        if isinstance(tool, proxy_class):
+            return True
+        tool = tool._tool
+    return False
+
+
+def wrap_tool(agent: Any, name: str, factory: Callable[[AgentTool], AgentTool]) -> Optional[AgentTool]:
+    """Replace tool ``name`` on ``agent`` with ``factory(tool)``.
+
+    The factory may return the tool unchanged to leave it unwrapped. Returns
+    the registered tool, or None if the agent has no tool of that name.
+    """
+    registry = agent.tool_registry.registry
+    tool = registry.get(name)
+    if tool is None:
+        return None
+    proxy = factory(tool)
+    if proxy is tool or has_layer(tool, type(proxy)):
+        return tool
+    registry[name] = proxy
+    return proxy
@@ -0,0 +1,258 @@
+"""
+Multi-process serving with session affinity.
+
+A single ``app.run`` process keeps JSON handling, sympy and Strands event
+processing under one GIL. In worker mode the entry script is started once per
+worker on an internal port, and a small router on the public port forwards
+each invocation to a worker chosen by a stable hash of its session id, so a
+session's history and locks stay inside one process.
+
+A client that disconnects while its invocation is forwarded has the upstream
+request closed too, so the worker's own ``DisconnectMiddleware`` cancels the
+run.
+"""
+import asyncio
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from .cancellation import Cancelled, DisconnectMiddleware, cancellable
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SESSION_HEADER = "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id"
+
+# Hop-by-hop and length headers are recomputed by each side of the proxy
+_SKIPPED_HEADERS = {"host", "content-length", "connection", "keep-alive", "transfer-encoding"}
+
+
+def worker_index(session_id: str, workers: int) -> int:
+    """Map a session id to a worker; stable across processes and restarts."""
+    return zlib.crc32(session_id.encode("utf-8")) % workers
+
+
+def session_id_for(headers: Mapping[str, str], payload: Any) -> str:
+    """Resolve the session id the same way ``invoke`` does."""
+    session_id = headers.get(SESSION_HEADER)
+    if session_id:
+        return session_id
+    if isinstance(payload, dict):
+        return str(payload.get("session_id") or payload.get("user_id", "neo"))
+    return "neo"
+
+
+class WorkerSupervisor:
+    """Start one copy of the entry script per worker and restart any that exit."""
+
+    def __init__(self, script: str, workers: int, base_port: int, env: Optional[Dict[str, str]] = None):
+        self.script = script
+        self.ports = [base_port + i for i in range(workers)]
+        self.env = dict(env or os.environ)
+        self.processes: List[Optional[subprocess.Popen]] = [None] * workers
+        self.restarts = 0
+
+    def start(self) -> None:
+        for index in range(len(self.ports)):
+            self._spawn(index)
+
+    def check(self) -> None:
+        """Restart workers that have exited."""
+        for index, process in enumerate(self.processes):
+            if process is not None and process.poll() is not None:
+                if process.returncode in (0, -signal.SIGTERM, -signal.SIGINT):
+                    # Stopped on purpose (e.g. Ctrl+C reaching the whole process group)
+                    continue
+                logger.warning(f"Worker {index} exited with code {process.returncode}, restarting")
+                self.restarts += 1
+                metrics.incr("worker_restarts_total", worker=index)
+                self._spawn(index)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        for process in self.processes:
+            if process is not None and process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            if process is None:
+                continue
+            try:
+                process.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def _spawn(self, index: int) -> None:
+        env = {
+            **self.env,
+            "WORKERS": "1",
+            "WORKER_ID": str(index),
+            "WORKER_COUNT": str(len(self.ports)),
+            "HOST": "127.0.0.1",
+            "PORT": str(self.ports[index]),
+        }
+        self.processes[index] = subprocess.Popen([sys.executable, self.script], env=env)
+        logger.info(f"Started worker {index} on port {self.ports[index]} (pid {self.processes[index].pid})")
+
+
+def build_router(
+    ports: List[int],
+    supervisor: Optional[WorkerSupervisor] = None,
+    on_shutdown: Optional[Callable[[], None]] = None,
+) -> Starlette:
+    """Build the ASGI app that forwards requests to workers."""
+    client = httpx.AsyncClient(
+        timeout=httpx.Timeout(None, connect=5.0),
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=64 * len(ports)),
+    )
+
+    async def forward(request: Request, index: int, body: bytes) -> StreamingResponse:
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _SKIPPED_HEADERS}
+        upstream_request = client.build_request(
+            request.method,
+            f"http://127.0.0.1:{ports[index]}{request.url.path}",
+            params=request.query_params,
+            headers=headers,
+            content=body,
+        )
+        # Cancelled when the client disconnects; cancelling the send closes the upstream connection
+        upstream = await cancellable(client.send(upstream_request, stream=True))
+        response_headers = {k: v for k, v in upstream.headers.items() if k.lower() not in _SKIPPED_HEADERS}
+        return StreamingResponse(
+            upstream.aiter_raw(),
+            status_code=upstream.status_code,
+            headers=response_headers,
+            background=BackgroundTask(upstream.aclose),
+        )
+
+    async def invocations(request: Request):
+        body = await request.body()
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        index = worker_index(session_id_for(request.headers, payload), len(ports))
+        metrics.incr("router_requests_total", worker=index)
+        try:
+            return await forward(request, index, body)
+        except Cancelled as e:
+            metrics.incr("router_cancelled_total", worker=index)
+            logger.info(f"Client disconnected; cancelled the request to worker {index}")
+            return JSONResponse({"error": f"Request cancelled: {e.reason}"}, status_code=499)
+        except httpx.TransportError as e:
+            metrics.incr("router_errors_total", worker=index)
+            logger.error(f"Worker {index} unavailable: {e}")
+            return JSONResponse({"error": f"Worker {index} unavailable"}, status_code=503)
+
+    async def fetch_all(path: str) -> List[Optional[Dict[str, Any]]]:
+        async def fetch(port: int) -> Optional[Dict[str, Any]]:
+            try:
+                response = await client.get(f"http://127.0.0.1:{port}{path}", timeout=5.0)
+                return response.json()
+            except (httpx.HTTPError, ValueError):
+                return None
+        return await asyncio.gather(*(fetch(port) for port in ports))
+
+    async def ping(request: Request):
+        statuses = await fetch_all("/ping")
+        if any(status is None for status in statuses):
+            return JSONResponse({"status": "Unhealthy"}, status_code=503)
+        busy = any(status.get("status") == "HealthyBusy" for status in statuses)
+        return JSONResponse({
+            "status": "HealthyBusy" if busy else "Healthy",
+            "time_of_last_update": max(status.get("time_of_last_update", 0) for status in statuses),
+        })
+
+    async def worker_metrics(request: Request):
+        snapshots = await fetch_all("/metrics")
+        return JSONResponse({
+            "router": {**metrics.snapshot(), "restarts": supervisor.restarts if supervisor else 0},
+            "workers": [{"worker": index, **(snapshot or {"error": "unavailable"})}
+                        for index, snapshot in enumerate(snapshots)],
+        })
+
+    async def debug_profile(request: Request):
+        # Profiles one worker at a time, chosen with ?worker=N (default 0)
+        try:
+            index = int(request.query_params.get("worker", "0"))
+            ports[index]
+        except (ValueError, IndexError):
+            return JSONResponse({"error": f"worker must be between 0 and {len(ports) - 1}"}, status_code=400)
+        try:
+            return await forward(request, index, b"")
+        except httpx.TransportError:
+            return JSONResponse({"error": f"Worker {index} unavailable"}, status_code=503)
+
+    async def supervise():
+        while supervisor is not None:
+            await asyncio.sleep(1.0)
+            supervisor.check()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        task = asyncio.create_task(supervise())
+        try:
+            yield
+        finally:
+            task.cancel()
+            await client.aclose()
+            if on_shutdown is not None:
+                on_shutdown()
+
+    return Starlette(
+        routes=[
+            Route("/invocations", invocations, methods=["POST"]),
+            Route("/ping", ping, methods=["GET"]),
+            Route("/metrics", worker_metrics, methods=["GET"]),
+            Route("/debug/profile", debug_profile, methods=["GET"]),
+        ],
+        # Gives each forwarded invocation a token that is cancelled when its client disconnects
+        middleware=[Middleware(DisconnectMiddleware)],
+        lifespan=lifespan,
+    )
+
+
+def serve_workers(script: str, workers: int, host: str, port: int, base_port: int) -> None:
+    """Run ``workers`` copies of ``script`` behind a session-affine router on host:port."""
+    env = dict(os.environ)
+    cache_path = None
+    if not env.get("SHARED_CACHE_PATH"):
+        # Workers share tool results through one SQLite file for the lifetime of the router
+        cache_path = os.path.join(tempfile.gettempdir(), f"agent_tool_cache_{os.getpid()}.sqlite3")
+        env["SHARED_CACHE_PATH"] = cache_path
+
+    supervisor = WorkerSupervisor(script, workers, base_port, env)
+
+    def cleanup():
+        supervisor.stop()
+        if cache_path:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(cache_path + suffix)
+                except FileNotFoundError:
+                    pass
+
+    # uvicorn re-raises SIGTERM/SIGINT once it has shut down, so cleanup runs in the
+    # router's lifespan rather than after uvicorn.run returns
+    supervisor.start()
+    try:
+        uvicorn.run(build_router(supervisor.ports, supervisor, cleanup), host=host, port=port, log_level="info")
+    except BaseException:
+        cleanup()
+        raise
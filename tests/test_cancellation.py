@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Unit tests for cancelling in-flight invocations.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.cancellation import CancelToken, Cancelled, DisconnectMiddleware, cancellable, current_cancel, locked
+
+
+def test_cancel_from_another_thread_cancels_the_task():
+    token = CancelToken()
+    cleaned_up = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        finally:
+            cleaned_up.append(True)
+
+    threading.Timer(0.05, token.cancel, args=("client disconnected",)).start()
+    started = time.monotonic()
+    with pytest.raises(Cancelled) as excinfo:
+        asyncio.run(cancellable(slow(), token))
+
+    assert excinfo.value.reason == "client disconnected"
+    assert cleaned_up == [True]
+    assert time.monotonic() - started < 1
+
+
+def test_deadline_cancels_and_later_deadlines_are_ignored():
+    token = CancelToken(deadline=time.monotonic() + 0.05)
+    token.set_deadline(time.monotonic() + 10)
+
+    with pytest.raises(Cancelled, match="deadline exceeded"):
+        asyncio.run(cancellable(asyncio.sleep(10), token))
+
+    # Work that finishes in time is unaffected
+    assert asyncio.run(cancellable(asyncio.sleep(0, result="ok"), CancelToken(time.monotonic() + 1))) == "ok"
+
+
+def test_locked_stops_waiting_and_releases_on_cancel():
+    lock = threading.Lock()
+    lock.acquire()
+    token = CancelToken()
+    threading.Timer(0.05, token.cancel, args=("client disconnected",)).start()
+
+    with pytest.raises(Cancelled):
+        with locked(lock, token):
+            pass
+    lock.release()
+
+    token = CancelToken()
+    with pytest.raises(Cancelled):
+        with locked(lock, token):
+            token.cancel("deadline exceeded")
+            token.check()
+    assert not lock.locked()
+
+
+def test_disconnect_middleware_cancels_the_request_token():
+    """After the body is read, a disconnect cancels the token the handler sees."""
+    seen = {}
+
+    async def app(scope, receive, send):
+        await receive()
+        token = seen["token"] = current_cancel.get()
+        seen["cancelled_at_start"] = token.cancelled
+        await asyncio.wait_for(asyncio.to_thread(token.wait, 1), 2)
+        seen["reason"] = token.reason
+        seen["next_message"] = await receive()
+
+    async def main():
+        disconnect = asyncio.Event()
+        messages = [{"type": "http.request", "body": b"{}", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            pass
+
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, disconnect.set)
+        await DisconnectMiddleware(app)({"type": "http", "path": "/invocations"}, receive, send)
+
+    asyncio.run(main())
+
+    assert seen["cancelled_at_start"] is False
+    assert seen["reason"] == "client disconnected"
+    assert seen["next_message"] == {"type": "http.disconnect"}
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Unit tests for end-to-end latency budgets.
+"""
+import json
+import os
+import sys
+import time
+
+import pytest
+from strands.types._events import ToolResultEvent
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.cancellation import CancelToken, use_token
+from utils.deadline import BudgetedTool, LatencyBudget, PartialAnswer, current_answer, parse_deadline_ms
+from utils.request_context import run_sync
+
+
+class EchoMemory:
+    tool_name = "mem0_memory"
+    tool_spec = {"name": "mem0_memory"}
+    tool_type = "python"
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        yield ToolResultEvent({"toolUseId": tool_use["toolUseId"], "status": "success", "content": [{"text": "[]"}]})
+
+
+def call(tool, **tool_input):
+    async def collect():
+        return [event async for event in tool.stream({"toolUseId": "t1", "input": tool_input}, {})]
+    return run_sync(collect())[-1].tool_result["content"][0]["text"]
+
+
+def test_requests_are_fitted_to_the_remaining_time():
+    budget = LatencyBudget(tokens_per_second=100, min_tokens=64)
+    assert budget.apply({"max_tokens": 1000}) == {"max_tokens": 1000}
+
+    with use_token(CancelToken(deadline=time.monotonic() + 2)):
+        request = budget.apply({"max_tokens": 1000})
+        assert 1.9 < request["timeout"] <= 2
+        assert 190 <= request["max_tokens"] <= 200
+    with use_token(CancelToken(deadline=time.monotonic() + 0.1)):
+        assert budget.apply({"max_tokens": 1000})["max_tokens"] == 64
+    with use_token(CancelToken(deadline=time.monotonic() + 60)):
+        assert budget.apply({"max_tokens": 1000})["max_tokens"] == 1000
+
+
+def test_memory_lookups_are_skipped_when_time_is_short():
+    tool = BudgetedTool(EchoMemory(), LatencyBudget(memory_min_seconds=3))
+    answer = PartialAnswer()
+    current_answer.set(answer)
+
+    with use_token(CancelToken(deadline=time.monotonic() + 10)):
+        assert call(tool, action="retrieve", query="name") == "[]"
+    with use_token(CancelToken(deadline=time.monotonic() + 1)):
+        assert json.loads(call(tool, action="retrieve", query="name"))["skipped"] is True
+        assert call(tool, action="store", content="x") == "[]"
+
+    assert answer.response({"role": "assistant", "content": []})["degraded_reasons"] == ["memory lookup skipped"]
+
+
+def test_partial_answer_keeps_the_agents_latest_text():
+    agent, sub_agent = object(), object()
+    answer = PartialAnswer(agent)
+
+    answer(data="Let me check. ", agent=agent, event_loop_cycle_id="c1")
+    answer(data="Sub-agent text", agent=sub_agent, event_loop_cycle_id="s1")
+    answer(data="The answer", agent=agent, event_loop_cycle_id="c2")
+    answer(data=" is 42", agent=agent, event_loop_cycle_id="c2")
+    answer(message={"role": "assistant", "content": []})
+    answer.mark("deadline exceeded")
+
+    assert answer.response() == {
+        "result": {"role": "assistant", "content": [{"text": "The answer is 42"}]},
+        "degraded": True,
+        "degraded_reasons": ["deadline exceeded"],
+    }
+    assert "Please try again" in PartialAnswer().response()["result"]["content"][0]["text"]
+
+
+def test_parse_deadline_ms():
+    assert parse_deadline_ms(None) is None
+    assert parse_deadline_ms(1500) == 1.5
+    for bad in (0, -5, "1000", True):
+        with pytest.raises(ValueError):
+            parse_deadline_ms(bad)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Unit tests for cached image builds in deployment/deploy_ecr.py.
+
+The end-to-end test builds against a local ``registry:2`` container standing
+in for ECR; it needs Docker and runs only with RUN_DOCKER_TESTS=1.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(os.path.join(REPO_ROOT, 'deployment'))
+import deploy_ecr
+from deploy_ecr import StepTimer, build_and_push_image, dependency_hash, resolve_cache_specs
+from deploy_utils import get_project_config
+
+REPO = "localhost:5000/agent"
+
+
+def write_inputs(root, base="fastapi\n", app="openai\n"):
+    (root / "deployment").mkdir(exist_ok=True)
+    (root / "deployment" / "Dockerfile").write_text("FROM python:3.12-slim\n")
+    (root / "deployment" / "requirements-base.txt").write_text(base)
+    (root / "deployment" / "requirements.txt").write_text(f"-r requirements-base.txt\n{app}")
+
+
+def test_dependency_hash_ignores_code_and_tracks_requirements(tmp_path, monkeypatch):
+    """Code changes keep the dependency hash; requirement changes move it."""
+    monkeypatch.chdir(tmp_path)
+    config = get_project_config()
+    write_inputs(tmp_path)
+    first = dependency_hash(config)
+
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "agent.py").write_text("print('changed')\n")
+    assert dependency_hash(config) == first
+
+    write_inputs(tmp_path, app="openai==2.0\n")
+    assert dependency_hash(config) != first
+
+
+def test_resolve_cache_specs(tmp_path):
+    """Cache shorthands expand to buildx specs; raw specs pass through."""
+    assert resolve_cache_specs(["registry"], "from", REPO, "abc") == [
+        f"type=registry,ref={REPO}:buildcache-abc",
+        f"type=registry,ref={REPO}:buildcache",
+    ]
+    exports = resolve_cache_specs(["registry"], "to", REPO, "abc")
+    assert all("mode=max,image-manifest=true,oci-mediatypes=true" in spec for spec in exports)
+
+    cache_dir = str(tmp_path / "cache")
+    assert resolve_cache_specs([f"local:{cache_dir}"], "to", REPO, "abc") == [f"type=local,dest={cache_dir},mode=max"]
+    # An empty local cache is not imported until a build has written it
+    assert resolve_cache_specs([f"local:{cache_dir}"], "from", REPO, "abc") == []
+    os.makedirs(cache_dir)
+    open(os.path.join(cache_dir, "index.json"), "w").close()
+    assert resolve_cache_specs([f"local:{cache_dir}"], "from", REPO, "abc") == [f"type=local,src={cache_dir}"]
+
+    assert resolve_cache_specs(["none"], "from", REPO, "abc") == []
+    assert resolve_cache_specs(["type=gha"], "to", REPO, "abc") == ["type=gha"]
+    with pytest.raises(ValueError):
+        resolve_cache_specs(["s3"], "to", REPO, "abc")
+
+
+def test_build_exports_cache_then_pushes(monkeypatch):
+    """The build pass exports the cache and the push pass only pushes."""
+    commands = []
+    monkeypatch.setattr(deploy_ecr, "run_command", lambda cmd, **kwargs: commands.append(cmd))
+    monkeypatch.chdir(REPO_ROOT)
+    config = get_project_config()
+    timer = StepTimer()
+
+    cache_from = resolve_cache_specs(["registry"], "from", REPO, "abc")
+    cache_to = resolve_cache_specs(["registry"], "to", REPO, "abc")
+    assert build_and_push_image(config, f"{REPO}:v1", cache_from, cache_to, timer)
+
+    inspect, build, push = commands
+    assert inspect[:3] == ["docker", "buildx", "inspect"]
+    assert build.count("--cache-from") == 2 and build.count("--cache-to") == 2
+    assert "type=cacheonly" in build and "--push" not in build
+    assert "--push" in push and "--cache-to" not in push
+    assert list(timer.steps) == ["builder", "build", "push"]
+
+
+@pytest.mark.skipif(
+    os.getenv("RUN_DOCKER_TESTS") != "1" or shutil.which("docker") is None,
+    reason="needs Docker; set RUN_DOCKER_TESTS=1",
+)
+def test_cached_rebuild_against_local_registry(tmp_path):
+    """Two deploys to a local registry succeed and leave the hashed cache tag."""
+    port = os.getenv("TEST_REGISTRY_PORT", "5055")
+    registry = f"localhost:{port}"
+    container = subprocess.run(
+        ["docker", "run", "-d", "--rm", "-p", f"{port}:5000", "registry:2"],
+        capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    try:
+        time.sleep(2)
+
+        def deploy(tag):
+            timings = tmp_path / f"{tag}.json"
+            subprocess.run(
+                [sys.executable, "deployment/deploy_ecr.py", "--registry", registry, "--repository", "agent",
+                 "--tag", tag, "--timings-file", str(timings)],
+                cwd=REPO_ROOT, check=True,
+            )
+            return json.loads(timings.read_text())
+
+        cold = deploy("cold")
+        warm = deploy("warm")
+        assert cold["success"] and warm["success"]
+
+        with urllib.request.urlopen(f"http://{registry}/v2/agent/tags/list") as response:
+            tags = json.load(response)["tags"]
+        assert f"buildcache-{cold['dependency_hash']}" in tags
+    finally:
+        subprocess.run(["docker", "stop", container], capture_output=True)
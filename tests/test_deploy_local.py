@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Unit tests for the startup benchmark in deployment/deploy_local.py.
+
+Docker is replaced by an in-process "container" that answers /ping and
+forwards /invocations to the model stub the benchmark starts.
+"""
+import json
+import os
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'deployment'))
+import deploy_local
+from deploy_local import _parse_docker_size, run_startup_benchmark
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeAgent(BaseHTTPRequestHandler):
+    """Answers /ping, and /invocations with one completion from OPENAI_BASE_URL."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._reply(200, {"status": "Healthy"})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        completion = requests.post(f"{self.server.env['OPENAI_BASE_URL']}/chat/completions", json={
+            "model": "stub", "messages": [{"role": "user", "content": "Hello"}],
+        }, timeout=5).json()
+        self._reply(200, {"result": completion["choices"][0]["message"]["content"]})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeDocker:
+    """Runs each ``docker run`` as a FakeAgent server and answers inspect/stats."""
+
+    def __init__(self):
+        self.containers = []
+        self.server = None
+
+    def run_command(self, cmd, capture_output=True, check=True, input_text=None):
+        if cmd[:3] == ["docker", "image", "inspect"]:
+            return "104857600\n"
+        if cmd[:2] == ["docker", "stats"]:
+            return "64MiB / 1GiB\n"
+        if cmd[:2] == ["docker", "run"]:
+            env = dict(cmd[i + 1].split("=", 1) for i, arg in enumerate(cmd) if arg == "-e")
+            env["OPENAI_BASE_URL"] = env["OPENAI_BASE_URL"].replace("host.docker.internal", "127.0.0.1")
+            port = int(cmd[cmd.index("-p") + 1].split(":")[0])
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), FakeAgent)
+            self.server.env = env
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            self.containers.append(env)
+            return "container-id\n"
+        if cmd[:2] == ["git", "rev-parse"]:
+            return "abc1234\n"
+        raise AssertionError(f"unexpected command {cmd}")
+
+    def remove(self, cmd, capture_output=True):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def test_parse_docker_size():
+    """docker stats and inspect sizes convert to bytes in decimal and binary units."""
+    assert _parse_docker_size("64MiB") == 64 * 1024 ** 2
+    assert _parse_docker_size("1.5GB ") == 1_500_000_000
+    assert _parse_docker_size("512B") == 512
+    assert _parse_docker_size("2048") == 2048
+
+
+def test_startup_benchmark_records_each_run(tmp_path, monkeypatch):
+    """Every run starts a container against the stub and records ping, invocation and RSS."""
+    docker = FakeDocker()
+    monkeypatch.setattr(deploy_local, "run_command", docker.run_command)
+    monkeypatch.setattr(deploy_local.subprocess, "run", docker.remove)
+    output = tmp_path / "startup_bench.json"
+    config = {"repository_name": "agent", "dockerfile_path": str(tmp_path / "Dockerfile")}
+
+    assert run_startup_benchmark(config, port=free_port(), runs=2, stub_port=free_port(),
+                                 output=str(output), ping_timeout=5)
+
+    results = json.loads(output.read_text())
+    assert results["runs"] == results["successful_runs"] == 2
+    assert results["image_size_bytes"] == 104857600 and results["git_commit"] == "abc1234"
+    assert results["rss_bytes"]["median"] == 64 * 1024 ** 2
+    assert all(sample["time_to_ping_ms"] > 0 and sample["first_invocation_ok"] for sample in results["samples"])
+    assert len(docker.containers) == 2 and docker.server is None
+    assert all(env["MEMORY_PREFETCH_ENABLED"] == "false" for env in docker.containers)
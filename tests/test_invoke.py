@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Unit tests for the invocation entry points.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'agents'))
+
+# Settings are read at import time: no real credentials, no recording, no speculative lookups
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("MEM0_API_KEY", "test")
+os.environ["RECORD_INVOCATIONS_PATH"] = ""
+os.environ["MEMORY_PREFETCH_ENABLED"] = "false"
+
+import openai_agent
+from utils.cancellation import DEADLINE_EXCEEDED
+from utils.deadline import NO_ANSWER_TEXT
+from utils.priority import PriorityScheduler
+from utils.single_flight import SingleFlight, request_key
+
+
+def assert_degraded(response, started):
+    """The reply is the marked fallback answer, returned once the deadline passed."""
+    assert response["result"]["content"] == [{"text": NO_ANSWER_TEXT}]
+    assert response["degraded"] is True and response["degraded_reasons"] == [DEADLINE_EXCEEDED]
+    assert 0.15 < time.monotonic() - started < 1.0
+
+
+def test_deadline_while_queued_for_admission_is_a_degraded_answer(monkeypatch):
+    """A request still waiting for a priority slot when its deadline passes gets a degraded answer."""
+    scheduler = PriorityScheduler(1, {"interactive": 1.0})
+    monkeypatch.setattr(openai_agent, "priority_scheduler", scheduler)
+
+    async def queued():
+        async with scheduler.admit("interactive"):
+            return await openai_agent.handle_invocation({"prompt": "hi", "deadline_ms": 200})
+
+    started = time.monotonic()
+    assert_degraded(asyncio.run(queued()), started)
+    assert scheduler.stats()["classes"]["interactive"]["waiting"] == 0
+
+
+def test_deadline_while_waiting_for_the_session_lock_is_a_degraded_answer():
+    """A turn queued behind another turn of its session answers degraded at its deadline."""
+    started = time.monotonic()
+    with openai_agent.session_store.lock("locked-session"):
+        response = openai_agent.invoke({"prompt": "hi", "session_id": "locked-session", "deadline_ms": 200})
+    assert_degraded(response, started)
+
+
+def test_deadline_while_joined_to_a_leader_is_a_degraded_answer(monkeypatch):
+    """A duplicate waiting on a slower leader's run answers degraded at its own deadline."""
+    flight = SingleFlight(join_window_seconds=5)
+    monkeypatch.setattr(openai_agent, "single_flight", flight)
+    payload = {"prompt": "hi", "session_id": "joined-session", "deadline_ms": 200}
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=(request_key(payload, "joined-session"), lambda: release.wait(5)))
+    leader.start()
+    try:
+        started = time.monotonic()
+        assert_degraded(openai_agent.invoke(payload), started)
+    finally:
+        release.set()
+        leader.join()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Unit tests for the embedded local memory backend.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.local_memory import LocalMemory, LocalMemoryTool, UserMemory, hash_embed
+from utils.request_context import run_sync
+
+TOOL_SPEC = {"name": "mem0_memory", "description": "", "inputSchema": {"json": {}}}
+
+
+def call(tool, **tool_input):
+    async def collect():
+        return [event async for event in tool.stream({"toolUseId": "t1", "input": tool_input}, {})]
+    result = run_sync(collect())[-1].tool_result
+    return result["status"], result["content"][0]["text"]
+
+
+def test_hash_embed_is_normalized_and_similarity_aware():
+    vectors = hash_embed(["my favourite colour is blue", "favourite colour: blue", "I work as a nurse"])
+    assert vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+
+def test_tool_store_retrieve_list_delete(tmp_path):
+    """The tool answers the mem0_memory actions in mem0's result shapes, per user."""
+    tool = LocalMemoryTool(LocalMemory(str(tmp_path)), TOOL_SPEC)
+
+    status, text = call(tool, action="store", content="Name is Neo", user_id="neo")
+    assert status == "success"
+    memory_id = json.loads(text)[0]["id"]
+    call(tool, action="store", content="Lives in Zion and likes noodles", user_id="neo")
+    call(tool, action="store", content="Name is Trinity", user_id="trinity")
+
+    status, text = call(tool, action="retrieve", query="what is my name", user_id="neo")
+    results = json.loads(text)
+    assert results[0]["memory"] == "Name is Neo" and results[0]["score"] > results[1]["score"]
+    assert all(result["user_id"] == "neo" for result in results)
+
+    assert len(json.loads(call(tool, action="list", user_id="neo")[1])) == 2
+    assert call(tool, action="delete", memory_id=memory_id) == ("success", f"Memory {memory_id} deleted successfully")
+    assert [m["memory"] for m in json.loads(call(tool, action="list", user_id="neo")[1])] == ["Lives in Zion and likes noodles"]
+    assert call(tool, action="retrieve", user_id="neo")[0] == "error"
+
+
+def test_memory_ids_resolve_to_their_owner_directly(tmp_path):
+    """get/delete by id alone open only the owner's store, without scanning other users."""
+    memory = LocalMemory(str(tmp_path), dim=32, max_open=4)
+    ids = {f"user-{i}": memory.user(f"user-{i}").add(f"fact about user {i}")["id"] for i in range(20)}
+    tool = LocalMemoryTool(LocalMemory(str(tmp_path), dim=32), TOOL_SPEC)
+
+    assert json.loads(call(tool, action="get", memory_id=ids["user-7"])[1])["memory"] == "fact about user 7"
+    assert list(tool.memory._open) == [LocalMemory._key("user:user-7")]
+    assert tool.memory.owner_of("not-a-memory-id") is None
+    assert tool.memory.owner_of(f"{'0' * 12}-{ids['user-7'][13:]}") is None
+    with open(os.path.join(str(tmp_path), LocalMemory._key("user:user-7"), "OWNER")) as f:
+        assert f.read() == "user:user-7"
+
+
+def test_appends_are_visible_to_other_handles_and_survive_reopen(tmp_path):
+    """Two handles on one directory (as in two worker processes) see each other's writes."""
+    path = str(tmp_path / "user")
+    first = UserMemory(path, 64, lambda texts: hash_embed(texts, 64))
+    second = UserMemory(path, 64, lambda texts: hash_embed(texts, 64))
+
+    first.add_many([f"memory number {i}" for i in range(10)])
+    second.add("the last one")
+    assert len(first) == 11 and len(second) == 11
+    assert first.search("the last one", limit=1)[0]["memory"] == "the last one"
+
+    reopened = UserMemory(path, 64, lambda texts: hash_embed(texts, 64))
+    assert len(reopened) == 11
+
+
+def test_refresh_keeps_appends_made_between_its_reads(tmp_path):
+    """A write landing between a reader's log and vector reads is picked up, not skipped."""
+    path = str(tmp_path / "user")
+    reader = UserMemory(path, 32, lambda texts: hash_embed(texts, 32))
+    writer = UserMemory(path, 32, lambda texts: hash_embed(texts, 32))
+    reader.add("first")
+
+    for helper in ("_log_tail", "_vector_rows"):
+        original = getattr(reader, helper)
+
+        def interleaved(original=original, helper=helper):
+            result = original()
+            # One-shot: the writer's append lands right after this read
+            setattr(reader, helper, original)
+            writer.add(f"appended after {helper}")
+            return result
+
+        setattr(reader, helper, interleaved)
+        reader.list()
+
+    assert sorted(record["memory"] for record in reader.list()) == [
+        "appended after _log_tail", "appended after _vector_rows", "first"]
+
+
+def test_compaction_drops_deleted_rows(tmp_path):
+    path = str(tmp_path / "user")
+    store = UserMemory(path, 32, lambda texts: hash_embed(texts, 32), compact_ratio=0.25)
+    records = store.add_many([f"fact {i} about apples" for i in range(200)])
+    other = UserMemory(path, 32, lambda texts: hash_embed(texts, 32))
+    assert len(other) == 200
+
+    for record in records[:64]:
+        store.delete(record["id"])
+
+    # The 64th delete passed both thresholds and rewrote the files
+    assert sorted(os.listdir(path)) == ["1.jsonl", "1.vec", "CURRENT", "lock"]
+    assert os.path.getsize(os.path.join(path, "1.vec")) == 136 * 32 * 4
+    assert len(store) == 136 and len(other) == 136
+    assert store.search("fact 150 about apples", limit=1)[0]["memory"] == "fact 150 about apples"
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Unit tests for mem0 result post-processing.
+"""
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.memory_filter import MemoryFilter
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+def memory(memory_id, text, score=None, days_old=0):
+    entry = {
+        "id": memory_id,
+        "memory": text,
+        "hash": "0" * 32,
+        "user_id": "neo",
+        "metadata": None,
+        "created_at": (NOW - timedelta(days=days_old)).isoformat(),
+        "updated_at": None,
+    }
+    if score is not None:
+        entry["score"] = score
+    return entry
+
+
+def make_filter(**kwargs):
+    return MemoryFilter(clock=NOW.timestamp, **kwargs)
+
+
+def test_near_duplicates_keep_the_strongest_copy():
+    memories = [
+        memory("a", "User's name is Neo", score=0.70),
+        memory("b", "user name is Neo.", score=0.90),
+        memory("c", "Prefers tea over coffee", score=0.50),
+    ]
+
+    kept, counts = make_filter().filter(memories, "what is my name")
+
+    assert [m["id"] for m in kept] == ["b", "c"]
+    assert counts["duplicates"] == 1
+
+
+def test_ranks_by_relevance_and_recency():
+    """Without mem0 scores, word overlap with the request ranks memories, nudged by recency."""
+    memories = [
+        memory("old-match", "Lives in Berlin near the river", days_old=365),
+        memory("fresh-other", "Works as a nurse", days_old=0),
+        memory("fresh-match", "Recently moved to Berlin", days_old=1),
+    ]
+
+    query = "where in Berlin do I live"
+
+    by_relevance, _ = make_filter(recency_weight=0).filter(memories, query)
+    blended, _ = make_filter(recency_weight=0.2).filter(memories, query)
+
+    assert [m["id"] for m in by_relevance] == ["old-match", "fresh-match", "fresh-other"]
+    assert [m["id"] for m in blended] == ["fresh-match", "old-match", "fresh-other"]
+
+
+def test_token_budget_and_compact_output():
+    memories = [
+        memory(str(i), " ".join(f"fact{i}detail{j}" for j in range(10)), score=1 - i / 100)
+        for i in range(30)
+    ]
+
+    kept, counts = make_filter(token_budget=200).filter(memories, "facts")
+
+    assert 0 < len(kept) < 30
+    assert len(json.dumps(kept, separators=(",", ":"))) // 4 <= 200
+    assert counts["over_budget"] == 30 - len(kept) and counts["duplicates"] == 0
+    assert set(kept[0]) == {"id", "memory", "score", "created_at"}
+
+
+def test_apply_rewrites_retrieve_results_only():
+    memory_filter = make_filter(token_budget=0)
+    memories = [memory("a", "Name is Neo", score=0.9), memory("b", "name is neo", score=0.8)]
+    raw = {"toolUseId": "t1", "status": "success", "content": [{"text": json.dumps(memories, indent=2)}]}
+
+    result = memory_filter.apply({"action": "retrieve", "query": "name"}, raw)
+
+    assert result["toolUseId"] == "t1"
+    assert [m["id"] for m in json.loads(result["content"][0]["text"])] == ["a"]
+    stats = memory_filter.stats()
+    assert stats["calls"] == 1 and stats["duplicates"] == 1 and stats["tokens_saved"] > 0
+
+    assert memory_filter.apply({"action": "store", "content": "x"}, raw) is raw
+    assert memory_filter.apply({"action": "get"}, raw) is raw
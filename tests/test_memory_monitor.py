@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Unit tests for the memory watermark monitor.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.memory_monitor import MemoryMonitor, read_rss_bytes
+from utils.session_store import CompactSessionStore
+
+MB = 2**20
+
+
+class FakeProcess:
+    """RSS reader whose value the evictors lower."""
+
+    def __init__(self, rss):
+        self.rss = rss
+
+    def __call__(self):
+        return self.rss
+
+    def evictor(self, freed, calls):
+        def evict(target_bytes):
+            calls.append(target_bytes)
+            self.rss -= freed
+            return freed
+        return evict
+
+
+def test_below_high_watermark_does_nothing():
+    process = FakeProcess(100 * MB)
+    calls = []
+    monitor = MemoryMonitor(200 * MB, 150 * MB, [("cache", process.evictor(10 * MB, calls))], rss_reader=process)
+
+    assert monitor.check() is None
+    assert calls == []
+    assert monitor.stats()["rss_bytes"] == 100 * MB
+
+
+def test_evictors_run_in_order_until_low_watermark():
+    """Stages stop once RSS is under the low watermark and report reclaimed bytes."""
+    process = FakeProcess(210 * MB)
+    first, second, third = [], [], []
+    monitor = MemoryMonitor(
+        200 * MB, 150 * MB,
+        [
+            ("subagents", process.evictor(20 * MB, first)),
+            ("cache", process.evictor(50 * MB, second)),
+            ("sessions", process.evictor(100 * MB, third)),
+        ],
+        rss_reader=process,
+    )
+
+    event = monitor.check()
+
+    assert first == [60 * MB] and second == [40 * MB] and third == []
+    assert [stage["stage"] for stage in event["stages"]] == ["subagents", "cache"]
+    assert event["reclaimed_bytes"] == 70 * MB
+    assert monitor.stats()["reclaimed_bytes_total"] == 70 * MB
+
+
+def test_idle_session_evictor_spares_active_sessions():
+    """The session stage only drops histories idle longer than the threshold."""
+    store = CompactSessionStore()
+    store.save("quiet", [{"role": "user", "content": [{"text": "x" * 1000}]}])
+    store.save("active", [{"role": "user", "content": [{"text": "y" * 1000}]}])
+    store._sessions["quiet"].last_access -= 600
+    store._sessions.move_to_end("active")
+
+    released = store.evict_idle(60, target_bytes=10 * MB)
+
+    assert released > 0
+    assert "quiet" not in store and "active" in store
+
+
+def test_invalid_watermarks_and_rss():
+    with pytest.raises(ValueError):
+        MemoryMonitor(100, 200, [])
+    assert read_rss_bytes() > 0
+
+
+def test_cooldown_after_unsuccessful_shed():
+    """If shedding cannot get under the high watermark, the next attempt waits."""
+    process = FakeProcess(300 * MB)
+    calls = []
+    monitor = MemoryMonitor(200 * MB, 150 * MB, [("cache", process.evictor(1 * MB, calls))],
+                            rss_reader=process, cooldown_seconds=60)
+
+    assert monitor.check() is not None
+    assert monitor.check() is None
+    assert len(calls) == 1
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Unit tests for the local OpenAI-compatible model stub.
+"""
+import os
+import sys
+import time
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'deployment'))
+from model_stub import start_stub_server
+
+
+def complete(stub, max_tokens=10):
+    url = f"http://127.0.0.1:{stub.server_address[1]}/v1/chat/completions"
+    body = {"model": "stub", "max_tokens": max_tokens, "messages": [{"role": "user", "content": "hello"}]}
+    return requests.post(url, json=body, timeout=5)
+
+
+def test_latency_is_added_to_every_completion():
+    """Each completion takes at least latency_ms, and no limits means no rate limit headers."""
+    stub = start_stub_server(port=0, host="127.0.0.1", reply="pong", latency_ms=150)
+    try:
+        start = time.monotonic()
+        response = complete(stub)
+        elapsed = time.monotonic() - start
+    finally:
+        stub.shutdown()
+
+    assert response.status_code == 200
+    assert response.json()["choices"][0]["message"]["content"] == "pong"
+    assert elapsed >= 0.15
+    assert not any(name.startswith("x-ratelimit") for name in response.headers)
+
+
+def test_limits_report_headers_and_throttle_when_exceeded():
+    """Responses carry x-ratelimit-* budgets; a call past the limit gets a 429 with retry-after-ms."""
+    stub = start_stub_server(port=0, host="127.0.0.1", rpm=2, tpm=1000)
+    try:
+        responses = [complete(stub) for _ in range(3)]
+    finally:
+        stub.shutdown()
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    first, second, throttled = (response.headers for response in responses)
+    assert (first["x-ratelimit-limit-requests"], first["x-ratelimit-remaining-requests"]) == ("2", "1")
+    assert second["x-ratelimit-remaining-requests"] == "0"
+    assert first["x-ratelimit-limit-tokens"] == "1000"
+    # Each call is charged its one-token prompt plus max_tokens; the refill adds at most a token back
+    assert int(second["x-ratelimit-remaining-tokens"]) in (978, 979)
+    assert second["x-ratelimit-reset-requests"].endswith("ms")
+    # The missing request refills at 2 per minute, so the retry is ~30s away
+    assert 29000 <= int(throttled["retry-after-ms"]) <= 30000
+    assert (stub.request_count, stub.throttled_count) == (2, 1)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Unit tests for speculative memory prefetch.
+"""
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from strands.tools.tools import PythonAgentTool
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.prefetch import MemoryPrefetcher
+from utils.request_context import run_sync
+
+SPEC = {"name": "mem0_memory", "description": "", "inputSchema": {"json": {}}}
+
+
+def memory_agent(delay=0.0, status="success"):
+    calls = []
+
+    def mem0_memory(tool, **kwargs):
+        calls.append(tool["input"])
+        time.sleep(delay)
+        return {"toolUseId": tool["toolUseId"], "status": status, "content": [{"text": json.dumps([{"memory": "Name is Neo"}])}]}
+
+    registry = {"mem0_memory": PythonAgentTool("mem0_memory", SPEC, mem0_memory)}
+    return SimpleNamespace(tool_registry=SimpleNamespace(registry=registry)), calls
+
+
+def call(agent, **tool_input):
+    async def collect():
+        tool_use = {"toolUseId": "model-call", "input": tool_input}
+        return [event async for event in agent.tool_registry.registry["mem0_memory"].stream(tool_use, {})]
+    return run_sync(collect())[-1].tool_result
+
+
+def test_first_retrieve_is_served_from_the_prefetch():
+    prefetcher = MemoryPrefetcher()
+    agent, calls = memory_agent(delay=0.1)
+    prefetch = prefetcher.begin("neo", "what is my name")
+    prefetch.attach(agent)
+    time.sleep(0.15)  # the first model call
+
+    result = call(agent, action="retrieve", query="name", user_id="neo")
+    assert result["toolUseId"] == "model-call" and "Neo" in result["content"][0]["text"]
+    # A second retrieve goes to the tool
+    call(agent, action="retrieve", query="name again", user_id="neo")
+    prefetch.close()
+
+    assert [c["query"] for c in calls] == ["what is my name", "name again"]
+    stats = prefetcher.stats()
+    assert stats["hit"] == 1 and stats["unused"] == 0
+    assert 90 <= stats["saved_ms_total"] <= 150
+
+
+def test_other_users_and_failed_lookups_go_to_the_tool():
+    prefetcher = MemoryPrefetcher()
+    agent, calls = memory_agent(status="error")
+    prefetch = prefetcher.begin("neo", "hello")
+    prefetch.attach(agent)
+
+    call(agent, action="retrieve", query="x", user_id="trinity")
+    assert call(agent, action="retrieve", query="hello", user_id="neo")["status"] == "error"
+    prefetch.close()
+
+    # The prefetch plus both calls reached the tool
+    assert sorted(c["user_id"] for c in calls) == ["neo", "neo", "trinity"]
+    assert prefetcher.stats()["error"] == 1 and prefetcher.stats()["hit"] == 0
+
+
+def test_retrieves_about_something_else_go_to_the_tool():
+    """Only a retrieve whose query overlaps the prompt is served; unrelated ones count as a mismatch."""
+    prefetcher = MemoryPrefetcher()
+    agent, calls = memory_agent()
+    prefetch = prefetcher.begin("neo", "what is my name?")
+    prefetch.attach(agent)
+    prefetch.future.result()
+
+    call(agent, action="retrieve", query="favourite food", user_id="neo")
+    result = call(agent, action="retrieve", query="user name", user_id="neo")
+    prefetch.close()
+    assert result["toolUseId"] == "model-call"
+    assert [c["query"] for c in calls] == ["what is my name?", "favourite food"]
+    assert prefetcher.stats()["hit"] == 1 and prefetcher.stats()["mismatch"] == 0
+
+    agent, calls = memory_agent()
+    prefetch = prefetcher.begin("neo", "what is my name?")
+    prefetch.attach(agent)
+    prefetch.future.result()
+    call(agent, action="retrieve", query="favourite food", user_id="neo")
+    call(agent, action="retrieve", query="", user_id="neo")
+    prefetch.close()
+    assert [c["query"] for c in calls] == ["what is my name?", "favourite food", ""]
+    assert prefetcher.stats()["mismatch"] == 1 and prefetcher.stats()["unused"] == 0
+
+
+def test_low_hit_rate_backs_off_to_probes():
+    prefetcher = MemoryPrefetcher(min_hit_rate=0.5, window=4, probe_every=3)
+    for _ in range(4):
+        agent, _ = memory_agent()
+        prefetch = prefetcher.begin("neo", "hello")
+        prefetch.attach(agent)
+        prefetch.future.result()
+        prefetch.close()
+    assert prefetcher.stats()["unused"] == 4
+
+    started = [prefetcher.begin("neo", "hello") is not None for _ in range(6)]
+    assert started == [False, False, True, False, False, True]
+    assert prefetcher.stats()["skipped"] == 4
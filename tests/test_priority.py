@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Unit tests for priority scheduling of agent runs.
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.cancellation import CancelToken, Cancelled
+from utils.metrics import metrics
+from utils.priority import PriorityScheduler
+
+
+def hold(scheduler, priority, release, admitted, token=None):
+    """Start a task that takes a slot, records its admission and waits for ``release``."""
+    async def run():
+        try:
+            async with scheduler.admit(priority, token):
+                admitted.append(priority)
+                await release.wait()
+        except Cancelled:
+            admitted.append(f"{priority}-cancelled")
+    return asyncio.create_task(run())
+
+
+def test_batch_is_capped_and_interactive_goes_first():
+    scheduler = PriorityScheduler(4, {"interactive": 1.0, "batch": 0.5})
+    admitted = []
+
+    async def scenario():
+        release = asyncio.Event()
+        tasks = [hold(scheduler, "batch", release, admitted) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        # Batch holds its two slots; the third batch run waits although two slots are free
+        assert admitted == ["batch", "batch"]
+        tasks += [hold(scheduler, "interactive", release, admitted) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert admitted == ["batch", "batch", "interactive", "interactive"]
+
+        stats = scheduler.stats()["classes"]
+        assert stats["batch"]["waiting"] == 1 and stats["interactive"]["waiting"] == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert sorted(admitted) == ["batch"] * 3 + ["interactive"] * 3
+
+
+def test_aged_waiters_jump_the_weighted_order():
+    scheduler = PriorityScheduler(1, {"interactive": 1.0, "batch": 1.0}, aging_seconds=0.05)
+    admitted = []
+
+    async def scenario():
+        first, rest = asyncio.Event(), asyncio.Event()
+        blocker = hold(scheduler, "interactive", first, admitted)
+        await asyncio.sleep(0.01)
+        batch = hold(scheduler, "batch", rest, admitted)
+        await asyncio.sleep(0.06)
+        interactive = hold(scheduler, "interactive", rest, admitted)
+        await asyncio.sleep(0.01)
+
+        # Without aging the freed slot would go to interactive, which is listed first
+        first.set()
+        await blocker
+        await asyncio.sleep(0.01)
+        assert admitted == ["interactive", "batch"]
+        assert scheduler.stats()["classes"]["batch"]["aged"] == 1
+
+        rest.set()
+        await asyncio.gather(batch, interactive)
+
+    asyncio.run(scenario())
+    assert admitted == ["interactive", "batch", "interactive"]
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = PriorityScheduler(1, {"interactive": 1.0})
+    admitted = []
+
+    async def scenario():
+        release, token = asyncio.Event(), CancelToken()
+        holder = hold(scheduler, "interactive", release, admitted)
+        waiter = hold(scheduler, "interactive", release, admitted, token)
+        await asyncio.sleep(0.01)
+
+        token.cancel("client disconnected")
+        await waiter
+        assert admitted == ["interactive", "interactive-cancelled"]
+        assert scheduler.stats()["classes"]["interactive"]["waiting"] == 0
+        release.set()
+        await holder
+
+    asyncio.run(scenario())
+
+
+def test_async_admission_waits_on_the_loop():
+    """Queued requests wait as coroutines, in priority order, timed from arrival; cancelled ones leave."""
+    scheduler = PriorityScheduler(1, {"interactive": 1.0, "batch": 1.0})
+    admitted = []
+
+    async def request(priority, token=None, arrived=None):
+        try:
+            async with scheduler.admit(priority, token, arrived):
+                admitted.append(priority)
+                await asyncio.sleep(0.02)
+        except Cancelled:
+            admitted.append(f"{priority}-cancelled")
+
+    async def scenario():
+        metrics.reset()
+        holder = asyncio.create_task(request("batch"))
+        await asyncio.sleep(0)
+        token = CancelToken()
+        queued = [
+            asyncio.create_task(request("batch")),
+            asyncio.create_task(request("batch", token)),
+            # Arrived a second ago, so its recorded wait includes time before it reached the queue
+            asyncio.create_task(request("interactive", arrived=time.monotonic() - 1)),
+        ]
+        await asyncio.sleep(0.005)
+        assert scheduler.stats()["classes"]["batch"]["waiting"] == 2
+        token.cancel("client disconnected")
+        await asyncio.gather(holder, *queued)
+
+    asyncio.run(scenario())
+    assert admitted == ["batch", "batch-cancelled", "interactive", "batch"]
+    assert scheduler.stats()["classes"]["batch"]["running"] == 0
+    assert metrics.snapshot()["histograms"]["priority_wait_ms{priority=interactive}"]["min"] >= 1000
+
+
+def test_resolve_and_unlimited_mode():
+    scheduler = PriorityScheduler(0, {"interactive": 1.0, "batch": 0.5})
+    assert scheduler.resolve(None) == "interactive"
+    assert scheduler.resolve("batch") == "batch"
+    with pytest.raises(ValueError, match="Unknown priority"):
+        scheduler.resolve("urgent")
+    for unhashable in (["batch"], {"class": "batch"}):
+        with pytest.raises(ValueError, match="Unknown priority"):
+            scheduler.resolve(unhashable)
+
+    async def three():
+        async with scheduler.admit("batch"), scheduler.admit("batch"), scheduler.admit("batch"):
+            return scheduler.stats()["classes"]["batch"]["running"]
+
+    assert asyncio.run(three()) == 3
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Unit tests for the sampling profiler.
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from config.settings import Settings
+from utils.profiler import Profiler
+
+
+def busy_worker(stop, retained):
+    while not stop.is_set():
+        retained.append(bytearray(1024))
+        sum(range(1000))
+
+
+def test_profile_captures_threads_and_allocations():
+    """A busy thread shows up in the collapsed stacks and its allocations in the diff."""
+    stop = threading.Event()
+    retained = []
+    thread = threading.Thread(target=busy_worker, args=(stop, retained), name="busy")
+    thread.start()
+    try:
+        result = Profiler().run(0.3, interval=0.005)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert result["samples"] > 10
+    lines = result["collapsed"].splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and all("busy_worker (test_profiler.py:" in line for line in busy)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("test_profiler.py" in entry["location"] for entry in result["allocations"])
+
+
+def test_only_one_profile_at_a_time():
+    profiler = Profiler()
+    started = threading.Event()
+    results = []
+
+    def first():
+        started.set()
+        results.append(profiler.run(0.3))
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    started.wait()
+    while not profiler.busy:
+        pass
+    assert profiler.run(0.1) is None
+    thread.join()
+    assert results[0] is not None
+
+
+def test_profiling_requires_a_token(monkeypatch):
+    """Settings refuse to enable the profiling route without a token to guard it."""
+    monkeypatch.setattr(Settings, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(Settings, "MEMORY_BACKEND", "local")
+    monkeypatch.setattr(Settings, "DEBUG_PROFILING_ENABLED", True)
+    monkeypatch.setattr(Settings, "DEBUG_PROFILING_TOKEN", "")
+    with pytest.raises(ValueError, match="DEBUG_PROFILING_TOKEN"):
+        Settings.validate()
+
+    monkeypatch.setattr(Settings, "DEBUG_PROFILING_TOKEN", "secret")
+    assert Settings.validate()
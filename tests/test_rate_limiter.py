@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Unit tests for the OpenAI rate limit scheduler.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'deployment'))
+from model_stub import start_stub_server
+from utils.rate_limiter import RateLimitScheduler, RateLimitedOpenAIModel, parse_duration
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_duration():
+    """OpenAI reset values parse to seconds."""
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("1h2m3s") == 3723
+    assert parse_duration("2") == 2
+    assert parse_duration("") is None
+    assert parse_duration("soon") is None
+
+
+def test_headers_drive_delays():
+    """Once the server reports an empty bucket, the next call waits for the refill."""
+    clock = FakeClock()
+    scheduler = RateLimitScheduler(clock=clock)
+    assert scheduler.reserve(100) == 0
+
+    scheduler.observe(200, {
+        "x-ratelimit-limit-requests": "60", "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "60s",
+        "x-ratelimit-limit-tokens": "1000", "x-ratelimit-remaining-tokens": "500",
+        "x-ratelimit-reset-tokens": "30s",
+    })
+    # One request refills per second; the second queued caller waits behind the first
+    assert scheduler.reserve(10) == 1.0
+    assert scheduler.reserve(10) == 2.0
+
+    clock.now += 10
+    # Tokens refill at 500/30 per second: 480 left + 10s of refill, then 1000 more are taken
+    rate = 500 / 30
+    stats = scheduler.stats()
+    assert stats["requests"]["limit"] == 60
+    assert round(scheduler.reserve(1000), 3) == round((1000 - 480 - 10 * rate) / rate, 3)
+
+
+def test_429_blocks_until_retry_after():
+    """A throttled response blocks new calls for the server's retry-after."""
+    clock = FakeClock()
+    scheduler = RateLimitScheduler(clock=clock, max_wait_seconds=5)
+    scheduler.observe(429, {"retry-after-ms": "1500"})
+
+    assert scheduler.reserve(1) == 1.5
+    clock.now += 2
+    assert scheduler.reserve(1) == 0
+
+
+def test_model_stays_under_stub_limits():
+    """Against a stub enforcing 3 requests/second, calls are delayed instead of throttled."""
+    stub = start_stub_server(port=0, host="127.0.0.1", rpm=3, window_seconds=1.0)
+    try:
+        scheduler = RateLimitScheduler()
+        model = RateLimitedOpenAIModel(
+            scheduler,
+            client_args={"api_key": "test", "base_url": f"http://127.0.0.1:{stub.server_address[1]}/v1"},
+            model_id="stub",
+            params={"max_tokens": 10},
+        )
+
+        async def call():
+            messages = [{"role": "user", "content": [{"text": "hello"}]}]
+            return [event async for event in model.stream(messages)]
+
+        start = time.monotonic()
+        for _ in range(6):
+            asyncio.run(call())
+        elapsed = time.monotonic() - start
+    finally:
+        stub.shutdown()
+
+    assert stub.throttled_count == 0
+    assert stub.request_count == 6
+    assert elapsed >= 0.5
+    assert scheduler.stats()["requests"]["limit"] == 3
+
+
+def test_workers_schedule_against_their_share_of_the_limits():
+    """Each of several workers keeps to its share of the configured and reported limits."""
+    clock = FakeClock()
+    scheduler = RateLimitScheduler(requests_limit=60, tokens_limit=900, clock=clock, processes=3)
+    assert scheduler.stats()["requests"]["limit"] == 20
+    assert scheduler.reserve(300) == 0
+    # The token share is spent: the next call waits for this worker's third of the refill
+    assert scheduler.reserve(15) == 15 / (300 / 60)
+
+    clock.now += 10
+    scheduler.observe(200, {
+        "x-ratelimit-limit-requests": "60", "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "60s",
+    })
+    stats = scheduler.stats()["requests"]
+    assert (stats["limit"], stats["remaining"], stats["refill_per_second"]) == (20, 0, round(20 / 60, 3))
+    assert scheduler.reserve(1) == 3.0
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""
+Unit tests for invocation recording and replay.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pytest
+from strands import Agent
+from strands.models.model import Model
+from strands_tools import calculator
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.cancellation import DEADLINE_EXCEEDED, CancelToken, Cancelled, cancellable
+from utils.recorder import InvocationRecorder, ReplayModel, ReplayTool, is_truncated
+from utils.request_context import run_sync
+
+
+class CalculatorModel(Model):
+    """Asks for one calculation, then answers with the tool's result."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        last = messages[-1]["content"]
+        yield {"messageStart": {"role": "assistant"}}
+        if "toolResult" not in last[0]:
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": "t1", "name": "calculator"}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps({"expression": "6*7"})}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        else:
+            yield {"contentBlockDelta": {"delta": {"text": last[0]["toolResult"]["content"][0]["text"]}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+class StalledModel(CalculatorModel):
+    """Starts a message, then never finishes it."""
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockDelta": {"delta": {"text": "Thinking"}}}
+        await asyncio.sleep(10)
+
+
+def run_recorded(recorder, model, prompt):
+    with recorder.record({"prompt": prompt}) as recording:
+        agent = recorder.wrap_agent(Agent(model=model, tools=[calculator], callback_handler=None))
+        with recording.stage("agent"):
+            result = run_sync(agent.invoke_async(prompt))
+        recording.update(response={"result": result.message})
+    return result
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_model_and_tool_calls(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    recorder = InvocationRecorder(path)
+
+    run_recorded(recorder, recorder.wrap_model(CalculatorModel()), "what is 6*7?")
+
+    [record] = read_records(path)
+    assert record["payload"] == {"prompt": "what is 6*7?"}
+    assert len(record["model_calls"]) == 2
+    assert record["model_calls"][0]["request"]["tools"] == ["calculator"]
+    assert record["model_calls"][1]["events"][1]["contentBlockDelta"]["delta"]["text"] == "Result: 42"
+    [tool_call] = record["tool_calls"]
+    assert tool_call["name"] == "calculator" and tool_call["input"] == {"expression": "6*7"}
+    assert tool_call["result"]["status"] == "success"
+    assert {"agent", "total"} <= set(record["timings_ms"])
+
+
+def test_cut_off_streams_and_cancelled_invocations_are_marked(tmp_path):
+    """A stream stopped by a deadline is truncated and its invocation is recorded as cancelled."""
+    path = str(tmp_path / "traffic.jsonl")
+    recorder = InvocationRecorder(path)
+    model = recorder.wrap_model(StalledModel())
+
+    with pytest.raises(Cancelled):
+        with recorder.record({"prompt": "slow"}):
+            agent = Agent(model=model, callback_handler=None)
+            run_sync(cancellable(agent.invoke_async("slow"), CancelToken(time.monotonic() + 0.05)))
+    with recorder.record({"prompt": "late"}) as recording:
+        recording.update(response={"result": "Thinking", "degraded": True, "degraded_reasons": [DEADLINE_EXCEEDED]})
+    run_recorded(recorder, recorder.wrap_model(CalculatorModel()), "what is 6*7?")
+
+    cancelled, degraded, complete = read_records(path)
+    [call] = cancelled["model_calls"]
+    assert call["truncated"] and len(call["events"]) == 2
+    assert cancelled["cancelled"] == DEADLINE_EXCEEDED
+    assert degraded["degraded"] == [DEADLINE_EXCEEDED]
+    assert [is_truncated(record) for record in (cancelled, degraded, complete)] == [True, True, False]
+    assert not any("truncated" in call for call in complete["model_calls"])
+
+
+def test_disabled_recorder_writes_nothing(tmp_path):
+    recorder = InvocationRecorder("")
+    model = CalculatorModel()
+    assert recorder.wrap_model(model) is model
+
+    result = run_recorded(recorder, model, "what is 6*7?")
+
+    assert "Result: 42" in str(result)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_replay_serves_recorded_calls(tmp_path):
+    """Replaying the same conversation serves every model call by fingerprint."""
+    path = str(tmp_path / "traffic.jsonl")
+    recorder = InvocationRecorder(path)
+    run_recorded(recorder, recorder.wrap_model(CalculatorModel()), "what is 6*7?")
+    [record] = read_records(path)
+
+    replay = ReplayModel()
+    replay.load(record)
+    agent = Agent(model=replay, tools=[calculator], callback_handler=None)
+    result = run_sync(agent.invoke_async("what is 6*7?"))
+
+    assert json.loads(json.dumps({"result": result.message})) == record["response"]
+    assert replay.served == 2 and replay.drifted == 0
+
+    # A changed conversation still gets answers, in recorded order, counted as drift
+    replay.load(record)
+    run_sync(Agent(model=replay, tools=[calculator], callback_handler=None).invoke_async("6 times 7?"))
+    assert replay.drifted == 2
+
+
+def test_replay_tool_matches_by_input():
+    tool = ReplayTool({"name": "lookup", "description": "", "inputSchema": {"json": {}}})
+    tool.load({"tool_calls": [
+        {"name": "lookup", "input": {"q": "a"}, "result": {"status": "success", "content": [{"text": "A"}]}},
+        {"name": "lookup", "input": {"q": "b"}, "result": {"status": "success", "content": [{"text": "B"}]}},
+    ]})
+
+    async def call(tool_input):
+        events = [event async for event in tool.stream({"toolUseId": "x", "input": tool_input}, {})]
+        return events[-1].tool_result["content"][0]["text"]
+
+    assert run_sync(call({"q": "b"})) == "B"
+    assert run_sync(call({"q": "zzz"})) == "A"
+    assert tool.drifted == 1
+    assert run_sync(call({"q": "a"})).startswith("No recorded result")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Unit tests for the compact session store.
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.session_store import CompactSessionStore
+
+
+@pytest.fixture
+def messages():
+    """A short history with text, tool use and tool result blocks."""
+    return [
+        {"role": "user", "content": [{"text": "[User ID: neo] What is 2 + 2? ✨"}]},
+        {"role": "assistant", "content": [{"toolUse": {
+            "toolUseId": "call_1", "name": "calculator",
+            "input": {"expression": "2 + 2", "precision": -1, "ratio": 0.5, "symbolic": False, "extra": None},
+        }}]},
+        {"role": "user", "content": [{"toolResult": {
+            "toolUseId": "call_1", "status": "success", "content": [{"text": "Result: 4"}],
+        }}]},
+        {"role": "assistant", "content": [{"text": "Four."}]},
+    ]
+
+
+def test_round_trip(messages):
+    """Stored histories expand back to identical message dicts."""
+    store = CompactSessionStore()
+    store.save("s1", messages)
+
+    assert store.load("s1") == messages
+    assert store.load("missing") == []
+
+
+def test_save_replaces_a_trimmed_history(messages):
+    """Saving a history the conversation manager trimmed drops the old messages."""
+    store = CompactSessionStore()
+    store.save("s1", messages)
+    store.save("s1", messages[2:])
+
+    assert store.load("s1") == messages[2:]
+
+
+def test_repeated_strings_are_interned(messages):
+    """Roles and dict keys are shared across sessions instead of duplicated."""
+    store = CompactSessionStore()
+    store.save("s1", messages)
+    interned = store.stats()["interned_strings"]
+    store.save("s2", messages)
+
+    assert store.stats()["interned_strings"] == interned
+
+
+def test_intern_table_is_bounded_by_the_message_schema():
+    """Tool inputs with ever-new keys and values are stored inline, so the table stops growing."""
+    store = CompactSessionStore()
+    sizes = []
+    for i in range(500):
+        history = [
+            {"role": "user", "content": [{"text": f"question {i}"}]},
+            {"role": "assistant", "content": [{"toolUse": {
+                "toolUseId": f"call_{i}", "name": "calculator",
+                "input": {f"arg_{i}": f"value {i}", "name": f"name {i}", "type": f"type {i}"},
+            }}]},
+            {"role": "user", "content": [{"toolResult": {
+                "toolUseId": f"call_{i}", "status": "success", "content": [{"json": {f"key_{i}": {"role": f"r{i}"}}}],
+            }}]},
+            {"role": "user", "content": [{"document": {"format": "txt", "name": f"doc {i}", "source": {"bytes": b"x"}}}]},
+        ]
+        store.save(f"s{i}", history)
+        assert store.load(f"s{i}") == history
+        sizes.append(store.stats()["interned_strings"])
+
+    assert sizes[-1] == sizes[0] < 20
+
+
+def test_max_sessions_evicts_least_recently_used(messages):
+    """The oldest session is dropped once the cap is exceeded."""
+    store = CompactSessionStore(max_sessions=2)
+    store.save("s1", messages)
+    store.save("s2", messages)
+    store.load("s1")
+    store.save("s3", messages)
+
+    assert "s1" in store and "s3" in store
+    assert "s2" not in store
+
+
+def test_evict_idle_skips_locked_sessions(messages):
+    """Idle eviction releases bytes but never drops a session mid-turn."""
+    store = CompactSessionStore()
+    store.save("idle", messages)
+    store.save("busy", messages)
+    time.sleep(0.01)
+
+    with store.lock("busy"):
+        released = store.evict_idle(max_idle_seconds=0)
+
+    assert released > 0
+    assert "idle" not in store
+    assert "busy" in store
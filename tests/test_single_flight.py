@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Unit tests for single-flight request coalescing.
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.cancellation import CancelToken, Cancelled, current_cancel
+from utils.single_flight import SingleFlight, request_key
+
+
+def test_request_key_normalizes_prompt_and_scopes_session():
+    """Whitespace differences collapse; different sessions never share a key."""
+    a = request_key({"prompt": "  hello   world ", "user_id": "neo"}, "s1")
+    b = request_key({"user_id": "neo", "prompt": "hello world"}, "s1")
+
+    assert a == b
+    assert a != request_key({"prompt": "hello world", "user_id": "neo"}, "s2")
+
+
+def test_concurrent_duplicates_share_one_run():
+    """Duplicates arriving while the leader runs receive the leader's result."""
+    flight = SingleFlight(join_window_seconds=1.0)
+    calls = []
+    started = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {"result": "ok"}
+
+    results = []
+
+    def request():
+        results.append(flight.do("key", work))
+
+    leader = threading.Thread(target=request)
+    leader.start()
+    started.wait()
+    joiners = [threading.Thread(target=request) for _ in range(3)]
+    for thread in joiners:
+        thread.start()
+    for thread in [leader] + joiners:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(joined for _, joined in results) == [False, True, True, True]
+    assert all(result == {"result": "ok"} for result, _ in results)
+
+
+def test_requests_outside_window_run_again():
+    """A repeat after the join window is treated as a new request."""
+    flight = SingleFlight(join_window_seconds=0.01)
+    flight.do("key", lambda: 1)
+    time.sleep(0.02)
+
+    assert flight.do("key", lambda: 2) == (2, False)
+    assert flight.in_flight() == 0
+
+
+def test_leader_error_is_raised_to_joiners():
+    """Joiners see the same failure as the leader."""
+    flight = SingleFlight(join_window_seconds=1.0)
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("boom")
+
+    def request():
+        try:
+            flight.do("key", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=request)
+    leader.start()
+    started.wait()
+    with pytest.raises(RuntimeError):
+        flight.do("key", lambda: "unused")
+    leader.join()
+
+    assert errors == ["boom"]
+
+
+def test_shared_run_is_cancelled_only_when_every_caller_gives_up():
+    """The leader's client leaving does not cancel the run a joiner still waits on."""
+    flight = SingleFlight(join_window_seconds=1.0)
+    leader_token, joiner_token = CancelToken(), CancelToken()
+    started = threading.Event()
+    seen = {}
+
+    def work():
+        seen["group"] = current_cancel.get()
+        started.set()
+        seen["group"].wait(2)
+        seen["group"].check()
+        return "done"
+
+    errors = []
+
+    def request(fn, token):
+        try:
+            flight.do("key", fn, token)
+        except Cancelled as e:
+            errors.append(e.reason)
+
+    leader = threading.Thread(target=request, args=(work, leader_token))
+    leader.start()
+    started.wait()
+    joiner = threading.Thread(target=request, args=(lambda: "unused", joiner_token))
+    joiner.start()
+    time.sleep(0.05)
+
+    leader_token.cancel("client disconnected")
+    time.sleep(0.05)
+    assert not seen["group"].cancelled
+
+    joiner_token.cancel("client disconnected")
+    joiner.join()
+    leader.join()
+    assert errors == ["client disconnected", "client disconnected"]
+    assert seen["group"].reason == "client disconnected"
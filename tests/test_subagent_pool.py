@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Unit tests for the pooled use_llm sub-agents.
+"""
+import os
+import sys
+
+from strands import Agent
+from strands.models.model import Model
+from strands.tools.tools import PythonAgentTool
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.request_context import run_sync
+from utils.subagent_pool import SubAgentPool, make_use_llm_tool
+
+LOOKUP_SPEC = {"name": "lookup", "description": "", "inputSchema": {"json": {}}}
+
+
+class LookupModel(Model):
+    """Calls the lookup tool once, then answers with its result."""
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        last = messages[-1]["content"]
+        yield {"messageStart": {"role": "assistant"}}
+        if "toolResult" not in last[0]:
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": "t1", "name": "lookup"}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": "{}"}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        else:
+            yield {"contentBlockDelta": {"delta": {"text": last[0]["toolResult"]["content"][0]["text"]}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+def parent_agent(answer):
+    """A parent agent whose lookup tool (standing in for a per-request proxy) returns ``answer``."""
+    def lookup(tool, **kwargs):
+        return {"toolUseId": tool["toolUseId"], "status": "success", "content": [{"text": answer}]}
+    return Agent(model=LookupModel(), tools=[PythonAgentTool("lookup", LOOKUP_SPEC, lookup)], callback_handler=None)
+
+
+def call_use_llm(use_llm, parent):
+    async def collect():
+        tool_use = {"toolUseId": "u1", "input": {"prompt": "look it up", "tools": ["lookup"]}}
+        return [event async for event in use_llm.stream(tool_use, {"agent": parent})]
+    return run_sync(collect())[-1].tool_result["content"][0]["text"]
+
+
+def test_leased_agents_start_clean_and_follow_the_parent():
+    """A reused agent has no history or state and runs on the leasing parent's model."""
+    pool = SubAgentPool()
+    first, second = parent_agent("a"), parent_agent("b")
+
+    with pool.lease("prompt", [], first) as agent:
+        agent.messages.append({"role": "user", "content": [{"text": "left over"}]})
+        agent.state.set("key", "value")
+    with pool.lease("prompt", [], second) as reused:
+        assert reused is agent
+        assert reused.messages == [] and reused.state.get("key") is None
+        assert reused.model is second.model and reused.tool_executor is second.tool_executor
+
+    stats = pool.stats()
+    assert (stats["idle"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["avg_construction_ms"] > 0 and stats["construction_ms_saved"] == stats["avg_construction_ms"]
+
+
+def test_idle_agents_are_capped_and_drained_oldest_first():
+    """Check-ins beyond max_size evict the least recently used idle agents."""
+    pool = SubAgentPool(max_size=2)
+    agents = {}
+    for prompt in ("one", "two", "three"):
+        with pool.lease(prompt, []) as agent:
+            agents[prompt] = agent
+
+    assert pool.stats()["idle"] == 2
+    with pool.lease("one", []) as agent:
+        assert agent is not agents["one"]
+        agents["one"] = agent
+    # "two" was evicted by the check-in above, and drain takes "three" next
+    assert pool.drain(1) == 1
+    with pool.lease("one", []) as agent:
+        assert agent is agents["one"]
+    assert pool.drain() == 1 and pool.stats()["idle"] == 0
+
+
+def test_pooled_agents_call_the_leasing_parents_tools():
+    """A sub-agent reused across requests calls the current parent's tool objects, not the previous one's."""
+    pool = SubAgentPool()
+    use_llm = make_use_llm_tool(pool)
+
+    assert call_use_llm(use_llm, parent_agent("first request")).strip() == "Response: first request"
+    assert call_use_llm(use_llm, parent_agent("second request")).strip() == "Response: second request"
+    assert pool.stats()["hits"] == 1
+
+    # Idle agents don't hold on to the last request's tools
+    [[idle]] = pool._idle.values()
+    assert idle.tool_registry.registry == {}
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+Unit tests for the tool result cache.
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.tool_cache import CachePolicy, SqliteToolResultCache, ToolResultCache, canonical_key, parse_policies
+
+from strands.types.tools import AgentTool
+
+
+class CountingTool(AgentTool):
+    """Minimal tool that returns its input and counts executions."""
+
+    def __init__(self, name="calculator"):
+        super().__init__()
+        self._name = name
+        self.calls = 0
+
+    @property
+    def tool_name(self):
+        return self._name
+
+    @property
+    def tool_spec(self):
+        return {"name": self._name, "description": "test", "inputSchema": {"json": {}}}
+
+    @property
+    def tool_type(self):
+        return "python"
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        self.calls += 1
+        yield {"toolUseId": tool_use["toolUseId"], "status": "success",
+               "content": [{"text": f"Result: {tool_use['input']}"}]}
+
+
+def run_tool(tool, tool_use_id, tool_input):
+    """Drive a tool stream and return its final result."""
+    async def consume():
+        last = None
+        async for event in tool.stream({"toolUseId": tool_use_id, "name": tool.tool_name, "input": tool_input}, {}):
+            last = event
+        # Cache hits yield a ToolResultEvent wrapping the result
+        return last.get("tool_result", last)
+    return asyncio.run(consume())
+
+
+def test_canonical_key_ignores_key_order_and_none():
+    """Equivalent inputs produce the same key."""
+    assert canonical_key("t", {"a": 1, "b": 2}) == canonical_key("t", {"b": 2, "a": 1, "c": None})
+    assert canonical_key("t", {"a": 1}) != canonical_key("u", {"a": 1})
+
+
+def test_parse_policies():
+    """Policies parse from the settings string format."""
+    policies = parse_policies("calculator=pure, lookup=ttl:30 ,mem0_memory=never")
+
+    assert policies["calculator"].mode == "pure"
+    assert policies["calculator"].normalize is not None
+    assert policies["lookup"].ttl_seconds == 30
+    assert not policies["mem0_memory"].cacheable
+    with pytest.raises(ValueError):
+        CachePolicy.parse("sometimes")
+
+
+def test_pure_tool_is_executed_once():
+    """A repeated expression is served from the cache with the caller's toolUseId."""
+    cache = ToolResultCache(parse_policies("calculator=pure"))
+    inner = CountingTool()
+    tool = cache.wrap(inner)
+
+    first = run_tool(tool, "call_1", {"expression": "2 + 2"})
+    second = run_tool(tool, "call_2", {"expression": "2+2"})
+
+    assert inner.calls == 1
+    assert second["toolUseId"] == "call_2"
+    assert second["content"] == first["content"]
+    assert cache.stats()["tools"]["calculator"] == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_expressions_that_differ_only_in_significant_whitespace_do_not_collide():
+    """Spacing around operators is ignored, but spaces that separate tokens keep expressions apart."""
+    cache = ToolResultCache(parse_policies("calculator=pure"))
+
+    def key(expression):
+        return cache.key_for("calculator", {"expression": expression})
+
+    assert key("2 + 2") == key("2+2") == key(" 2+2 ")
+    assert key("(2 +\n 2)") == key("(2+2)")
+    assert key("sqrt( 2 ) * 3") == key("sqrt(2)*3")
+    for spaced, joined in [("2 3", "23"), ("x y", "xy"), ("2 * * 3", "2**3"), ("1e -5", "1e-5"), ("2\n+3", "2+3")]:
+        assert key(spaced) != key(joined), spaced
+    # Expressions the tokenizer rejects are keyed as written
+    assert key("(2 + 2") != key("(2+2")
+
+
+def test_never_policy_is_not_wrapped():
+    """Tools without a cacheable policy are left untouched."""
+    cache = ToolResultCache(parse_policies("mem0_memory=never"))
+    tool = CountingTool("mem0_memory")
+
+    assert cache.wrap(tool) is tool
+
+
+def test_ttl_expiry_and_lru_eviction():
+    """TTL entries expire and the least recently used entry is evicted first."""
+    cache = ToolResultCache({"lookup": CachePolicy("ttl", 0.01)}, max_entries=2)
+    result = {"toolUseId": "x", "status": "success", "content": [{"text": "ok"}]}
+    cache.put("lookup", "k1", result)
+    time.sleep(0.02)
+    assert cache.get("lookup", "k1") is None
+
+    cache.policies["lookup"] = CachePolicy("pure")
+    for key in ("a", "b", "c"):
+        cache.put("lookup", key, result)
+    assert cache.get("lookup", "a") is None
+    assert cache.get("lookup", "c") == {"status": "success", "content": [{"text": "ok"}]}
+    assert cache.stats()["tools"]["lookup"]["evictions"] == 1
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    """Two caches on the same file (as in two workers) see each other's entries."""
+    path = str(tmp_path / "tool_cache.sqlite3")
+    first = SqliteToolResultCache(path, parse_policies("calculator=pure"), max_entries=2)
+    second = SqliteToolResultCache(path, parse_policies("calculator=pure"), max_entries=2)
+    inner = CountingTool()
+
+    run_tool(first.wrap(inner), "call_1", {"expression": "6*7"})
+    result = run_tool(second.wrap(inner), "call_2", {"expression": "6 * 7"})
+
+    assert inner.calls == 1
+    assert result["toolUseId"] == "call_2"
+
+    for expression in ("1", "2"):
+        run_tool(first.wrap(inner), "call_x", {"expression": expression})
+    assert second.stats()["entries"] == 2
+    assert first.stats()["tools"]["calculator"]["evictions"] == 1
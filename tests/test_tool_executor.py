@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Unit tests for the parallel tool executor.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+from strands import Agent
+from strands.models.model import Model
+from strands.tools.tools import PythonAgentTool
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from config.settings import _parse_float_map
+from utils.tool_executor import ParallelToolExecutor
+
+
+class BatchModel(Model):
+    """Requests ``calls`` (tool name, input) in one turn, then ends the turn once the results arrive."""
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.results = []
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        last = messages[-1]["content"]
+        yield {"messageStart": {"role": "assistant"}}
+        if "toolResult" not in last[0]:
+            for index, (name, tool_input) in enumerate(self.calls):
+                yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"t{index}", "name": name}}}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(tool_input)}}}}
+                yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        else:
+            self.results.append([block["toolResult"] for block in last])
+            yield {"contentBlockDelta": {"delta": {"text": "done"}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+def sleep_tool(name, on_call=None):
+    """A sync tool that sleeps for ``input["seconds"]`` and answers with its own name."""
+    spec = {"name": name, "description": "", "inputSchema": {"json": {}}}
+
+    def run(tool, **kwargs):
+        if on_call is not None:
+            on_call(tool)
+        time.sleep(tool["input"]["seconds"])
+        return {"toolUseId": tool["toolUseId"], "status": "success", "content": [{"text": name}]}
+
+    return PythonAgentTool(name, spec, run)
+
+
+def run_batch(executor, tools, calls):
+    model = BatchModel(calls)
+    agent = Agent(model=model, tools=tools, tool_executor=executor, callback_handler=None)
+    asyncio.run(agent.invoke_async("go"))
+    [results] = model.results
+    return results
+
+
+def test_timeouts_become_error_results_with_per_tool_overrides():
+    """A tool that overruns its TOOL_TIMEOUTS entry returns an error result; others are unaffected."""
+    executor = ParallelToolExecutor(default_timeout=5.0, tool_timeouts=_parse_float_map("slow=0.05, fast=1"))
+    assert executor.timeout_for("slow") == 0.05 and executor.timeout_for("other") == 5.0
+
+    started = time.perf_counter()
+    results = run_batch(
+        executor, [sleep_tool("slow"), sleep_tool("fast")],
+        [("slow", {"seconds": 0.5}), ("fast", {"seconds": 0.1})],
+    )
+
+    assert time.perf_counter() - started < 0.45
+    assert results[0]["status"] == "error"
+    assert results[0]["content"][0]["text"] == "Tool 'slow' timed out after 0.05s"
+    assert results[1]["status"] == "success" and results[1]["content"][0]["text"] == "fast"
+
+
+def test_results_come_back_in_call_order():
+    """Results follow the order the model issued the calls, not the order the tools finished."""
+    executor = ParallelToolExecutor(max_concurrency=4)
+    results = run_batch(
+        executor, [sleep_tool("a"), sleep_tool("b"), sleep_tool("c")],
+        [("a", {"seconds": 0.15}), ("b", {"seconds": 0.0}), ("c", {"seconds": 0.05})],
+    )
+    assert [result["toolUseId"] for result in results] == ["t0", "t1", "t2"]
+    assert [result["content"][0]["text"] for result in results] == ["a", "b", "c"]
+
+
+def test_concurrency_limit_is_enforced():
+    """No more than max_concurrency tools run at once, and the batch still overlaps up to that limit."""
+    lock = threading.Lock()
+    running = [0, 0]  # current, peak
+
+    def on_call(tool):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    executor = ParallelToolExecutor(max_concurrency=2)
+    started = time.perf_counter()
+    results = run_batch(executor, [sleep_tool("work", on_call)], [("work", {"seconds": 0.0})] * 6)
+
+    assert running[1] == 2
+    assert 0.15 <= time.perf_counter() - started < 0.3
+    assert [result["status"] for result in results] == ["success"] * 6
+
+
+def test_shared_thread_pool_is_installed_once_per_loop():
+    """Every loop runs sync tools on the one shared pool, installed on its first tool batch only."""
+    threads = []
+    executor = ParallelToolExecutor(thread_pool_size=2)
+    tools = [sleep_tool("work", lambda tool: threads.append(threading.current_thread().name))]
+    installs = []
+
+    async def two_batches():
+        loop = asyncio.get_running_loop()
+        install = loop.set_default_executor
+        loop.set_default_executor = lambda pool: (installs.append(pool), install(pool))
+        for _ in range(2):
+            model = BatchModel([("work", {"seconds": 0.0})] * 2)
+            agent = Agent(model=model, tools=tools, tool_executor=executor, callback_handler=None)
+            await agent.invoke_async("go")
+
+    asyncio.run(two_batches())
+    asyncio.run(two_batches())
+
+    assert installs == [executor.thread_pool] * 2
+    assert len(threads) == 8 and all(name.startswith("tool") for name in threads)
+    # The pool survives each loop's shutdown and keeps its threads
+    assert len(set(threads)) <= 2
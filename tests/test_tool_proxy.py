@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Unit tests for the layered tool proxies.
+"""
+import asyncio
+import os
+import sys
+
+from strands import Agent
+from strands.tools.tools import PythonAgentTool
+from strands.types._events import ToolResultEvent
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.tool_proxy import ToolProxy, has_layer, wrap_tool
+
+ECHO_SPEC = {"name": "echo", "description": "", "inputSchema": {"json": {}}}
+
+
+def echo(tool, **kwargs):
+    return {"toolUseId": tool["toolUseId"], "status": "success", "content": [{"text": tool["input"]["text"]}]}
+
+
+class Tagging(ToolProxy):
+    """Appends its tag to the wrapped tool's text."""
+
+    tag = "tag"
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        async for event in super().stream(tool_use, invocation_state, **kwargs):
+            if isinstance(event, ToolResultEvent):
+                result = event.tool_result
+                event = ToolResultEvent({**result, "content": [{"text": result["content"][0]["text"] + self.tag}]})
+            yield event
+
+
+class Outer(Tagging):
+    tag = "+outer"
+
+
+class Inner(Tagging):
+    tag = "+inner"
+
+
+def call(tool, text):
+    async def collect():
+        return [event async for event in tool.stream({"toolUseId": "t1", "input": {"text": text}}, {})]
+    return asyncio.run(collect())[-1].tool_result["content"][0]["text"]
+
+
+def test_layers_stack_in_the_order_they_are_applied():
+    """The first proxy applied is innermost, and every layer keeps the tool's name and spec."""
+    agent = Agent(tools=[PythonAgentTool("echo", ECHO_SPEC, echo)], callback_handler=None)
+    wrap_tool(agent, "echo", Inner)
+    tool = wrap_tool(agent, "echo", Outer)
+
+    assert agent.tool_registry.registry["echo"] is tool
+    assert (tool.tool_name, tool.tool_spec, tool.tool_type) == ("echo", ECHO_SPEC, "python")
+    assert call(tool, "hi") == "hi+inner+outer"
+
+
+def test_each_proxy_class_wraps_a_tool_once():
+    """Re-applying a layer, even beneath another one, or declining to wrap leaves the tool as it is."""
+    agent = Agent(tools=[PythonAgentTool("echo", ECHO_SPEC, echo)], callback_handler=None)
+    wrap_tool(agent, "echo", Inner)
+    tool = wrap_tool(agent, "echo", Outer)
+
+    assert wrap_tool(agent, "echo", Inner) is tool
+    assert wrap_tool(agent, "echo", lambda inner: inner) is tool
+    assert wrap_tool(agent, "missing", Inner) is None
+    assert has_layer(tool, Inner) and not has_layer(tool._tool, Outer)
+    assert call(agent.tool_registry.registry["echo"], "hi") == "hi+inner+outer"
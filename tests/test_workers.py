@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Unit tests for session-affine worker routing.
+"""
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+import requests
+import uvicorn
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.cancellation import DisconnectMiddleware, current_cancel
+from utils.workers import SESSION_HEADER, build_router, session_id_for, worker_index
+
+
+def serve(app):
+    """Run an ASGI app on a free local port in a background thread; returns (server, port)."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 5
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return server, port
+
+
+def test_session_id_resolution_matches_invoke():
+    """Header wins, then payload session_id, then user_id, then the default user."""
+    payload = {"prompt": "hi", "session_id": "s1", "user_id": "u1"}
+
+    assert session_id_for({SESSION_HEADER: "h1"}, payload) == "h1"
+    assert session_id_for({}, payload) == "s1"
+    assert session_id_for({}, {"prompt": "hi", "user_id": "u1"}) == "u1"
+    assert session_id_for({}, {"prompt": "hi"}) == "neo"
+    assert session_id_for({}, None) == "neo"
+
+
+def test_worker_index_is_stable_and_spread():
+    """A session always maps to the same worker and sessions cover every worker."""
+    assert worker_index("session-42", 4) == worker_index("session-42", 4)
+    assert {worker_index(f"session-{i}", 4) for i in range(200)} == {0, 1, 2, 3}
+
+
+def test_router_passes_client_disconnects_to_the_worker():
+    """A client that gives up on the router gets its worker-side invocation cancelled."""
+    cancelled = threading.Event()
+
+    async def invocations(request):
+        await request.body()
+        token = current_cancel.get()
+        if await asyncio.get_running_loop().run_in_executor(None, token.wait, 5):
+            cancelled.set()
+        return JSONResponse({"result": "done"})
+
+    worker, worker_port = serve(Starlette(
+        routes=[Route("/invocations", invocations, methods=["POST"])],
+        middleware=[Middleware(DisconnectMiddleware)],
+    ))
+    router, router_port = serve(build_router([worker_port]))
+    try:
+        started = time.monotonic()
+        try:
+            requests.post(f"http://127.0.0.1:{router_port}/invocations", json={"prompt": "hi"}, timeout=0.2)
+        except requests.Timeout:
+            pass
+        assert cancelled.wait(2)
+        assert time.monotonic() - started < 2
+    finally:
+        router.should_exit = worker.should_exit = True